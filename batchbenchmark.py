@@ -0,0 +1,150 @@
+"""
+This module compares the report batching and inter-arrival time calculation of simdata, against the element-by-element
+loops they replaced. It uses synthetic reporter histories.
+
+Usage: python batchbenchmark.py --reporters 1000 --reports 500
+"""
+
+import argparse
+import datetime
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+import pytz
+
+import simdata
+import gtconfig
+
+logger = gtconfig.get_logger("batch_benchmark", "batch_benchmark.txt", level=logging.INFO)
+
+
+def get_synthetic_history(reports, seed=0):
+    """
+    Generates the reports of a reporter, that arrive in bursts during a five year period.
+
+    :param reports: Number of reports.
+    :param seed: Seed for the random number generator.
+    :return: Bug report dataframe, with the creation date column.
+    """
+    random_state = np.random.RandomState(seed)
+
+    burst_starts = random_state.randint(0, 5 * 365 * 24 * 60, size=max(1, reports / 5))
+    report_minutes = random_state.choice(burst_starts, size=reports) + random_state.randint(0, 3 * 24 * 60,
+                                                                                          size=reports)
+    created_dates = pd.Timestamp("2010-01-01", tz="UTC") + pd.to_timedelta(report_minutes, unit="m")
+
+    return pd.DataFrame({simdata.CREATED_DATE_COLUMN: created_dates})
+
+
+def get_report_batches_by_element(bug_reports, window_size=1):
+    """
+    Report batching over each creation date, as simdata.get_report_batches used to do.
+    :return: List of dictionaries, with batch head and batch count.
+    """
+    report_dates = bug_reports[simdata.CREATED_DATE_COLUMN]
+    report_dates = report_dates.sort_values()
+
+    batches = []
+    for position, created_date in enumerate(report_dates.values):
+        if len(batches) == 0:
+            batches.append({"batch_head": created_date,
+                            "batch_count": 1})
+        else:
+            last_batch_head = batches[-1]["batch_head"]
+            distance = created_date - last_batch_head
+
+            if hasattr(distance, 'days'):
+                distance_in_days = distance.days
+            else:
+                distance_in_days = distance.astype('timedelta64[D]')
+                distance_in_days = distance_in_days / np.timedelta64(1, 'D')
+
+            if distance_in_days <= window_size:
+                batches[-1]["batch_count"] += 1
+            else:
+                batches.append({"batch_head": created_date,
+                                "batch_count": 1})
+
+    return batches
+
+
+def get_interarrival_times_by_element(arrival_times, period_start):
+    """
+    Inter-arrival times over each arrival, as simdata.get_interarrival_times used to do.
+    :return: Series of inter-arrival times.
+    """
+    interarrival_times = []
+
+    for position, created_date in enumerate(arrival_times):
+        if position > 0:
+            distance = created_date - arrival_times[position - 1]
+            interarrival_times.append(simdata.get_distance_in_hours(distance))
+        else:
+            if isinstance(created_date, np.datetime64):
+                created_date = datetime.datetime.utcfromtimestamp(created_date.tolist() / 1e9)
+                created_date = pytz.utc.localize(created_date)
+
+            distance = simdata.get_distance_in_hours(created_date - period_start)
+
+            if distance > 0:
+                interarrival_times.append(distance)
+
+    return pd.Series(data=interarrival_times)
+
+
+def run_by_element(histories, period_start):
+    """
+    :return: Inter-arrival samples and batch sizes per history.
+    """
+    results = []
+    for bug_reports in histories:
+        batches = get_report_batches_by_element(bug_reports)
+        arrival_times = [batch["batch_head"] for batch in batches]
+
+        results.append((get_interarrival_times_by_element(arrival_times, period_start),
+                        [batch["batch_count"] for batch in batches]))
+
+    return results
+
+
+def run_vectorized(histories, period_start):
+    """
+    :return: Inter-arrival samples and batch sizes per history.
+    """
+    results = []
+    for bug_reports in histories:
+        arrival_times, batch_counts = simdata.get_report_batches(bug_reports)
+        results.append((simdata.get_interarrival_times(arrival_times, period_start), list(batch_counts)))
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks report batching and inter-arrival time calculation.")
+    parser.add_argument("--reporters", type=int, default=1000, help="Number of reporter histories.")
+    parser.add_argument("--reports", type=int, default=500, help="Reports per reporter.")
+    arguments = parser.parse_args()
+
+    histories = [get_synthetic_history(arguments.reports, seed) for seed in range(arguments.reporters)]
+    period_start = min([bug_reports[simdata.CREATED_DATE_COLUMN].min() for bug_reports in histories])
+
+    timings = {}
+    results = {}
+    for description, runner in [("Element-by-element", run_by_element), ("Vectorized", run_vectorized)]:
+        start_time = time.time()
+        results[description] = runner(histories, period_start)
+        timings[description] = time.time() - start_time
+
+        logger.info(description + " batching of " + str(arguments.reporters) + " histories with " + str(
+            arguments.reports) + " reports: " + str(timings[description]) + " seconds.")
+
+    matches = [np.allclose(by_element[0], vectorized[0]) and by_element[1] == vectorized[1] for
+               by_element, vectorized in zip(results["Element-by-element"], results["Vectorized"])]
+    logger.info("Matching histories: " + str(sum(matches)) + " of " + str(len(matches)) + ". Speed-up: " + str(
+        timings["Element-by-element"] / timings["Vectorized"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,915 @@
+"""
+This module provides the enhanced bug report dataframe to all the experiment entry points. Parsing the dates of the
+issues CSV file is expensive, so the enhanced dataframe is built once and stored as a snapshot. Later runs load the
+snapshot, as long as the source file has not changed: Its size, modification time and content hash are stored along
+the snapshot.
+
+The snapshot is stored in Parquet format when pyarrow is available, and pickled otherwise. Only the columns used by the
+simulation pipeline are read, and the low-cardinality ones are stored as categories.
+
+After a new export, the snapshot can be updated incrementally: Only the issues that are new or whose values changed
+-compared by a per-issue hash- are enhanced again. Each time a snapshot is stored, a version of the reports of each
+project -a hash of its per-issue hashes- is recorded in the snapshot metadata, no matter if it was updated or built
+from scratch. Payoffs persisted by payoffgetter are stamped with the versions of the projects of their game, so they
+are not reused once those reports change (see get_reports_stamp). Reporter statistics are calculated from the current
+snapshot on every run, and distribution fits are cached by sample content (see siminput.py), so only the samples that
+changed are fitted again.
+
+For parallel analysis, the enhanced dataframe can also be shared as memory-mapped column arrays, that workers open
+read-only instead of receiving a pickled copy. See share_dataframe and SharedDataset.
+
+Run this module for rebuilding the snapshot: python dataset.py --rebuild
+Or for updating it after a new export: python dataset.py --update
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+import pytz
+
+import simdata
+import gtconfig
+
+try:
+    import pyarrow
+
+    COLUMNAR_AVAILABLE = True
+except ImportError:
+    COLUMNAR_AVAILABLE = False
+
+PARQUET_FORMAT = "parquet"
+PICKLE_FORMAT = "pickle"
+
+HASH_BLOCK_SIZE = 1024 * 1024
+
+# Increase it when the columns added by simdata.enhace_report_dataframe change, to discard older snapshots.
+SNAPSHOT_VERSION = 7
+
+DATE_COLUMNS = ['Creation Date', 'JIRA Resolved Date', 'Priority Change Date']
+CATEGORICAL_COLUMNS = [simdata.PROJECT_KEY_COUMN, simdata.STATUS_COLUMN, 'Resolution', 'Priority', 'Original Priority',
+                       'New Priority']
+# Reporters, resolvers and priority changers are compared between them, so they share categories.
+PEOPLE_COLUMNS = [simdata.REPORTER_COLUMN, simdata.RESOLVER_COLUMN, simdata.PRIORITY_CHANGER_COLUMN]
+NUMERIC_COLUMNS = ['Commits']
+INGESTION_COLUMNS = [simdata.ISSUE_KEY_COLUMN] + DATE_COLUMNS + CATEGORICAL_COLUMNS + PEOPLE_COLUMNS + NUMERIC_COLUMNS
+
+ROW_HASH_COLUMN = "Row Hash"
+
+logger = gtconfig.get_logger("dataset_snapshot", "dataset_snapshot.txt", level=logging.INFO)
+
+
+def get_file_hash(file_name):
+    """
+    Calculates the SHA-1 digest of a file, reading it in blocks.
+    :param file_name: File name.
+    :return: Hexadecimal digest.
+    """
+    digest = hashlib.sha1()
+
+    with open(file_name, "rb") as source_file:
+        for block in iter(lambda: source_file.read(HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def get_source_signature(source_csv, with_hash=True):
+    """
+    Identifies the contents of the source file.
+    :param source_csv: Source file name.
+    :param with_hash: If False, the content hash is not calculated.
+    :return: Dictionary with size, modification time and hash.
+    """
+    file_stats = os.stat(source_csv)
+    signature = {"size": file_stats.st_size,
+                 "mtime": file_stats.st_mtime,
+                 "sha1": None}
+
+    if with_hash:
+        signature["sha1"] = get_file_hash(source_csv)
+
+    return signature
+
+
+def get_snapshot_files(source_csv, snapshot_folder):
+    """
+    Snapshot and metadata file names for a source file.
+    :param source_csv: Source file name.
+    :param snapshot_folder: Folder containing the snapshots.
+    :return: Snapshot file prefix and metadata file.
+    """
+    source_name = os.path.splitext(os.path.basename(source_csv))[0]
+    snapshot_prefix = os.path.join(snapshot_folder, source_name + "_enhanced")
+
+    return snapshot_prefix, snapshot_prefix + ".json"
+
+
+def is_snapshot_valid(metadata, source_csv):
+    """
+    Checks if a snapshot was built from the current contents of the source file. If the size and modification time
+    match, the content is assumed to be the same. If only the modification time differs, the content hash decides.
+
+    :param metadata: Metadata stored along the snapshot.
+    :param source_csv: Source file name.
+    :return: True if the snapshot can be used.
+    """
+    signature = get_source_signature(source_csv, with_hash=False)
+
+    if metadata.get("size") != signature["size"]:
+        return False
+
+    if metadata.get("mtime") == signature["mtime"]:
+        return True
+
+    return metadata.get("sha1") == get_file_hash(source_csv)
+
+
+def read_issues(source_csv):
+    """
+    Reads the bug report CSV file. If configured in gtconfig, only the columns on INGESTION_COLUMNS are read, using
+    categorical and downcasted numeric types.
+
+    :param source_csv: Source file name.
+    :return: Bug report dataframe.
+    """
+    if not gtconfig.compact_dataset:
+        return pd.read_csv(source_csv)
+
+    all_issues = pd.read_csv(source_csv, usecols=lambda column: column in INGESTION_COLUMNS,
+                             dtype={column: "category" for column in CATEGORICAL_COLUMNS})
+    return set_compact_types(all_issues)
+
+
+def set_compact_types(all_issues):
+    """
+    Assigns categorical types to the low-cardinality columns, and downcasts the numeric ones.
+    :param all_issues: Bug report dataframe.
+    :return: The same dataframe, with the new types.
+    """
+    for column in CATEGORICAL_COLUMNS:
+        if column in all_issues.columns:
+            all_issues[column] = all_issues[column].astype("category")
+
+    people_columns = [column for column in PEOPLE_COLUMNS if column in all_issues.columns]
+    if len(people_columns) > 0:
+        people = pd.concat([all_issues[column].astype(object) for column in people_columns]).dropna().unique()
+        people_type = pd.api.types.CategoricalDtype(categories=people)
+        for column in people_columns:
+            all_issues[column] = all_issues[column].astype(object).astype(people_type)
+
+    for column in NUMERIC_COLUMNS:
+        if column in all_issues.columns:
+            downcast = "integer" if all_issues[column].notnull().all() else "float"
+            all_issues[column] = pd.to_numeric(all_issues[column], downcast=downcast)
+
+    return all_issues
+
+
+def get_row_hashes(all_issues):
+    """
+    Hashes all the ingested values of each issue, for detecting the issues that changed between two exports. The hash
+    does not depend on the column types, so a column read as integer on one export and as float on the other gives the
+    same result.
+
+    :param all_issues: Bug report dataframe, as returned by read_issues.
+    :return: Array of unsigned integers, one per issue.
+    """
+    columns = sorted(column for column in all_issues.columns if column != ROW_HASH_COLUMN)
+    row_values = pd.DataFrame({column: all_issues[column].astype(object) for column in columns}, columns=columns)
+
+    for column in columns:
+        if pd.api.types.is_numeric_dtype(all_issues[column]) and not pd.api.types.is_bool_dtype(all_issues[column]):
+            row_values[column] = all_issues[column].astype(float)
+
+    return pd.util.hash_pandas_object(row_values, index=False).values
+
+
+def enhance_issues(all_issues):
+    """
+    Adds the calculated fields to the issues. Timezone-aware dates are stored in UTC: Issues enhanced separately -on
+    different chunks or updates- get different timezones otherwise, and their dataframes cannot be concatenated.
+
+    :param all_issues: Bug report dataframe, as returned by read_issues.
+    :return: Enhanced dataframe.
+    """
+    return set_utc_dates(simdata.enhace_report_dataframe(all_issues))
+
+
+def set_utc_dates(enhanced_dataframe):
+    """
+    Converts the timezone-aware date columns of an enhanced dataframe to UTC.
+    :param enhanced_dataframe: Enhanced dataframe.
+    :return: The same dataframe, with the new types.
+    """
+    for column in [simdata.CREATED_DATE_COLUMN, simdata.RESOLUTION_DATE_COLUMN]:
+        if column in enhanced_dataframe.columns and enhanced_dataframe[column].dt.tz is not None:
+            enhanced_dataframe[column] = enhanced_dataframe[column].dt.tz_convert("UTC")
+
+    return enhanced_dataframe
+
+
+def get_memory_report(dataframe):
+    """
+    Memory used by each column of a dataframe.
+    :param dataframe: Dataframe.
+    :return: Dataframe with the type and megabytes per column.
+    """
+    memory_usage = dataframe.memory_usage(index=False, deep=True)
+
+    return pd.DataFrame({"column": memory_usage.index,
+                         "dtype": [str(dataframe[column].dtype) for column in memory_usage.index],
+                         "megabytes": memory_usage.values / (1024.0 * 1024.0)},
+                        columns=["column", "dtype", "megabytes"]).sort_values("megabytes", ascending=False)
+
+
+def log_memory_footprint(dataframe):
+    """
+    Logs the total memory used by a dataframe.
+    """
+    megabytes = dataframe.memory_usage(index=True, deep=True).sum() / (1024.0 * 1024.0)
+    logger.info("Enhanced dataframe: " + str(len(dataframe.index)) + " issues and " + str(
+        len(dataframe.columns)) + " columns, using " + str(round(megabytes, 2)) + " MB.")
+
+
+def write_snapshot(enhanced_dataframe, snapshot_prefix):
+    """
+    Stores the dataframe in Parquet format, or pickled if pyarrow is not available or cannot convert the columns.
+    :param enhanced_dataframe: Dataframe to store.
+    :param snapshot_prefix: Snapshot file name, without extension.
+    :return: Snapshot format and file name.
+    """
+    if COLUMNAR_AVAILABLE:
+        snapshot_file = snapshot_prefix + ".parquet"
+        try:
+            enhanced_dataframe.to_parquet(snapshot_file, engine="pyarrow")
+            return PARQUET_FORMAT, snapshot_file
+        except (ValueError, TypeError) as error:
+            logger.warning("Cannot store the snapshot in Parquet format: " + str(error))
+
+    snapshot_file = snapshot_prefix + ".pkl"
+    enhanced_dataframe.to_pickle(snapshot_file)
+    return PICKLE_FORMAT, snapshot_file
+
+
+def read_snapshot(snapshot_format, snapshot_file):
+    """
+    Loads a snapshot, stored by write_snapshot.
+    :param snapshot_format: Snapshot format.
+    :param snapshot_file: Snapshot file name.
+    :return: Dataframe.
+    """
+    if snapshot_format == PARQUET_FORMAT:
+        return pd.read_parquet(snapshot_file, engine="pyarrow")
+
+    return pd.read_pickle(snapshot_file)
+
+
+def read_metadata(metadata_file):
+    """
+    :return: Metadata stored along a snapshot, or None if the file does not exist.
+    """
+    if not os.path.isfile(metadata_file):
+        return None
+
+    with open(metadata_file) as metadata_input:
+        return json.load(metadata_input)
+
+
+def is_snapshot_compatible(metadata):
+    """
+    Checks if a stored snapshot can be read and has the columns of the current version, no matter the source file.
+    :param metadata: Metadata stored along the snapshot.
+    :return: True if the snapshot can be used.
+    """
+    return metadata.get("pandas_version") == pd.__version__ and metadata.get(
+        "snapshot_version") == SNAPSHOT_VERSION and os.path.isfile(metadata["snapshot_file"])
+
+
+def get_project_versions(enhanced_dataframe):
+    """
+    Identifies the reports of each project by their content: Two snapshots give a project the same version only if its
+    issues have the same per-issue hashes.
+
+    :param enhanced_dataframe: Dataframe containing the row hash column.
+    :return: Dictionary from project key to a hexadecimal digest. Empty if the dataframe has no project column.
+    """
+    if simdata.PROJECT_KEY_COUMN not in enhanced_dataframe.columns:
+        return {}
+
+    project_versions = {}
+    row_hashes = enhanced_dataframe[ROW_HASH_COLUMN].values.astype(np.uint64)
+    project_keys = enhanced_dataframe[simdata.PROJECT_KEY_COUMN].astype(object).values
+    for project_key, project_hashes in pd.Series(row_hashes).groupby(project_keys):
+        project_versions[str(project_key)] = hashlib.sha1(np.sort(project_hashes.values).tobytes()).hexdigest()
+
+    return project_versions
+
+
+def store_snapshot(enhanced_dataframe, source_csv, snapshot_folder):
+    """
+    Writes the snapshot and its metadata, including the version of the reports of each project.
+    :param enhanced_dataframe: Dataframe to store.
+    :param source_csv: Source file name.
+    :param snapshot_folder: Folder for storing the snapshot.
+    :return: Snapshot metadata.
+    """
+    if not os.path.exists(snapshot_folder):
+        os.makedirs(snapshot_folder)
+
+    snapshot_prefix, metadata_file = get_snapshot_files(source_csv, snapshot_folder)
+    snapshot_format, snapshot_file = write_snapshot(enhanced_dataframe, snapshot_prefix)
+
+    metadata = get_source_signature(source_csv)
+    metadata["source_csv"] = source_csv
+    metadata["format"] = snapshot_format
+    metadata["snapshot_file"] = snapshot_file
+    metadata["pandas_version"] = pd.__version__
+    metadata["snapshot_version"] = SNAPSHOT_VERSION
+    metadata["project_versions"] = get_project_versions(enhanced_dataframe)
+
+    with open(metadata_file, "w") as metadata_output:
+        json.dump(metadata, metadata_output, indent=4)
+
+    logger.info("Snapshot stored at " + snapshot_file)
+    log_memory_footprint(enhanced_dataframe)
+    return metadata
+
+
+def build_snapshot(source_csv, snapshot_folder):
+    """
+    Reads the source file, adds the calculated fields and stores the result as a snapshot.
+
+    :param source_csv: Source file name.
+    :param snapshot_folder: Folder for storing the snapshot.
+    :return: Enhanced dataframe.
+    """
+    logger.info("Loading information from " + source_csv)
+    all_issues = read_issues(source_csv)
+    all_issues[ROW_HASH_COLUMN] = get_row_hashes(all_issues)
+
+    logger.info("Adding calculated fields to " + str(len(all_issues.index)) + " issues ...")
+    enhanced_dataframe = enhance_issues(all_issues)
+
+    store_snapshot(enhanced_dataframe, source_csv, snapshot_folder)
+    return enhanced_dataframe
+
+
+def update_snapshot(source_csv=None, snapshot_folder=None):
+    """
+    Updates the stored snapshot after a new export of the source file. Issues are matched by their key: Only the ones
+    that are new, or whose ingested values changed, get their calculated fields added again. The rest are taken from
+    the stored snapshot, and the ones missing from the export are discarded.
+
+    If there is no compatible snapshot to update, it is built from scratch.
+
+    :param source_csv: Source file name. By default, the one configured on gtconfig.
+    :param snapshot_folder: Folder containing the snapshots. By default, the one configured on gtconfig.
+    :return: Enhanced dataframe, and a dictionary with the lists of new, changed and removed issue keys.
+    """
+    if source_csv is None:
+        source_csv = simdata.ALL_ISSUES_CSV
+    if snapshot_folder is None:
+        snapshot_folder = gtconfig.snapshot_folder
+
+    _, metadata_file = get_snapshot_files(source_csv, snapshot_folder)
+    metadata = read_metadata(metadata_file)
+
+    if metadata is None or not is_snapshot_compatible(metadata):
+        logger.info("There is no snapshot to update for " + source_csv)
+        enhanced_dataframe = build_snapshot(source_csv, snapshot_folder)
+        return enhanced_dataframe, {"new": list(enhanced_dataframe[simdata.ISSUE_KEY_COLUMN]), "changed": [],
+                                    "removed": []}
+
+    stored_dataframe = read_snapshot(metadata["format"], metadata["snapshot_file"])
+
+    logger.info("Loading information from " + source_csv)
+    all_issues = read_issues(source_csv)
+    all_issues[ROW_HASH_COLUMN] = get_row_hashes(all_issues)
+
+    stored_hashes = pd.Series(stored_dataframe[ROW_HASH_COLUMN].values,
+                              index=stored_dataframe[simdata.ISSUE_KEY_COLUMN].astype(object).values)
+    current_hashes = pd.Series(all_issues[ROW_HASH_COLUMN].values,
+                               index=all_issues[simdata.ISSUE_KEY_COLUMN].astype(object).values)
+
+    if not stored_hashes.index.is_unique or not current_hashes.index.is_unique:
+        logger.warning("Issue keys are not unique on " + source_csv + ". Building the snapshot from scratch.")
+        enhanced_dataframe = build_snapshot(source_csv, snapshot_folder)
+        return enhanced_dataframe, {"new": list(enhanced_dataframe[simdata.ISSUE_KEY_COLUMN]), "changed": [],
+                                    "removed": []}
+
+    common_keys = current_hashes.index.intersection(stored_hashes.index)
+    new_keys = current_hashes.index.difference(stored_hashes.index)
+    removed_keys = stored_hashes.index.difference(current_hashes.index)
+    changed_keys = common_keys[current_hashes[common_keys].values != stored_hashes[common_keys].values]
+
+    logger.info("Updating the snapshot: " + str(len(new_keys)) + " new issues, " + str(
+        len(changed_keys)) + " changed and " + str(len(removed_keys)) + " removed.")
+
+    stored_keys = stored_dataframe[simdata.ISSUE_KEY_COLUMN]
+    updated_issues = all_issues[all_issues[simdata.ISSUE_KEY_COLUMN].isin(new_keys.union(changed_keys))]
+    kept_issues = stored_dataframe[stored_keys.isin(common_keys.difference(changed_keys))]
+
+    # Both parts need the same timezone, or the date columns of the concatenation would be of object type.
+    enhanced_dataframe = set_utc_dates(kept_issues.copy())
+    if len(updated_issues.index) > 0:
+        updated_issues = enhance_issues(updated_issues.copy())
+        enhanced_dataframe = pd.concat([enhanced_dataframe, updated_issues[kept_issues.columns]])
+
+    # Rows keep the position they have on the source file, as when the snapshot is built from scratch.
+    positions = pd.Series(range(len(all_issues.index)), index=current_hashes.index)
+    enhanced_dataframe.index = positions[enhanced_dataframe[simdata.ISSUE_KEY_COLUMN].astype(object).values].values
+    enhanced_dataframe = enhanced_dataframe.sort_index()
+
+    if gtconfig.compact_dataset:
+        enhanced_dataframe = set_compact_types(enhanced_dataframe)
+
+    store_snapshot(enhanced_dataframe, source_csv, snapshot_folder)
+    return enhanced_dataframe, {"new": list(new_keys), "changed": list(changed_keys), "removed": list(removed_keys)}
+
+
+def get_reports_stamp(project_keys=None, source_csv=None, snapshot_folder=None):
+    """
+    Identifies the reports a game was analysed with, from the project versions of the current snapshot. Persisted
+    payoffs are only reused if they have the stamp of the current reports. See payoffstore.PayoffStore.load.
+
+    :param project_keys: Projects of the game. None for all the projects.
+    :param source_csv: Source file name. By default, the one configured on gtconfig.
+    :param snapshot_folder: Folder containing the snapshots. By default, the one configured on gtconfig.
+    :return: Hexadecimal digest, or None if there is no snapshot to take the versions from.
+    """
+    if source_csv is None:
+        source_csv = simdata.ALL_ISSUES_CSV
+    if snapshot_folder is None:
+        snapshot_folder = gtconfig.snapshot_folder
+
+    if not gtconfig.use_dataset_snapshot:
+        return None
+
+    _, metadata_file = get_snapshot_files(source_csv, snapshot_folder)
+    metadata = read_metadata(metadata_file)
+    if metadata is None or "project_versions" not in metadata:
+        return None
+
+    project_versions = metadata["project_versions"]
+    if project_keys is not None and len(project_keys) > 0:
+        project_versions = {str(project_key): project_versions.get(str(project_key)) for project_key in
+                            project_keys}
+
+    return hashlib.sha1(json.dumps(project_versions, sort_keys=True)).hexdigest()
+
+
+def load_enhanced_dataframe(source_csv=None, snapshot_folder=None, rebuild=False):
+    """
+    Returns the bug report dataframe with the calculated fields, from the snapshot if it is still valid.
+
+    :param source_csv: Source file name. By default, the one configured on gtconfig.
+    :param snapshot_folder: Folder containing the snapshots. By default, the one configured on gtconfig.
+    :param rebuild: If True, the snapshot is built again from the source file.
+    :return: Enhanced dataframe.
+    """
+    if source_csv is None:
+        source_csv = simdata.ALL_ISSUES_CSV
+    if snapshot_folder is None:
+        snapshot_folder = gtconfig.snapshot_folder
+
+    if not gtconfig.use_dataset_snapshot:
+        logger.info("Loading information from " + source_csv)
+        return enhance_issues(read_issues(source_csv))
+
+    _, metadata_file = get_snapshot_files(source_csv, snapshot_folder)
+    metadata = read_metadata(metadata_file)
+
+    if not rebuild and metadata is not None:
+        if is_snapshot_compatible(metadata) and is_snapshot_valid(metadata, source_csv):
+            logger.info("Loading the enhanced dataframe from " + metadata["snapshot_file"])
+            enhanced_dataframe = read_snapshot(metadata["format"], metadata["snapshot_file"])
+            log_memory_footprint(enhanced_dataframe)
+            return enhanced_dataframe
+
+        logger.info("The snapshot at " + metadata["snapshot_file"] + " is outdated.")
+
+        if gtconfig.incremental_update and is_snapshot_compatible(metadata):
+            enhanced_dataframe, _ = update_snapshot(source_csv, snapshot_folder)
+            return enhanced_dataframe
+
+    return build_snapshot(source_csv, snapshot_folder)
+
+
+def get_partition_metadata_file(partition_folder):
+    """
+    :return: Name of the file describing the partitions in a folder.
+    """
+    return os.path.join(partition_folder, "partitions.json")
+
+
+def build_partitions(source_csv=None, partition_folder=None, project_keys=None,
+                     exclude_self_fix=gtconfig.exclude_self_fix, chunk_size=gtconfig.ingestion_chunk_size):
+    """
+    Reads the source file in chunks and stores the enhanced reports partitioned by project key, so the whole file is
+    never in memory. Each chunk is filtered by project, cleaned from self-fixes and enhanced before being written as
+    one part file per project.
+
+    :param source_csv: Source file name. By default, the one configured on gtconfig.
+    :param partition_folder: Folder for the partitions. By default, the one configured on gtconfig.
+    :param project_keys: Projects to keep. None for all of them.
+    :param exclude_self_fix: True for excluding the reports fixed by their reporter.
+    :param chunk_size: Rows per chunk.
+    :return: Partition metadata.
+    """
+    if source_csv is None:
+        source_csv = simdata.ALL_ISSUES_CSV
+    if partition_folder is None:
+        partition_folder = gtconfig.partition_folder
+
+    if not os.path.exists(partition_folder):
+        os.makedirs(partition_folder)
+
+    metadata_file = get_partition_metadata_file(partition_folder)
+    previous_metadata = read_metadata(metadata_file)
+    if previous_metadata is not None:
+        for parts in previous_metadata["projects"].values():
+            for _, part_file in parts:
+                if os.path.isfile(part_file):
+                    os.remove(part_file)
+
+    usecols = None
+    if gtconfig.compact_dataset:
+        usecols = lambda column: column in INGESTION_COLUMNS
+
+    logger.info("Partitioning " + source_csv + " in chunks of " + str(chunk_size) + " rows ...")
+
+    partitions = {}
+    issues = 0
+    # A chunk can have a text column with no values, that would be read as numeric.
+    text_types = {column: object for column in CATEGORICAL_COLUMNS + PEOPLE_COLUMNS}
+
+    for chunk_index, chunk in enumerate(pd.read_csv(source_csv, usecols=usecols, dtype=text_types,
+                                                    chunksize=chunk_size)):
+        if project_keys is not None:
+            chunk = simdata.filter_by_project(chunk, project_keys)
+        if exclude_self_fix:
+            chunk = simdata.exclude_self_fixes(chunk)
+
+        if chunk.empty:
+            continue
+
+        chunk = enhance_issues(chunk.copy())
+        issues += len(chunk.index)
+
+        for project_key, project_chunk in chunk.groupby(simdata.PROJECT_KEY_COUMN):
+            project_folder = os.path.join(partition_folder, str(project_key))
+            if not os.path.exists(project_folder):
+                os.makedirs(project_folder)
+
+            part = write_snapshot(project_chunk, os.path.join(project_folder, "part-%05d" % chunk_index))
+            partitions.setdefault(str(project_key), []).append(part)
+
+    metadata = get_source_signature(source_csv)
+    metadata["source_csv"] = source_csv
+    metadata["snapshot_version"] = SNAPSHOT_VERSION
+    metadata["project_keys"] = project_keys
+    metadata["exclude_self_fix"] = exclude_self_fix
+    metadata["projects"] = partitions
+
+    with open(metadata_file, "w") as metadata_output:
+        json.dump(metadata, metadata_output, indent=4)
+
+    logger.info(str(issues) + " issues stored in " + str(len(partitions)) + " project partitions at " +
+                partition_folder)
+    return metadata
+
+
+def is_partition_usable(metadata, project_keys, exclude_self_fix):
+    """
+    Checks if partitions contain all the reports needed for some projects. Partitions without self-fixes cannot provide
+    the reports of a caller that keeps them.
+
+    :param metadata: Partition metadata.
+    :param project_keys: Project identifiers. None for all the projects.
+    :param exclude_self_fix: True if the caller excludes the reports fixed by their reporter.
+    :return: True if the partitions can be used.
+    """
+    if metadata["exclude_self_fix"] and not exclude_self_fix:
+        return False
+
+    if metadata["project_keys"] is None:
+        return True
+
+    return project_keys is not None and set(str(project_key) for project_key in project_keys).issubset(
+        set(str(project_key) for project_key in metadata["project_keys"]))
+
+
+def get_partition_metadata(source_csv=None, partition_folder=None, project_keys=None,
+                           exclude_self_fix=gtconfig.exclude_self_fix):
+    """
+    Returns the metadata of the partitioned store. The partitions are built again, for all the projects, if they are
+    missing, outdated or were built with filters that remove reports the caller needs.
+
+    :param source_csv: Source file name. By default, the one configured on gtconfig.
+    :param partition_folder: Folder for the partitions. By default, the one configured on gtconfig.
+    :param project_keys: Projects needed. None for all of them.
+    :param exclude_self_fix: True if the caller excludes the reports fixed by their reporter.
+    :return: Partition metadata.
+    """
+    if source_csv is None:
+        source_csv = simdata.ALL_ISSUES_CSV
+    if partition_folder is None:
+        partition_folder = gtconfig.partition_folder
+
+    metadata = read_metadata(get_partition_metadata_file(partition_folder))
+    if metadata is not None:
+        if metadata.get("snapshot_version") != SNAPSHOT_VERSION or not is_snapshot_valid(metadata, source_csv):
+            logger.info("The partitions at " + partition_folder + " are outdated.")
+            metadata = None
+        elif not is_partition_usable(metadata, project_keys, exclude_self_fix):
+            logger.info("The partitions at " + partition_folder + " were built for projects " + str(
+                metadata["project_keys"]) + " and exclude_self_fix=" + str(metadata["exclude_self_fix"]) +
+                        ". They do not contain all the reports needed.")
+            metadata = None
+
+    if metadata is None:
+        metadata = build_partitions(source_csv, partition_folder, exclude_self_fix=exclude_self_fix)
+
+    return metadata
+
+
+def get_partitioned_projects(source_csv=None, partition_folder=None, exclude_self_fix=gtconfig.exclude_self_fix):
+    """
+    :return: Sorted list of the project keys with reports on the partitioned store.
+    """
+    return sorted(get_partition_metadata(source_csv, partition_folder, exclude_self_fix=exclude_self_fix)[
+                      "projects"].keys())
+
+
+def load_project_reports(project_keys, source_csv=None, partition_folder=None,
+                         exclude_self_fix=gtconfig.exclude_self_fix):
+    """
+    Loads the enhanced reports of some projects from the partitioned store. The partitions are built again if they
+    are missing, outdated or lack reports of these projects. When exclude_self_fix is False, the reports fixed by their
+    reporter are included. Otherwise, they are excluded.
+
+    :param project_keys: Project identifiers.
+    :param source_csv: Source file name. By default, the one configured on gtconfig.
+    :param partition_folder: Folder for the partitions. By default, the one configured on gtconfig.
+    :param exclude_self_fix: True if the caller excludes the reports fixed by their reporter.
+    :return: Enhanced dataframe, with the reports of the projects.
+    """
+    metadata = get_partition_metadata(source_csv, partition_folder, project_keys, exclude_self_fix)
+
+    parts = [read_snapshot(snapshot_format, part_file) for project_key in project_keys for snapshot_format, part_file
+             in metadata["projects"].get(str(project_key), [])]
+
+    if len(parts) == 0:
+        raise ValueError("There are no reports for projects " + str(project_keys) + " on the partitions of " +
+                         metadata["source_csv"])
+
+    project_reports = pd.concat(parts).sort_index()
+    if exclude_self_fix and not metadata["exclude_self_fix"]:
+        project_reports = simdata.exclude_self_fixes(project_reports)
+
+    if gtconfig.compact_dataset:
+        project_reports = set_compact_types(project_reports)
+
+    log_memory_footprint(project_reports)
+    return project_reports
+
+
+def get_shared_metadata_file(shared_folder):
+    """
+    :return: Name of the file describing the column arrays in a folder.
+    """
+    return os.path.join(shared_folder, "columns.json")
+
+
+def get_timezone_description(timezone):
+    """
+    :return: Zone name, or offset in minutes for fixed-offset zones. None for naive dates.
+    """
+    if timezone is None:
+        return None
+
+    zone = getattr(timezone, "zone", None)
+    if zone is not None:
+        return zone
+
+    return int(timezone.utcoffset(None).total_seconds() / 60)
+
+
+def get_timezone(description):
+    """
+    Inverse of get_timezone_description.
+    """
+    if description is None or isinstance(description, basestring):
+        return description
+
+    return pytz.FixedOffset(description)
+
+
+def share_dataframe(enhanced_dataframe, shared_folder=None):
+    """
+    Stores each column of the dataframe as a NumPy array file, that worker processes can map in memory read-only
+    instead of receiving a pickled copy of the dataframe. Dates are stored as nanoseconds since the epoch, in UTC, and
+    text and categorical columns as integer codes plus an array of categories.
+
+    :param enhanced_dataframe: Dataframe to share.
+    :param shared_folder: Folder for the column arrays. By default, the one configured on gtconfig.
+    :return: Folder containing the column arrays.
+    """
+    if shared_folder is None:
+        shared_folder = gtconfig.shared_dataset_folder
+    if not os.path.exists(shared_folder):
+        os.makedirs(shared_folder)
+
+    columns = []
+    for position, column in enumerate(enhanced_dataframe.columns):
+        values = enhanced_dataframe[column]
+        array_file = os.path.join(shared_folder, "column-%03d.npy" % position)
+        description = {"name": column, "file": array_file}
+
+        if pd.api.types.is_datetime64_any_dtype(values):
+            timezone = values.dt.tz
+            if timezone is not None:
+                values = values.dt.tz_convert("UTC").dt.tz_localize(None)
+
+            description["kind"] = "datetime"
+            description["timezone"] = get_timezone_description(timezone)
+            np.save(array_file, values.values.astype("int64"))
+        elif values.dtype == object or pd.api.types.is_categorical_dtype(values):
+            categorical = values if pd.api.types.is_categorical_dtype(values) else values.astype("category")
+            categories = np.array(list(categorical.cat.categories))
+            if categories.dtype == object:
+                categories = categories.astype(str)
+
+            description["kind"] = "category" if pd.api.types.is_categorical_dtype(values) else "text"
+            description["categories_file"] = os.path.join(shared_folder, "categories-%03d.npy" % position)
+            np.save(description["categories_file"], categories)
+            np.save(array_file, categorical.cat.codes.values)
+        else:
+            description["kind"] = "numeric"
+            np.save(array_file, values.values)
+
+        columns.append(description)
+
+    index_file = os.path.join(shared_folder, "index.npy")
+    np.save(index_file, enhanced_dataframe.index.values)
+
+    with open(get_shared_metadata_file(shared_folder), "w") as metadata_output:
+        json.dump({"rows": len(enhanced_dataframe.index), "index_file": index_file, "columns": columns},
+                  metadata_output, indent=4)
+
+    logger.info(str(len(columns)) + " columns of " + str(len(enhanced_dataframe.index)) + " issues shared at " +
+                shared_folder)
+    return shared_folder
+
+
+def load_array(array_file):
+    """
+    Maps an array file in memory, read-only. Empty arrays cannot be mapped, so they are loaded.
+    """
+    try:
+        return np.load(array_file, mmap_mode="r")
+    except ValueError:
+        return np.load(array_file)
+
+
+class SharedDataset:
+    """
+    Read-only view of a dataframe stored by share_dataframe. Column arrays are mapped in memory, so the operating
+    system keeps a single copy for all the processes that open them. Only the rows and columns requested by
+    get_dataframe are copied into a new dataframe.
+    """
+
+    def __init__(self, shared_folder):
+        self.shared_folder = shared_folder
+
+        with open(get_shared_metadata_file(shared_folder)) as metadata_input:
+            metadata = json.load(metadata_input)
+
+        self.rows = metadata["rows"]
+        self.index_file = metadata["index_file"]
+        self.columns = [description["name"] for description in metadata["columns"]]
+        self.descriptions = {description["name"]: description for description in metadata["columns"]}
+        self.arrays = {}
+
+    def get_array(self, column):
+        """
+        Memory-mapped array of a column. For text and categorical columns, these are the category codes.
+        :param column: Column name.
+        :return: Read-only array.
+        """
+        if column not in self.arrays:
+            self.arrays[column] = load_array(self.descriptions[column]["file"])
+
+        return self.arrays[column]
+
+    def get_categories(self, column):
+        """
+        :return: Categories of a text or categorical column.
+        """
+        return pd.Index(load_array(self.descriptions[column]["categories_file"])).astype(object)
+
+    def get_mask(self, column, values):
+        """
+        Selects the rows whose value in a text or categorical column is one of the values provided, comparing codes.
+        :param column: Column name.
+        :param values: List of values.
+        :return: Boolean array, one per row.
+        """
+        values = set(str(value) for value in values)
+        codes = [code for code, category in enumerate(self.get_categories(column)) if category in values]
+
+        return np.in1d(self.get_array(column), codes)
+
+    def get_dataframe(self, columns=None, mask=None):
+        """
+        Copies rows and columns of the shared dataset into a dataframe.
+        :param columns: Columns to include. None for all of them.
+        :param mask: Boolean array for selecting rows. None for all of them.
+        :return: Dataframe.
+        """
+        if columns is None:
+            columns = self.columns
+        if mask is None:
+            mask = slice(None)
+
+        data = {}
+        for column in columns:
+            description = self.descriptions[column]
+            values = np.array(self.get_array(column)[mask])
+
+            if description["kind"] == "datetime":
+                dates = pd.to_datetime(values)
+                timezone = get_timezone(description["timezone"])
+                if timezone is not None:
+                    dates = dates.tz_localize("UTC").tz_convert(timezone)
+                data[column] = dates
+            elif description["kind"] in ["category", "text"]:
+                categorical = pd.Categorical.from_codes(values, self.get_categories(column))
+                if description["kind"] == "text":
+                    categorical = np.asarray(categorical, dtype=object)
+                data[column] = categorical
+            else:
+                data[column] = values
+
+        return pd.DataFrame(data, columns=columns, index=np.array(load_array(self.index_file)[mask]))
+
+
+def load_shared_reports(shared_folder, project_keys=None, columns=None):
+    """
+    Loads the reports of some projects from a shared dataset. Intended for worker processes, that receive the folder
+    name instead of the dataframe.
+
+    :param shared_folder: Folder containing the column arrays.
+    :param project_keys: Project identifiers. None for all the reports.
+    :param columns: Columns to include. None for all of them.
+    :return: Dataframe.
+    """
+    shared_dataset = SharedDataset(shared_folder)
+
+    mask = None
+    if project_keys is not None:
+        mask = shared_dataset.get_mask(simdata.PROJECT_KEY_COUMN, project_keys)
+
+    return shared_dataset.get_dataframe(columns=columns, mask=mask)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Builds the snapshot of the enhanced bug report dataframe.")
+    parser.add_argument("--source", default=simdata.ALL_ISSUES_CSV, help="Bug report CSV file.")
+    parser.add_argument("--folder", default=gtconfig.snapshot_folder, help="Folder for storing the snapshot.")
+    parser.add_argument("--rebuild", action="store_true", help="Rebuild the snapshot, even if it is up to date.")
+    parser.add_argument("--update", action="store_true",
+                        help="Update the snapshot with the new and changed issues of the source file.")
+    parser.add_argument("--memory", action="store_true", help="Report the memory used per column.")
+    parser.add_argument("--partition", action="store_true",
+                        help="Store the reports partitioned by project, reading the source file in chunks.")
+    parser.add_argument("--projects", nargs="+", default=None, help="Projects to keep when partitioning.")
+    parser.add_argument("--share", action="store_true",
+                        help="Store the columns as arrays that worker processes can map in memory.")
+    arguments = parser.parse_args()
+
+    if arguments.partition:
+        build_partitions(source_csv=arguments.source, project_keys=arguments.projects)
+        return
+
+    if arguments.update:
+        enhanced_dataframe, _ = update_snapshot(source_csv=arguments.source, snapshot_folder=arguments.folder)
+    else:
+        enhanced_dataframe = load_enhanced_dataframe(source_csv=arguments.source, snapshot_folder=arguments.folder,
+                                                     rebuild=arguments.rebuild)
+
+    if arguments.share:
+        share_dataframe(enhanced_dataframe)
+
+    if arguments.memory:
+        memory_report = get_memory_report(enhanced_dataframe)
+        print memory_report.to_string(index=False)
+
+
+if __name__ == "__main__":
+    main()
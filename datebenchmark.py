@@ -0,0 +1,110 @@
+"""
+This module compares the time for adding the calculated date fields to the bug report dataframe, between the
+row-by-row parsing with dateutil and the vectorized parsing of simdata.enhace_report_dataframe. It uses a synthetic
+dataframe, with dates in the format of the JIRA dataset.
+
+Usage: python datebenchmark.py --rows 1000000
+"""
+
+import argparse
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+import simdata
+import gtconfig
+
+logger = gtconfig.get_logger("date_benchmark", "date_benchmark.txt", level=logging.INFO)
+
+DATE_FORMAT = "%Y-%m-%dT%H:%M:%S.%f%z"
+
+
+def get_synthetic_reports(rows, seed=0):
+    """
+    Generates a bug report dataframe with the columns needed by enhace_report_dataframe. Around half of the reports
+    are resolved, and a tenth had a priority change.
+
+    :param rows: Number of reports.
+    :param seed: Seed for the random number generator.
+    :return: Bug report dataframe.
+    """
+    random_state = np.random.RandomState(seed)
+    base_date = pd.Timestamp("2010-01-01")
+
+    created_dates = base_date + pd.to_timedelta(random_state.randint(0, 8 * 365 * 24 * 60, size=rows), unit="m")
+    resolved_dates = created_dates + pd.to_timedelta(random_state.randint(-60, 90 * 24 * 60, size=rows), unit="m")
+    change_dates = created_dates + pd.to_timedelta(random_state.randint(0, 30 * 24 * 60, size=rows), unit="m")
+
+    priorities = random_state.choice(list(simdata.SIMPLIFIED_PRIORITIES.keys()), size=rows)
+
+    def as_strings(dates):
+        return pd.Series(dates.strftime("%Y-%m-%dT%H:%M:%S.000")) + "+0000"
+
+    return pd.DataFrame({"Creation Date": as_strings(created_dates),
+                         "JIRA Resolved Date": as_strings(resolved_dates).where(random_state.rand(rows) < 0.5),
+                         "Priority Change Date": as_strings(change_dates).where(random_state.rand(rows) < 0.1),
+                         "Priority": priorities,
+                         "Original Priority": priorities,
+                         "New Priority": priorities,
+                         "Status": random_state.choice(simdata.RESOLUTION_STATUS + ["Open"], size=rows),
+                         "Resolution": random_state.choice(simdata.VALID_RESOLUTION_VALUES + ["Won't Fix"], size=rows),
+                         "Commits": random_state.randint(0, 3, size=rows)})
+
+
+def enhance_row_by_row(bug_reports):
+    """
+    Adds the calculated date fields applying the row parsing functions, as enhace_report_dataframe used to do.
+    :param bug_reports: Original dataframe.
+    :return: Improved dataframe.
+    """
+    bug_reports[simdata.CREATED_DATE_COLUMN] = bug_reports.apply(simdata.parse_create_date, axis=1)
+    bug_reports[simdata.RESOLUTION_DATE_COLUMN] = bug_reports.apply(simdata.parse_resolution_date, axis=1)
+    bug_reports[simdata.PERIOD_COLUMN] = bug_reports.apply(simdata.date_as_string, axis=1)
+    bug_reports[simdata.RESOLUTION_TIME_COLUMN] = bug_reports.apply(simdata.get_resolution_time, axis=1)
+    bug_reports[simdata.PRIORITY_CHANGE_TIME_COLUMN] = bug_reports.apply(simdata.get_priority_change_time, axis=1)
+
+    return bug_reports
+
+
+def time_enhancement(enhancer, bug_reports):
+    """
+    :return: Enhanced dataframe and seconds elapsed.
+    """
+    start_time = time.time()
+    enhanced_dataframe = enhancer(bug_reports.copy())
+    return enhanced_dataframe, time.time() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the date parsing of the bug report dataframe.")
+    parser.add_argument("--rows", type=int, default=1000000, help="Rows of the synthetic dataframe.")
+    parser.add_argument("--row_by_row_rows", type=int, default=None,
+                        help="Rows for the row-by-row parsing. By default, all of them.")
+    arguments = parser.parse_args()
+
+    bug_reports = get_synthetic_reports(arguments.rows)
+    sample_reports = bug_reports.head(arguments.row_by_row_rows) if arguments.row_by_row_rows else bug_reports
+
+    for date_format, description in [(None, "inferred format"), (DATE_FORMAT, "fixed format")]:
+        enhanced_dataframe, seconds = time_enhancement(
+            lambda reports: simdata.enhace_report_dataframe(reports, date_format=date_format), bug_reports)
+        logger.info("Vectorized parsing (" + description + ") of " + str(arguments.rows) + " reports: " +
+                    str(seconds) + " seconds.")
+
+    row_dataframe, seconds = time_enhancement(enhance_row_by_row, sample_reports)
+    logger.info("Row-by-row parsing of " + str(len(sample_reports.index)) + " reports: " + str(seconds) +
+                " seconds.")
+
+    for column in [simdata.CREATED_DATE_COLUMN, simdata.RESOLUTION_DATE_COLUMN, simdata.PERIOD_COLUMN,
+                   simdata.RESOLUTION_TIME_COLUMN, simdata.PRIORITY_CHANGE_TIME_COLUMN]:
+        vectorized_values = enhanced_dataframe.loc[sample_reports.index, column]
+        row_values = row_dataframe[column]
+        matches = (vectorized_values == row_values) | (vectorized_values.isnull() & row_values.isnull())
+
+        logger.info(column + ": " + str(matches.sum()) + " of " + str(len(matches.index)) + " values match.")
+
+
+if __name__ == "__main__":
+    main()
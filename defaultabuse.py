@@ -5,6 +5,7 @@ This is a module for detecting default priority overuse.
 import pandas as pd
 import numpy as np
 
+import dataset
 import simdata
 import simdriver
 import gtconfig
@@ -16,17 +17,21 @@ if not gtconfig.is_windows:
 from matplotlib import pyplot as plt
 
 
-def get_default_usage_data(enhanced_dataframe, exclude_self_fix=True):
+def get_default_usage_data(enhanced_dataframe=None, exclude_self_fix=True):
     """
     Returns a dataframe contaning the non-default usage per project.
 
     The reports considered are from non-drive-by reporters and excludes self-fixed reports.
 
-    :param enhanced_dataframe: Bug Report dataframe.
+    :param enhanced_dataframe: Bug Report dataframe. If None, the reports of each project are loaded from the
+    partitioned store, so the whole dataset is never in memory.
     :return: Project dataframe.
     """
 
-    project_lists = enhanced_dataframe["Project Key"].unique()
+    if enhanced_dataframe is None:
+        project_lists = dataset.get_partitioned_projects(exclude_self_fix=exclude_self_fix)
+    else:
+        project_lists = enhanced_dataframe["Project Key"].unique()
     project_dist = []
 
     for project_key in project_lists:
@@ -58,13 +63,7 @@ def get_default_usage_data(enhanced_dataframe, exclude_self_fix=True):
 
 
 def main():
-    print "Loading information from ", simdata.ALL_ISSUES_CSV
-    all_issues = pd.read_csv(simdata.ALL_ISSUES_CSV)
-
-    print "Adding calculated fields..."
-    enhanced_dataframe = simdata.enhace_report_dataframe(all_issues)
-
-    project_dataframe = get_default_usage_data(enhanced_dataframe)
+    project_dataframe = get_default_usage_data()
     project_dataframe = project_dataframe.sort(columns="non_default_ratio")
 
     non_default_series = project_dataframe['non_default_ratio']
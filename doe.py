@@ -0,0 +1,230 @@
+"""
+This module explores the parameters of the bug reporting mechanisms with a space-filling design of experiments, instead
+of nested loops over hand-picked values. A Latin hypercube design is generated over the parameter ranges, each design
+point is simulated through syseval.run_scenario -in parallel, if configured- and the responses are stored in a single
+table, with one row per design point and replication.
+
+Usage: python doe.py --mechanism gatekeeper --points 20
+"""
+
+import argparse
+import copy
+import logging
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import gtconfig
+import penaltyexp
+import simdata
+import simutils
+import syseval
+
+logger = gtconfig.get_logger("design_of_experiments", "design_of_experiments.txt", level=logging.INFO)
+
+# Continuous parameters are (minimum, maximum) tuples. Categorical parameters are lists of values.
+MECHANISM_PARAMETERS = {"throttling": {"dev_team_factor": (0.5, 1.0),
+                                       "inflation_factor": (0.0, 0.3),
+                                       "priority_queue": [True, False]},
+                        "gatekeeper": {"dev_team_factor": (0.5, 1.0),
+                                       "success_rate": (0.5, 1.0),
+                                       "priority_queue": [True, False]}}
+
+RESPONSE_COLUMNS = ['severe_fixed_ratio', 'severe_time_ratio', 'severe_delivery_time']
+
+
+def get_latin_hypercube(points, dimensions, random_state):
+    """
+    Latin hypercube sample in the unit hypercube: Each dimension is divided in as many strata as points, and each
+    stratum contains exactly one point.
+
+    :param points: Number of design points.
+    :param dimensions: Number of parameters.
+    :param random_state: NumPy random state.
+    :return: Array of shape (points, dimensions), with values in [0, 1).
+    """
+    unit_design = np.empty((points, dimensions))
+
+    for dimension in range(dimensions):
+        strata = random_state.permutation(points)
+        unit_design[:, dimension] = (strata + random_state.rand(points)) / float(points)
+
+    return unit_design
+
+
+def get_minimum_distance(unit_design):
+    """
+    :return: Minimum euclidean distance between two points of a design.
+    """
+    if len(unit_design) < 2:
+        return 0.0
+
+    differences = unit_design[:, np.newaxis, :] - unit_design[np.newaxis, :, :]
+    distances = np.sqrt((differences ** 2).sum(axis=2))
+    return distances[np.triu_indices(len(unit_design), k=1)].min()
+
+
+def get_design(parameter_ranges, points, seed=0, candidates=50):
+    """
+    Generates a maximin Latin hypercube design: Among several Latin hypercube samples, the one whose closest points are
+    the farthest apart is selected.
+
+    :param parameter_ranges: Map of parameter names to ranges. Continuous ranges are (minimum, maximum) tuples, and
+    categorical ones are lists of values.
+    :param points: Number of design points.
+    :param seed: Seed for the random number generator.
+    :param candidates: Latin hypercube samples to compare.
+    :return: Dataframe with one row per design point and one column per parameter.
+    """
+    parameter_names = sorted(parameter_ranges.keys())
+    random_state = np.random.RandomState(seed)
+
+    unit_design = max([get_latin_hypercube(points, len(parameter_names), random_state) for _ in range(candidates)],
+                      key=get_minimum_distance)
+
+    design = {}
+    for dimension, parameter_name in enumerate(parameter_names):
+        parameter_range = parameter_ranges[parameter_name]
+        unit_values = unit_design[:, dimension]
+
+        if isinstance(parameter_range, tuple):
+            minimum, maximum = parameter_range
+            design[parameter_name] = minimum + unit_values * (maximum - minimum)
+        else:
+            design[parameter_name] = [parameter_range[int(value * len(parameter_range))] for value in unit_values]
+
+    return pd.DataFrame(design, columns=parameter_names)
+
+
+def get_design_scenarios(design, input_params, simulation_configuration, empirical_profile, original_team_size):
+    """
+    Materializes each design point as a scenario, with its own copy of the simulation inputs and configuration.
+
+    :param design: Design dataframe, as returned by get_design.
+    :param input_params: Simulation inputs. They are not modified.
+    :param simulation_configuration: Base simulation configuration. It is not modified.
+    :param empirical_profile: Strategy profile of the reporters.
+    :param original_team_size: Team size in the dataset.
+    :return: List of scenarios.
+    """
+    scenarios = []
+
+    for point_id, design_point in enumerate(design.to_dict(orient="records")):
+        point_params = copy.deepcopy(input_params)
+        point_configuration = copy.deepcopy(simulation_configuration)
+        syseval.apply_strategy_profile(point_params.player_configuration, empirical_profile)
+
+        if "dev_team_factor" in design_point:
+            point_params.dev_team_size = int(original_team_size * design_point["dev_team_factor"])
+
+        if "priority_queue" in design_point:
+            point_configuration["PRIORITY_QUEUE"] = design_point["priority_queue"]
+
+        if "inflation_factor" in design_point:
+            point_configuration["THROTTLING_ENABLED"] = True
+            point_configuration["INFLATION_FACTOR"] = design_point["inflation_factor"]
+
+        if "success_rate" in design_point:
+            success_rate = design_point["success_rate"]
+            point_configuration["GATEKEEPER_CONFIG"] = penaltyexp.DEFAULT_GATEKEEPER_CONFIG
+            point_configuration["SUCCESS_RATE"] = success_rate
+            point_params.catcher_generator.configure(values=[True, False],
+                                                     probabilities=[success_rate, (1 - success_rate)])
+
+        scenarios.append({'point_id': point_id,
+                          'design_point': design_point,
+                          'input_params': point_params,
+                          'simulation_configuration': point_configuration})
+
+    return scenarios
+
+
+def run_design_scenario(scenario, simfunction=simutils.launch_simulation):
+    """
+    Simulates a design point.
+    :param scenario: Design scenario.
+    :param simfunction: Simulation function.
+    :return: List of response rows, one per replication.
+    """
+    simulation_output = syseval.run_scenario(simfunction, scenario['input_params'],
+                                             scenario['simulation_configuration'])
+
+    responses = zip(simulation_output.get_fixed_ratio_per_priority(simdata.SEVERE_PRIORITY),
+                    simulation_output.get_time_ratio_per_priority(simdata.SEVERE_PRIORITY),
+                    simulation_output.get_avg_fix_delivery_time(simdata.SEVERE_PRIORITY))
+
+    response_rows = []
+    for replication, response_values in enumerate(responses):
+        row = dict(scenario['design_point'])
+        row.update(dict(zip(RESPONSE_COLUMNS, response_values)))
+        row.update({'point_id': scenario['point_id'], 'replication': replication})
+        response_rows.append(row)
+
+    return response_rows
+
+
+def run_design(scenarios, simfunction, file_name, parallel=gtconfig.parallel_sweep):
+    """
+    Simulates all the design scenarios, on a process pool if configured -see simutils.run_scenarios-. Responses are
+    appended to the results file as soon as each design point finishes.
+
+    :param scenarios: List of design scenarios.
+    :param simfunction: Simulation function, for sequential execution.
+    :param file_name: CSV file for the responses.
+    :param parallel: True for simulating the design points on a process pool.
+    :return: Dataframe with one row per design point and replication.
+    """
+    if os.path.isfile(file_name):
+        os.remove(file_name)
+
+    scenario_outputs = simutils.run_scenarios(run_design_scenario, scenarios, simfunction=simfunction,
+                                              parallel=parallel, processes=gtconfig.sweep_workers)
+
+    columns = sorted(scenarios[0]['design_point'].keys()) + ['point_id', 'replication'] + RESPONSE_COLUMNS
+    response_rows = []
+    finished_points = 0
+    for point_rows in scenario_outputs:
+        pd.DataFrame(point_rows, columns=columns).to_csv(file_name, mode="a", header=finished_points == 0,
+                                                          index=False)
+        response_rows += point_rows
+
+        finished_points += 1
+        logger.info(str(finished_points) + " of " + str(len(scenarios)) + " design points finished.")
+
+    return pd.DataFrame(response_rows).sort_values(['point_id', 'replication']).reset_index(drop=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latin hypercube design over the parameters of a mechanism.")
+    parser.add_argument("--mechanism", choices=sorted(MECHANISM_PARAMETERS.keys()), default="gatekeeper",
+                        help="Mechanism under analysis.")
+    parser.add_argument("--points", type=int, default=20, help="Number of design points.")
+    parser.add_argument("--replications", type=int, default=gtconfig.replications_per_profile,
+                        help="Replications per design point.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for generating the design.")
+    arguments = parser.parse_args()
+
+    simulation_configuration, simfunction, input_params, empirical_profile = syseval.gather_experiment_inputs(
+        gtconfig.priority_queues[0])
+    simulation_configuration['REPLICATIONS_PER_PROFILE'] = arguments.replications
+
+    design = get_design(MECHANISM_PARAMETERS[arguments.mechanism], arguments.points, seed=arguments.seed)
+    logger.info("Design for " + arguments.mechanism + ": \n" + str(design))
+
+    scenarios = get_design_scenarios(design, input_params, simulation_configuration, empirical_profile,
+                                     input_params.dev_team_size)
+
+    file_name = "csv/doe_" + arguments.mechanism + "_" + str(arguments.points) + "_points_results.csv"
+    responses = run_design(scenarios, simfunction, file_name)
+
+    logger.info("Responses per design point: \n" + str(
+        responses.groupby('point_id')[RESPONSE_COLUMNS].mean()))
+    logger.info("Responses stored at " + file_name)
+
+
+if __name__ == "__main__":
+    start_time = time.time()
+    main()
+    logger.info("Execution time in seconds: " + str(time.time() - start_time))
@@ -0,0 +1,166 @@
+"""
+This module verifies the equilibria found over simulated payoffs, considering the sampling error of every cell of the
+payoff matrix. The gain of each unilateral deviation is estimated with a confidence interval, and additional
+replications are only scheduled for the profiles involved on deviations whose interval includes zero, i.e. the ones
+where we cannot tell if the deviation payoff is above or below the equilibrium payoff.
+"""
+
+import itertools
+import logging
+import math
+
+import scipy.stats as st
+
+import gtutils
+import gtconfig
+import payoffstore
+
+CONFIRMED = "CONFIRMED"
+REJECTED = "REJECTED"
+UNRESOLVED = "UNRESOLVED"
+
+logger = gtconfig.get_logger("eq_verification", "eq_verification.txt", level=logging.INFO)
+
+
+def get_deviation_weights(equilibrium_profile, team, deviation, strategies_catalog, teams):
+    """
+    Expresses the gain of a unilateral deviation as a linear combination of payoff matrix cells: The expected payoff
+    of the deviation minus the expected payoff of the equilibrium strategy.
+
+    :param equilibrium_profile: Map representing the profile.
+    :param team: Team that deviates.
+    :param deviation: Strategy the team deviates to.
+    :param strategies_catalog: Catalog of available strategies.
+    :param teams: Number of teams in the game.
+    :return: Map of profile keys to a (strategy map, weight) tuple.
+    """
+    strategies_by_name = {strategy.name: strategy for strategy in strategies_catalog}
+    opponents = [opponent for opponent in range(teams) if opponent != team]
+    opponent_supports = [gtutils.get_support(equilibrium_profile[opponent]) for opponent in opponents]
+
+    team_strategies = [(deviation, 1.0)] + [(strategies_by_name[strategy_name], -probability) for
+                                            strategy_name, probability in
+                                            gtutils.get_support(equilibrium_profile[team])]
+
+    weights = {}
+    for opponent_profile in itertools.product(*opponent_supports):
+        profile_probability = 1.0
+        strategy_map = {}
+
+        for opponent, (strategy_name, probability) in zip(opponents, opponent_profile):
+            strategy_map[opponent] = strategies_by_name[strategy_name]
+            profile_probability *= probability
+
+        for strategy, coefficient in team_strategies:
+            cell_map = dict(strategy_map)
+            cell_map[team] = strategy
+            profile_key = payoffstore.get_profile_key(cell_map, teams)
+
+            _, weight = weights.get(profile_key, (cell_map, 0.0))
+            weights[profile_key] = (cell_map, weight + profile_probability * coefficient)
+
+    return weights
+
+
+def get_deviation_interval(weights, team, payoff_store, z_value):
+    """
+    Estimates the gain of a deviation and the half-width of its confidence interval. Cells are assumed to be
+    simulated independently.
+
+    :param weights: Deviation gain as a linear combination of cells, as returned by get_deviation_weights.
+    :param team: Team that deviates.
+    :param payoff_store: Payoff store instance, containing samples for all the cells.
+    :param z_value: Critical value of the normal distribution for the desired confidence.
+    :return: Gain estimate and half-width of its interval.
+    """
+    gain = 0.0
+    variance = 0.0
+
+    for profile_key, (_, weight) in weights.iteritems():
+        if weight == 0.0:
+            continue
+
+        gain += weight * payoff_store.get_payoffs(profile_key)[team]
+        variance += (weight * payoff_store.get_standard_errors(profile_key)[team]) ** 2
+
+    return gain, z_value * math.sqrt(variance)
+
+
+def verify_equilibrium(equilibrium_profile, strategies_catalog, teams, payoff_store, profile_simulator,
+                       confidence=0.95, additional_replications=30, max_rounds=3):
+    """
+    Checks every unilateral deviation from an equilibrium profile, replicating further the payoff cells of the
+    deviations whose gain interval contains zero.
+
+    :param equilibrium_profile: Map representing the profile.
+    :param strategies_catalog: Catalog of available strategies.
+    :param teams: Number of teams in the game.
+    :param payoff_store: Payoff store instance.
+    :param profile_simulator: Function that receives a strategy map and a number of replications, and stores the
+    resulting samples on the payoff store.
+    :param confidence: Confidence level of the gain intervals.
+    :param additional_replications: Replications to add to an ambiguous cell on each round.
+    :param max_rounds: Maximum number of replication rounds.
+    :return: A map with the verification status, the regret estimate and the upper bound of its interval.
+    """
+    z_value = st.norm.ppf(1 - (1 - confidence) / 2.0)
+
+    deviations = []
+    for team in range(teams):
+        support = [strategy_name for strategy_name, _ in gtutils.get_support(equilibrium_profile[team])]
+        for strategy in strategies_catalog:
+            if strategy.name not in support:
+                deviations.append((team, strategy,
+                                   get_deviation_weights(equilibrium_profile, team, strategy, strategies_catalog,
+                                                         teams)))
+
+    for _, _, weights in deviations:
+        for profile_key, (strategy_map, _) in weights.iteritems():
+            if payoff_store.get_replications(profile_key) < 2:
+                profile_simulator(strategy_map, additional_replications)
+
+    replication_round = 0
+    while True:
+        intervals = [(team, strategy, weights, get_deviation_interval(weights, team, payoff_store, z_value)) for
+                     team, strategy, weights in deviations]
+
+        ambiguous_cells = {}
+        rejected = False
+        for team, strategy, weights, (gain, half_width) in intervals:
+            if gain - half_width > 0:
+                logger.info("Team " + str(team) + " benefits from deviating to " + strategy.name + ". Gain " + str(
+                    gain) + " +/- " + str(half_width))
+                rejected = True
+            elif gain + half_width >= 0:
+                for profile_key, (strategy_map, weight) in weights.iteritems():
+                    if weight != 0.0:
+                        ambiguous_cells[profile_key] = strategy_map
+
+        if rejected or len(ambiguous_cells) == 0 or replication_round >= max_rounds:
+            break
+
+        replication_round += 1
+        logger.info("Replication round " + str(replication_round) + ": " + str(
+            len(ambiguous_cells)) + " cells have intervals overlapping the equilibrium payoff.")
+
+        for profile_key, strategy_map in ambiguous_cells.iteritems():
+            profile_simulator(strategy_map, additional_replications)
+
+    status = CONFIRMED
+    if rejected:
+        status = REJECTED
+    elif len(ambiguous_cells) > 0:
+        status = UNRESOLVED
+
+    regret, regret_bound = 0.0, 0.0
+    for _, _, _, (gain, half_width) in intervals:
+        regret = max(regret, gain)
+        regret_bound = max(regret_bound, gain + half_width)
+
+    logger.info("Equilibrium " + str(equilibrium_profile) + ": " + status + ". Regret " + str(
+        regret) + " Upper bound " + str(regret_bound) + " Replication rounds " + str(replication_round))
+
+    return {"status": status,
+            "regret": regret,
+            "regret_upper_bound": regret_bound,
+            "replication_rounds": replication_round}
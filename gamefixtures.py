@@ -0,0 +1,89 @@
+"""
+Stand-ins for the strategies and payoff oracles of the equilibrium experiments, shared by the unit tests of the game
+analysis modules. Payoffs come from a function instead of the simulation, so the tests can check how many strategy
+profiles each technique needs.
+"""
+
+import itertools
+
+
+class Strategy:
+    """
+    A strategy identified by its name.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+
+class EmpiricalStrategy(Strategy):
+    """
+    A strategy identified by its inflation and deflation probabilities. See payoffstore.get_strategy_identity.
+    """
+
+    def __init__(self, name, inflation_prob, deflation_prob):
+        Strategy.__init__(self, name)
+        self.inflation_prob = inflation_prob
+        self.deflation_prob = deflation_prob
+
+
+def get_strategy_maps(strategies_catalog, teams=2):
+    """
+    :return: List with all the strategy profiles, as maps from team to strategy.
+    """
+    return [dict(enumerate(profile)) for profile in itertools.product(strategies_catalog, repeat=teams)]
+
+
+class StubGame:
+    """
+    Game whose payoffs are given by a function of the strategy map. The payoff oracle records every profile it is
+    asked for, as the simulation would be launched for it.
+    """
+
+    def __init__(self, strategies_catalog, payoff_function, teams=2):
+        """
+        :param strategies_catalog: Catalog of available strategies.
+        :param payoff_function: Function that receives a strategy map and returns the payoffs per team.
+        :param teams: Number of teams in the game.
+        """
+        self.strategies_catalog = strategies_catalog
+        self.payoff_function = payoff_function
+        self.teams = teams
+        self.strategy_maps = get_strategy_maps(strategies_catalog, teams)
+        self.simulated_profiles = []
+
+    def payoff_oracle(self, strategy_map):
+        self.simulated_profiles.append(tuple(strategy_map[team].name for team in range(self.teams)))
+        return self.payoff_function(strategy_map)
+
+    def get_pure_equilibria(self, payoff_function=None, strategies_catalog=None):
+        """
+        Finds the pure equilibria by enumeration.
+
+        :param payoff_function: Function that receives a strategy map and returns the payoffs per team. By default, the
+        payoff oracle.
+        :param strategies_catalog: Strategies of the subgame to solve. By default, the whole catalog.
+        :return: List of equilibrium profiles, expressed over the strategies of the subgame.
+        """
+        if payoff_function is None:
+            payoff_function = self.payoff_oracle
+        if strategies_catalog is None:
+            strategies_catalog = self.strategies_catalog
+
+        equilibrium_list = []
+        for strategy_map in get_strategy_maps(strategies_catalog, self.teams):
+            payoffs = payoff_function(strategy_map)
+            is_equilibrium = True
+
+            for team in range(self.teams):
+                for deviation in strategies_catalog:
+                    deviation_map = dict(strategy_map)
+                    deviation_map[team] = deviation
+                    if payoff_function(deviation_map)[team] > payoffs[team] + 1e-6:
+                        is_equilibrium = False
+
+            if is_equilibrium:
+                equilibrium_list.append({team: {strategy.name: "1" if strategy == strategy_map[team] else "0" for
+                                                strategy in strategies_catalog} for team in range(self.teams)})
+
+        return equilibrium_list
@@ -9,6 +9,7 @@ import time
 import sys
 import pandas as pd
 
+import dataset
 import simdata
 import simdriver
 import payoffgetter
@@ -50,11 +51,7 @@ def main(parameter_list, game_configuration):
     testers, developers, target_bugs, file_name = parameter_list
     print "testers: ", testers, "developers: ", developers, "target_bugs: ", target_bugs, " file_name: ", file_name
 
-    print "Loading information from ", simdata.ALL_ISSUES_CSV
-    all_issues = pd.read_csv(simdata.ALL_ISSUES_CSV)
-
-    print "Adding calculated fields..."
-    enhanced_dataframe = simdata.enhace_report_dataframe(all_issues)
+    enhanced_dataframe = dataset.load_enhanced_dataframe()
     all_valid_projects = simdriver.get_valid_projects(enhanced_dataframe)
 
     if not TWINS_REDUCTION:
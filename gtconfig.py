@@ -7,6 +7,13 @@ gambit_folder = "/home/carlos/gambit-15.1.1/"
 all_issues_csv = git_home + "apache_jira_github_ds.csv"
 enumerate_equilibria_solver = "gambit-enummixed"
 quantal_response_solver = "gambit-logit"
+use_dataset_snapshot = True  # True for loading the enhanced dataframe from a snapshot. See dataset.py
+snapshot_folder = "csv/"
+incremental_update = True  # True for updating an outdated snapshot with only the new and changed issues.
+compact_dataset = True  # True for reading only the columns used in the simulation, with categorical types.
+partition_folder = "csv/partitions/"  # Reports partitioned by project. See dataset.build_partitions
+ingestion_chunk_size = 100000
+shared_dataset_folder = "csv/shared/"  # Memory-mapped columns for worker processes. See dataset.share_dataframe
 
 report_stream_batching = True
 simple_reporting_model = False
@@ -14,6 +21,20 @@ simple_reporting_model = False
 fix_count_criteria = True  # True for ending simulation after a number of fixes. False to use the development time budget.
 parallel = True  # Set to False for debugging purposes
 parallel_blocks = 4
+parallel_validation = True  # Validation cells of simdriver run on a process pool, over a shared copy of the dataset.
+validation_workers = None  # Processes for validation cells. None to use the number of cores.
+parallel_sweep = True  # Points of the infanalysis sweeps run on a process pool. See infanalysis.run_sweep
+sweep_workers = None  # Processes for sweep points. None to use the number of cores.
+parallel_solving = True  # Gambit solvers run while the next scenario is simulated. Used by penaltyexp.py
+parallel_fitting = True  # Candidate distributions are fitted on a process pool. See siminput.fit_samples
+fitting_workers = None  # Processes for distribution fitting. None to use the number of cores.
+use_fit_cache = True  # Best fits are reused for samples already fitted. See siminput.fit_samples
+fit_cache_folder = "csv/fit_cache/"  # One file per cached fit, so parallel processes do not overwrite each other.
+screen_candidates = True  # Large samples are fitted only to the most plausible candidates. See siminput.fit_samples
+screening_subsample = 2000  # Data points used for screening candidates.
+screening_candidates = 3  # Candidates kept for the maximum likelihood fit.
+solver_workers = None  # Concurrent Gambit processes. None to use the number of cores.
+solver_timeout = None  # Seconds before killing a Gambit process. None to wait indefinitely.
 
 # Simulation validation parameters for simdriver.py
 valid_test_sizes = [0.4]
@@ -31,6 +52,16 @@ priority_queues = [True] # Also used in simdriver.py
 # dev_team_factors = [0.5, 1.0] # Also used in bestperformer.py
 dev_team_factors = [0.5]
 use_heuristic_strategies = True
+lazy_exploration = False  # True for simulating strategy profiles on demand, instead of the whole profile space.
+verify_equilibria = False  # True for replicating further the profiles where equilibrium regret is not conclusive.
+heuristic_payoff_table = False  # True for analysing symmetric games with many players. See heuristicpayoff.py
+hpt_players = 10
+hpt_max_table_size = 100000  # Heuristic payoff tables with more rows are not simulated.
+persist_payoffs = False  # True for reusing the payoffs of previous runs, when extending the strategy catalog.
+surrogate_pruning = False  # True for skipping the simulation of profiles not relevant for equilibria.
+surrogate_validation = False  # True for also simulating all profiles when pruning, and comparing the equilibria found.
+ocba_allocation = False  # True for assigning more replications to the profiles relevant for best responses.
+ocba_budget = None  # Total replications per experiment. None for replications_per_profile times the profiles.
 # Payoff function parameters
 nonsevere_fix_weight = 0
 severe_fix_weight = 1
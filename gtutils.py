@@ -6,6 +6,7 @@ import subprocess
 from string import Template
 from collections import defaultdict
 import fractions
+import itertools
 import gtconfig
 import logging
 
@@ -68,14 +69,13 @@ def get_strategic_game_format(game_desc, reporter_configuration, strategies_cata
     return file_name
 
 
-def calculate_equilibrium(strategies_catalog, gambit_file, all_equilibria=True, debug=False):
+def get_solver_command(gambit_file, all_equilibria=True):
     """
-    Executes Gambit for equilibrium calculation.
-    :param strategies_catalog: Catalog of available strategies.
-    :param gambit_file:
-    :return: List of equilibrium profiles.
+    Builds the command line for executing Gambit.
+    :param gambit_file: NFG file containing the game.
+    :param all_equilibria: True for enumerating all equilibria. Only one is found otherwise.
+    :return: List containing the command line.
     """
-
     if all_equilibria:
         process = GAMBIT_FOLDER + ENUMERATE_EQUILIBRIA_SOLVER
         command_line = [process, NO_BANNER_OPTION, gambit_file]
@@ -90,8 +90,18 @@ def calculate_equilibrium(strategies_catalog, gambit_file, all_equilibria=True,
         process = "." + process
 
     logger.info("Calculating equilibrium for: " + str(gambit_file) + " using " + str(process))
+    return command_line
 
-    solver_process = subprocess.Popen(command_line, stdout=subprocess.PIPE)
+
+def calculate_equilibrium(strategies_catalog, gambit_file, all_equilibria=True, debug=False):
+    """
+    Executes Gambit for equilibrium calculation.
+    :param strategies_catalog: Catalog of available strategies.
+    :param gambit_file:
+    :return: List of equilibrium profiles.
+    """
+
+    solver_process = subprocess.Popen(get_solver_command(gambit_file, all_equilibria), stdout=subprocess.PIPE)
 
     nash_equilibrium_strings = []
     while True:
@@ -101,6 +111,17 @@ def calculate_equilibrium(strategies_catalog, gambit_file, all_equilibria=True,
         else:
             break
 
+    return parse_equilibria(strategies_catalog, nash_equilibrium_strings, debug=debug)
+
+
+def parse_equilibria(strategies_catalog, nash_equilibrium_strings, debug=False):
+    """
+    Transforms the output of Gambit into equilibrium profiles.
+    :param strategies_catalog: Catalog of available strategies.
+    :param nash_equilibrium_strings: Lines written by Gambit on standard output.
+    :return: List of equilibrium profiles.
+    """
+
     if debug:
         logger.info("len(nash_equilibrium_strings): " + str(len(nash_equilibrium_strings)))
 
@@ -186,3 +207,86 @@ def is_symmetric_equilibrium(profile):
                 return False
 
     return is_symmetric
+
+
+def get_support(strategy_probabilities):
+    """
+    Returns the strategies played with positive probability.
+    :param strategy_probabilities: Map of strategy names to probabilities, as reported by Gambit.
+    :return: List of (strategy name, probability) tuples.
+    """
+
+    support = []
+    for strategy_name, probability in strategy_probabilities.iteritems():
+        probability = float(fractions.Fraction(probability))
+        if probability > 0:
+            support.append((strategy_name, probability))
+
+    return support
+
+
+def get_expected_payoffs(equilibrium_profile, team, candidate_strategies, strategies_catalog, teams, payoff_oracle):
+    """
+    Calculates the expected payoff of a team for each pure strategy on a list, while the other teams play according to
+    the equilibrium profile.
+
+    :param equilibrium_profile: Map representing the profile.
+    :param team: Team whose payoff is of interest.
+    :param candidate_strategies: Strategies available for the team.
+    :param strategies_catalog: Catalog of available strategies.
+    :param teams: Number of teams in the game.
+    :param payoff_oracle: Function that receives a strategy map and returns the payoffs per team.
+    :return: Map of strategy names to expected payoffs.
+    """
+
+    strategies_by_name = {strategy.name: strategy for strategy in strategies_catalog}
+    opponents = [opponent for opponent in range(teams) if opponent != team]
+    opponent_supports = [get_support(equilibrium_profile[opponent]) for opponent in opponents]
+
+    expected_payoffs = {}
+    for strategy in candidate_strategies:
+        expected_payoff = 0.0
+
+        for opponent_profile in itertools.product(*opponent_supports):
+            strategy_map = {team: strategy}
+            profile_probability = 1.0
+
+            for opponent, (strategy_name, probability) in zip(opponents, opponent_profile):
+                strategy_map[opponent] = strategies_by_name[strategy_name]
+                profile_probability *= probability
+
+            expected_payoff += profile_probability * payoff_oracle(strategy_map)[team]
+
+        expected_payoffs[strategy.name] = expected_payoff
+
+    return expected_payoffs
+
+
+def get_regret(equilibrium_profile, strategies_catalog, teams, payoff_oracle):
+    """
+    Calculates the regret of an equilibrium profile: The maximum gain a team can obtain by unilaterally deviating to
+    a strategy in the catalog.
+
+    :param equilibrium_profile: Map representing the profile.
+    :param strategies_catalog: Catalog of available strategies, including the ones outside the profile support.
+    :param teams: Number of teams in the game.
+    :param payoff_oracle: Function that receives a strategy map and returns the payoffs per team.
+    :return: The regret of the profile, and a map containing the best deviation and its gain per team.
+    """
+
+    best_deviations = {}
+    for team in range(teams):
+        expected_payoffs = get_expected_payoffs(equilibrium_profile, team, strategies_catalog, strategies_catalog,
+                                                teams, payoff_oracle)
+
+        equilibrium_payoff = sum([probability * expected_payoffs[strategy_name] for strategy_name, probability in
+                                  get_support(equilibrium_profile[team])])
+
+        best_response = max(expected_payoffs, key=expected_payoffs.get)
+        best_deviations[team] = (best_response, expected_payoffs[best_response] - equilibrium_payoff)
+
+        logger.info("Team " + str(team) + ": Equilibrium payoff " + str(equilibrium_payoff) + " Best deviation " +
+                    str(best_response) + " Gain " + str(best_deviations[team][1]))
+
+    regret = max([gain for _, gain in best_deviations.values()])
+    return regret, best_deviations
@@ -0,0 +1,273 @@
+"""
+This module implements the heuristic payoff table representation for symmetric games, as described by Walsh et al. in
+"Analyzing Complex Strategic Interactions in Multi-Agent Systems". Since every player has the same strategic vision,
+the payoff of a strategy only depends on how many players are using each strategy. So instead of one row per pure
+profile, the table has one row per distribution of the N players over the k strategies, containing the payoff of each
+strategy in use.
+
+Equilibria are approximated using replicator dynamics over the table.
+"""
+
+import logging
+import math
+
+import numpy as np
+from scipy.special import gammaln
+
+import gtconfig
+
+logger = gtconfig.get_logger("heuristic_payoff", "heuristic_payoff.txt", level=logging.INFO)
+
+
+def get_count_profiles(players, strategies):
+    """
+    Lists all the ways of distributing players over strategies.
+    :param players: Number of players in the game.
+    :param strategies: Number of strategies available.
+    :return: List of tuples, containing the number of players per strategy.
+    """
+    if strategies == 1:
+        return [(players,)]
+
+    count_profiles = []
+    for count in range(players, -1, -1):
+        for remaining in get_count_profiles(players - count, strategies - 1):
+            count_profiles.append((count,) + remaining)
+
+    return count_profiles
+
+
+def get_strategy_map(count_profile, strategies_catalog):
+    """
+    Assigns strategies to players according to a count profile. The first players take the first strategy of the
+    catalog, and so on.
+
+    :param count_profile: Number of players per strategy.
+    :param strategies_catalog: Catalog of available strategies.
+    :return: Map containing the strategy per player.
+    """
+    strategy_map = {}
+    for strategy, count in zip(strategies_catalog, count_profile):
+        for _ in range(count):
+            strategy_map[len(strategy_map)] = strategy
+
+    return strategy_map
+
+
+def get_strategy_samples(consolidated_dataframe, count_profile):
+    """
+    Obtains per-run payoff samples for each strategy of a count profile: The average score of the players using it.
+
+    :param consolidated_dataframe: Dataframe with per-run results for each player, as produced by
+    simcruncher.get_team_dataframe.
+    :param count_profile: Number of players per strategy.
+    :return: List containing the payoff samples per strategy. Strategies not in use have no samples.
+    """
+    strategy_samples = []
+    first_player = 0
+
+    for count in count_profile:
+        score_columns = ["team_" + str(player + 1) + "_score" for player in range(first_player, first_player + count)]
+        first_player += count
+
+        if count == 0:
+            strategy_samples.append([])
+        else:
+            strategy_samples.append(consolidated_dataframe[score_columns].mean(axis=1).tolist())
+
+    return strategy_samples
+
+
+def simulate_table(count_profiles, payoff_table, row_simulator):
+    """
+    Simulates the rows of the heuristic payoff table not available yet.
+
+    :param count_profiles: Rows of the table.
+    :param payoff_table: PayoffStore instance, with count profiles as keys and one entry per strategy.
+    :param row_simulator: Function that receives a count profile and returns the payoff samples per strategy.
+    :return: Number of rows simulated.
+    """
+    pending_rows = [count_profile for count_profile in count_profiles if not payoff_table.contains(count_profile)]
+    logger.info("Heuristic payoff table: " + str(len(count_profiles)) + " rows. Pending for simulation: " + str(
+        len(pending_rows)))
+
+    for index, count_profile in enumerate(pending_rows):
+        logger.info("Simulating row " + str(index + 1) + " of " + str(len(pending_rows)) + ": " + str(count_profile))
+        payoff_table.add_samples(count_profile, row_simulator(count_profile))
+
+    return len(pending_rows)
+
+
+def get_payoff_matrix(count_profiles, payoff_table):
+    """
+    Arranges the heuristic payoff table as arrays.
+    :param count_profiles: Rows of the table.
+    :param payoff_table: PayoffStore instance, with all the rows simulated.
+    :return: Matrix of players per strategy, and matrix of payoffs per strategy. Payoffs of strategies not in use are
+    zero.
+    """
+    counts = np.array(count_profiles, dtype=float)
+    payoffs = np.zeros(counts.shape)
+
+    for row, count_profile in enumerate(count_profiles):
+        for strategy, count in enumerate(count_profile):
+            if count > 0:
+                payoffs[row, strategy] = np.mean(payoff_table.samples[count_profile][strategy])
+
+    return counts, payoffs
+
+
+def get_fitness(mixed_strategy, counts, payoffs):
+    """
+    Expected payoff of each pure strategy, when all the other players follow a mixed strategy. The payoff of strategy i
+    on a row is weighted by the multinomial probability of the other N-1 players being distributed as that row, minus
+    the player itself.
+
+    :param mixed_strategy: Probability per strategy.
+    :param counts: Matrix of players per strategy, per row.
+    :param payoffs: Matrix of payoffs per strategy, per row.
+    :return: Array containing the expected payoff per strategy.
+    """
+    players = counts[0].sum()
+    fitness = np.zeros(len(mixed_strategy))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        log_probabilities = np.log(mixed_strategy)
+
+        for strategy in range(len(mixed_strategy)):
+            in_use = counts[:, strategy] > 0
+            others = counts[in_use].copy()
+            others[:, strategy] -= 1
+
+            log_coefficients = gammaln(players) - gammaln(others + 1).sum(axis=1)
+            log_likelihood = np.where(others > 0, others * log_probabilities, 0.0).sum(axis=1)
+
+            fitness[strategy] = np.sum(np.exp(log_coefficients + log_likelihood) * payoffs[in_use, strategy])
+
+    return fitness
+
+
+def get_regret(mixed_strategy, counts, payoffs):
+    """
+    Maximum gain a player obtains by deviating from a symmetric mixed profile to a pure strategy.
+    :return: Regret value.
+    """
+    fitness = get_fitness(mixed_strategy, counts, payoffs)
+    return np.max(fitness) - np.dot(mixed_strategy, fitness)
+
+
+def replicator_dynamics(initial_strategy, counts, payoffs, step=0.1, max_iterations=10000, tolerance=1e-8):
+    """
+    Evolves a population according to replicator dynamics: The share of each strategy grows in proportion to its
+    fitness advantage over the population average.
+
+    :param initial_strategy: Initial probability per strategy.
+    :param counts: Matrix of players per strategy, per row.
+    :param payoffs: Matrix of payoffs per strategy, per row.
+    :param step: Integration step. Payoffs are normalized, so it is independent of the payoff scale.
+    :param max_iterations: Maximum number of integration steps.
+    :param tolerance: Convergence criteria, as the maximum change on a strategy share.
+    :return: Final probability per strategy.
+    """
+    payoff_scale = np.max(np.abs(payoffs))
+    if payoff_scale == 0:
+        return np.array(initial_strategy, dtype=float)
+
+    normalized_payoffs = payoffs / payoff_scale
+    mixed_strategy = np.array(initial_strategy, dtype=float)
+
+    for _ in range(max_iterations):
+        fitness = get_fitness(mixed_strategy, counts, normalized_payoffs)
+        average_fitness = np.dot(mixed_strategy, fitness)
+
+        new_strategy = mixed_strategy + step * mixed_strategy * (fitness - average_fitness)
+        new_strategy = np.clip(new_strategy, 0.0, None)
+        new_strategy /= new_strategy.sum()
+
+        if np.max(np.abs(new_strategy - mixed_strategy)) < tolerance:
+            return new_strategy
+
+        mixed_strategy = new_strategy
+
+    return mixed_strategy
+
+
+def get_equilibria(counts, payoffs, starting_points=20, regret_threshold=1e-3, decimals=3, seed=0):
+    """
+    Approximates the symmetric equilibria of the game, running replicator dynamics from the centre of the simplex and
+    from random interior points. Only the resulting points with regret below the threshold, relative to the payoff
+    scale, are reported.
+
+    :param counts: Matrix of players per strategy, per row.
+    :param payoffs: Matrix of payoffs per strategy, per row.
+    :param starting_points: Number of initial points for replicator dynamics.
+    :param regret_threshold: Maximum relative regret for considering a point an equilibrium.
+    :param decimals: Precision used for identifying duplicated equilibria.
+    :return: List of mixed strategies.
+    """
+    strategies = counts.shape[1]
+    random_state = np.random.RandomState(seed)
+    payoff_scale = max(np.max(np.abs(payoffs)), 1e-12)
+
+    initial_points = [np.ones(strategies) / strategies] + [random_state.dirichlet(np.ones(strategies)) for _ in
+                                                           range(starting_points - 1)]
+    equilibria = {}
+    for initial_strategy in initial_points:
+        mixed_strategy = replicator_dynamics(initial_strategy, counts, payoffs)
+        regret = get_regret(mixed_strategy, counts, payoffs) / payoff_scale
+
+        if regret <= regret_threshold:
+            equilibria[tuple(np.round(mixed_strategy, decimals))] = mixed_strategy
+        else:
+            logger.info("Replicator dynamics from " + str(initial_strategy) + " ended on " + str(
+                mixed_strategy) + " with relative regret " + str(regret))
+
+    return equilibria.values()
+
+
+def get_equilibrium_profile(mixed_strategy, strategies_catalog, players, decimals=4):
+    """
+    Expresses a symmetric mixed strategy in the equilibrium profile format used by gtutils.
+    :param mixed_strategy: Probability per strategy.
+    :param strategies_catalog: Catalog of available strategies.
+    :param players: Number of players in the game.
+    :return: Map of players to strategy probabilities.
+    """
+    strategy_probabilities = {strategy.name: str(round(probability, decimals)) for strategy, probability in
+                              zip(strategies_catalog, mixed_strategy)}
+
+    return {player: dict(strategy_probabilities) for player in range(players)}
+
+
+def get_table_size(players, strategies):
+    """
+    Number of rows of the heuristic payoff table.
+    :return: Number of count profiles.
+    """
+    return math.factorial(players + strategies - 1) / (math.factorial(players) * math.factorial(strategies - 1))
+
+
+def check_game_size(reporters, players, strategies, max_table_size):
+    """
+    Validates a game before simulating its heuristic payoff table. Reporters are split among players, so every player
+    needs at least one. The table grows combinatorially with players and strategies, so large ones are refused.
+
+    :param reporters: Number of reporters in the game.
+    :param players: Number of players.
+    :param strategies: Number of strategies available.
+    :param max_table_size: Maximum number of rows to simulate. None for no limit.
+    :return: Number of rows of the table.
+    """
+    if reporters < players:
+        raise ValueError("Only " + str(reporters) + " reporters for " + str(players) +
+                         " players: Every player needs at least one reporter.")
+
+    table_size = get_table_size(players, strategies)
+    logger.info("Heuristic payoff table for " + str(players) + " players and " + str(strategies) + " strategies: " +
+                str(table_size) + " rows.")
+
+    if max_table_size is not None and table_size > max_table_size:
+        raise ValueError("The heuristic payoff table has " + str(table_size) + " rows, more than the limit of " + str(
+            max_table_size) + ". Reduce the players or the strategies.")
+
+    return table_size
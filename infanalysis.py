@@ -1,8 +1,13 @@
 """
 This module contains the code for regression analysis for the bug reporting
 processes considered
+
+Each analysis is a sweep over an independent variable. Every (scenario, independent variable value) point gets its own
+copy of the simulation inputs, so all the points of all the scenarios can run concurrently on a process pool. See
+run_sweep.
 """
 
+import copy
 import time
 import logging
 import statsmodels.api as sm
@@ -12,6 +17,7 @@ import matplotlib.pyplot as plt
 import gtconfig
 import penaltyexp
 import simdata
+import simutils
 import syseval
 
 if gtconfig.is_windows:
@@ -65,56 +71,140 @@ def configure_simulation(independent_variable_value, input_params, empirical_pro
                                   simulation_configuration=simulation_configuration)
 
 
-def get_performance_dataframe(input_params, simfunction, simulation_configuration, empirical_profile,
-                              original_team_size, step, desc, configuration_function=apply_inflation_factor):
+def get_sweep_points(desc, input_params, simulation_configuration, empirical_profile, original_team_size, step,
+                     configuration_function=apply_inflation_factor):
     """
-    Produces a dataframe containing performance measure values per several configurations of inflation probability.
-    :param input_params: Simulation inputs.
-    :param simfunction: Simulation function.
-    :param simulation_configuration: Simulation configuration.
+    Materializes the points of a sweep over the independent variable. Each point has its own copy of the simulation
+    inputs and configuration, already adjusted to its value, so points do not share mutable state.
+
+    :param desc: Description of the scenario.
+    :param input_params: Simulation inputs. They are not modified.
+    :param simulation_configuration: Simulation configuration. It is not modified.
     :param empirical_profile: Empirical strategy profile.
-    :param step: Offset between inflation probabilities.
-    :return: Dataframe instance.
+    :param original_team_size: Team size in the dataset.
+    :param step: Offset between independent variable values.
+    :param configuration_function: Function that applies an independent variable value to the inputs.
+    :return: List of sweep points.
     """
-    regression_data = []
-
-    logger.info("Reporters in population: " + str(len(empirical_profile.keys())))
-    independent_variable_values = range(0, 100, step)
+    sweep_points = []
 
-    for independent_variable_value in independent_variable_values:
-        logger.info(
-            "Simulating " + desc + " with an independent variable  of " + str(independent_variable_value))
+    for independent_variable_value in range(0, 100, step):
+        point_params = copy.deepcopy(input_params)
+        point_configuration = copy.deepcopy(simulation_configuration)
 
-        normalized_value = configure_simulation(independent_variable_value, input_params, empirical_profile,
+        normalized_value = configure_simulation(independent_variable_value, point_params, empirical_profile,
                                                 original_team_size,
                                                 configuration_function=configuration_function,
-                                                simulation_configuration=simulation_configuration)
+                                                simulation_configuration=point_configuration)
+
+        sweep_points.append({'desc': desc,
+                             'independent_variable_value': independent_variable_value,
+                             'normalized_value': normalized_value,
+                             'input_params': point_params,
+                             'simulation_configuration': point_configuration})
 
-        simulation_output = syseval.run_scenario(simfunction, input_params, simulation_configuration)
+    return sweep_points
 
-        simulation_output_file = "csv/" + desc + "_simulaton_results.csv"
-        pd.DataFrame(simulation_output.get_consolidated_output(input_params.player_configuration)).to_csv(
-            simulation_output_file)
 
-        logger.info("The simulation output was stored at: " + simulation_output_file)
+def get_regression_data(sweep_point, simulation_output):
+    """
+    Extracts the performance metrics of each replication of a sweep point.
+    :param sweep_point: Sweep point.
+    :param simulation_output: Simulation output for the point.
+    :return: List of regression rows.
+    """
+    performance_metrics = zip(simulation_output.get_time_ratio_per_priority(simdata.SEVERE_PRIORITY),
+                              simulation_output.get_completed_per_real_priority(simdata.SEVERE_PRIORITY),
+                              simulation_output.get_fixed_ratio_per_priority(simdata.SEVERE_PRIORITY,
+                                                                             exclude_open=False),
+                              simulation_output.get_fixed_ratio_per_priority(simdata.SEVERE_PRIORITY,
+                                                                             exclude_open=True))
+
+    return [{'independent_variable_value': sweep_point['independent_variable_value'],
+             'normalized_value': sweep_point['normalized_value'],
+             'severe_time_ratio': severe_time_ratio,
+             'severe_completed': severe_completed,
+             'severe_fixed_ratio': severe_fixed_ratio,
+             'severe_fixed_ratio_active': severe_fixed_ratio_active
+             } for severe_time_ratio, severe_completed, severe_fixed_ratio, severe_fixed_ratio_active in
+            performance_metrics]
+
+
+def run_sweep_point(sweep_point, simfunction=simutils.launch_simulation):
+    """
+    Simulates a sweep point.
+    :param sweep_point: Sweep point.
+    :param simfunction: Simulation function.
+    :return: Sweep point, regression rows and consolidated simulation output.
+    """
+    simulation_output = syseval.run_scenario(simfunction, sweep_point['input_params'],
+                                             sweep_point['simulation_configuration'])
+
+    consolidated_output = simulation_output.get_consolidated_output(sweep_point['input_params'].player_configuration)
+    return sweep_point, get_regression_data(sweep_point, simulation_output), consolidated_output
 
-        performance_metrics = zip(simulation_output.get_time_ratio_per_priority(simdata.SEVERE_PRIORITY),
-                                  simulation_output.get_completed_per_real_priority(simdata.SEVERE_PRIORITY),
-                                  simulation_output.get_fixed_ratio_per_priority(simdata.SEVERE_PRIORITY,
-                                                                                 exclude_open=False),
-                                  simulation_output.get_fixed_ratio_per_priority(simdata.SEVERE_PRIORITY,
-                                                                                 exclude_open=True))
 
-        regression_data += [{'independent_variable_value': independent_variable_value,
-                             'normalized_value': normalized_value,
-                             'severe_time_ratio': severe_time_ratio,
-                             'severe_completed': severe_completed,
-                             'severe_fixed_ratio': severe_fixed_ratio,
-                             'severe_fixed_ratio_active': severe_fixed_ratio_active
-                             } for severe_time_ratio, severe_completed, severe_fixed_ratio, severe_fixed_ratio_active in
-                            performance_metrics]
+def run_sweep(sweep_points, simfunction, parallel=gtconfig.parallel_sweep):
+    """
+    Simulates all the sweep points, possibly from several scenarios. With parallel execution, the points run
+    concurrently on a process pool -see simutils.run_scenarios-. Otherwise, they run one after another with the
+    simulation function provided.
 
-    return pd.DataFrame(regression_data)
+    The simulation output of each point is written to its own CSV file as soon as it finishes. The performance metrics
+    of all the replications of a scenario are written to a single CSV file.
+
+    :param sweep_points: List of sweep points.
+    :param simfunction: Simulation function, for sequential execution.
+    :param parallel: True for simulating the points on a process pool.
+    :return: Map from scenario description to the regression dataframe.
+    """
+    point_outputs = simutils.run_scenarios(run_sweep_point, sweep_points, simfunction=simfunction, parallel=parallel,
+                                           processes=gtconfig.sweep_workers)
+
+    regression_data = {}
+    finished_points = 0
+    for sweep_point, point_data, consolidated_output in point_outputs:
+        desc = sweep_point['desc']
+        regression_data.setdefault(desc, []).extend(point_data)
+
+        simulation_output_file = "csv/" + desc + "_" + str(
+            sweep_point['independent_variable_value']) + "_simulaton_results.csv"
+        pd.DataFrame(consolidated_output).to_csv(simulation_output_file)
+
+        finished_points += 1
+        logger.info("Simulated " + desc + " with an independent variable of " + str(
+            sweep_point['independent_variable_value']) + " (" + str(finished_points) + " of " + str(
+            len(sweep_points)) + " points). The simulation output was stored at: " + simulation_output_file)
+
+    sweep_results = {}
+    for desc, data in regression_data.iteritems():
+        sweep_results[desc] = pd.DataFrame(data).sort_values('independent_variable_value',
+                                                             kind='mergesort').reset_index(drop=True)
+
+        sweep_results_file = "csv/" + desc + "_sweep_results.csv"
+        sweep_results[desc].to_csv(sweep_results_file, index=False)
+        logger.info("Performance metrics per replication of " + desc + " stored at: " + sweep_results_file +
+                    ". See metamodel.py for fitting a response surface over them.")
+
+    return sweep_results
+
+
+def get_performance_dataframe(input_params, simfunction, simulation_configuration, empirical_profile,
+                              original_team_size, step, desc, configuration_function=apply_inflation_factor):
+    """
+    Produces a dataframe containing performance measure values per several configurations of inflation probability.
+    :param input_params: Simulation inputs.
+    :param simfunction: Simulation function.
+    :param simulation_configuration: Simulation configuration.
+    :param empirical_profile: Empirical strategy profile.
+    :param step: Offset between inflation probabilities.
+    :return: Dataframe instance.
+    """
+    logger.info("Reporters in population: " + str(len(empirical_profile.keys())))
+
+    sweep_points = get_sweep_points(desc, input_params, simulation_configuration, empirical_profile,
+                                    original_team_size, step, configuration_function=configuration_function)
+    return run_sweep(sweep_points, simfunction)[desc]
 
 
 def perform_regression_analysis(desc, dataframe):
@@ -180,32 +270,30 @@ def do_gatekeeper(simulation_configuration, input_params, simfunction, empirical
     queue_configurations = [True, False]
     dev_team_factors = [0.5, 1.0]
 
-    gatekeeper_results = {}
-
     original_team_size = input_params.dev_team_size
     logger.info("Original team size: " + str(original_team_size))
 
+    descriptions = []
+    sweep_points = []
     for queue_configuration in queue_configurations:
 
         for dev_team_factor in dev_team_factors:
-            logger.info("Using dev team factor " + str(dev_team_factor))
-            input_params.dev_team_size = int(original_team_size * dev_team_factor)
+            scenario_params = copy.deepcopy(input_params)
+            scenario_params.dev_team_size = int(original_team_size * dev_team_factor)
 
             desc = "GATEKEEPER_PRIQUEUE_" + str(queue_configuration) + "_DEV_FACTOR_" + str(dev_team_factor)
-            logger.info("Starting " + desc + " analysis ...")
+            logger.info("Preparing " + desc + " analysis ...")
 
-            simulation_configuration["PRIORITY_QUEUE"] = queue_configuration
-            logger.info("Using Priority Queue? " + str(queue_configuration))
+            scenario_configuration = dict(simulation_configuration)
+            scenario_configuration["PRIORITY_QUEUE"] = queue_configuration
 
-            dataframe = get_performance_dataframe(input_params=input_params, simfunction=simfunction,
-                                                  simulation_configuration=simulation_configuration,
-                                                  empirical_profile=empirical_profile,
-                                                  original_team_size=original_team_size, step=step, desc=desc,
-                                                  configuration_function=apply_gatekeeper_error)
+            descriptions.append(desc)
+            sweep_points += get_sweep_points(desc, scenario_params, scenario_configuration, empirical_profile,
+                                             original_team_size, step, configuration_function=apply_gatekeeper_error)
 
-            gatekeeper_results[desc] = perform_regression_analysis(desc=desc, dataframe=dataframe)
+    regression_data = run_sweep(sweep_points, simfunction)
 
-    return gatekeeper_results
+    return {desc: perform_regression_analysis(desc=desc, dataframe=regression_data[desc]) for desc in descriptions}
 
 
 def do_throttling(simulation_configuration, input_params, simfunction, empirical_profile, original_team_size, step):
@@ -216,22 +304,22 @@ def do_throttling(simulation_configuration, input_params, simfunction, empirical
     # TODO(cgavidia): Remove later
     penalty_values = [3]
 
-    throttling_results = {}
+    descriptions = []
+    sweep_points = []
     for penalty in penalty_values:
-        simulation_configuration["INFLATION_FACTOR"] = penalty / 100.0
+        scenario_configuration = dict(simulation_configuration)
+        scenario_configuration["INFLATION_FACTOR"] = penalty / 100.0
 
         desc = "THROTTLING_INF00" + str(penalty)
-        logger.info("Starting " + desc + " analysis ...")
+        logger.info("Preparing " + desc + " analysis ...")
 
-        dataframe = get_performance_dataframe(input_params=input_params, simfunction=simfunction,
-                                              simulation_configuration=simulation_configuration,
-                                              empirical_profile=empirical_profile,
-                                              original_team_size=original_team_size, step=step, desc=desc,
-                                              configuration_function=apply_gatekeeper_error)
+        descriptions.append(desc)
+        sweep_points += get_sweep_points(desc, input_params, scenario_configuration, empirical_profile,
+                                         original_team_size, step, configuration_function=apply_gatekeeper_error)
 
-        throttling_results[desc] = perform_regression_analysis(desc=desc, dataframe=dataframe)
+    regression_data = run_sweep(sweep_points, simfunction)
 
-    return throttling_results
+    return {desc: perform_regression_analysis(desc=desc, dataframe=regression_data[desc]) for desc in descriptions}
 
 
 def plot_comparison(plot_configs, y_min, y_max, desc):
@@ -0,0 +1,296 @@
+"""
+This module fits response surfaces over the results of previous parameter sweeps -from infanalysis.py or doe.py-, so
+the performance metrics of a scenario can be predicted without simulating it. Replications are averaged per design
+point, and a Gaussian Process or a polynomial regression is fitted over the means. Predictions come with a standard
+deviation, which is also used for proposing the next design points to simulate: The ones where the surface is the most
+uncertain.
+
+Usage: python metamodel.py --file csv/doe_throttling_20_points_results.csv --mechanism throttling
+       --at inflation_factor=0.07 dev_team_factor=0.6 priority_queue=1
+       python metamodel.py --file csv/<desc>_sweep_results.csv --parameters normalized_value
+"""
+
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+from sklearn.gaussian_process import GaussianProcessRegressor
+from sklearn.gaussian_process.kernels import ConstantKernel, RBF
+from sklearn.preprocessing import PolynomialFeatures
+
+import doe
+import gtconfig
+
+logger = gtconfig.get_logger("response_surface", "response_surface.txt", level=logging.INFO)
+
+GAUSSIAN_PROCESS = "gp"
+POLYNOMIAL = "polynomial"
+
+# Added to the variance of each design point mean, for numerical stability.
+NUGGET = 1e-8
+
+
+def get_design_means(responses, parameters, response):
+    """
+    Averages the replications of each design point.
+
+    :param responses: Dataframe with one row per replication, as produced by doe.run_design or infanalysis.run_sweep.
+    :param parameters: Columns identifying a design point.
+    :param response: Column of the performance metric.
+    :return: Dataframe with one row per design point, containing the parameters, the mean response, the variance of
+    the mean and the number of replications.
+    """
+    valid_responses = responses.dropna(subset=[response])
+    grouped_responses = valid_responses.groupby(parameters)[response]
+
+    design_means = pd.DataFrame({"mean": grouped_responses.mean(),
+                                 "variance": grouped_responses.var(),
+                                 "replications": grouped_responses.count()}).reset_index()
+    design_means["variance"] = (design_means["variance"] / design_means["replications"]).fillna(0.0)
+
+    return design_means
+
+
+class ResponseSurface:
+    """
+    Response surface of a performance metric over the parameters of a scenario. Parameters are scaled to the unit
+    interval, according to the ranges observed during fitting.
+    """
+
+    def __init__(self, parameters, kind=GAUSSIAN_PROCESS, degree=2):
+        """
+        :param parameters: Parameter names, in the order used for predictions.
+        :param kind: GAUSSIAN_PROCESS or POLYNOMIAL.
+        :param degree: Degree of the polynomial regression.
+        """
+        if kind not in [GAUSSIAN_PROCESS, POLYNOMIAL]:
+            raise ValueError("Unsupported response surface: " + str(kind))
+
+        self.parameters = parameters
+        self.kind = kind
+        self.degree = degree
+
+        self.minimums = None
+        self.maximums = None
+        self.values = None
+        self.features = None
+        self.means = None
+        self.variances = None
+
+        self.model = None
+        self.coefficients = None
+        self.covariance = None
+
+    def get_features(self, design_points):
+        """
+        :param design_points: Dataframe, or list of maps, containing the parameters.
+        :return: Array of parameters scaled to the unit interval.
+        """
+        values = pd.DataFrame(design_points)[self.parameters].astype(float).values
+        ranges = np.where(self.maximums > self.minimums, self.maximums - self.minimums, 1.0)
+
+        return (values - self.minimums) / ranges
+
+    def fit(self, design_means, kernel=None, minimums=None, maximums=None):
+        """
+        Fits the surface over the design point means.
+
+        :param design_means: Dataframe, as returned by get_design_means.
+        :param kernel: Kernel for the Gaussian Process. If None, its hyper-parameters are optimized.
+        :param minimums: Parameter values scaled to zero. If None, the minimums of the design points.
+        :param maximums: Parameter values scaled to one. If None, the maximums of the design points.
+        :return: The response surface.
+        """
+        self.values = design_means[self.parameters].astype(float).values
+        self.minimums = self.values.min(axis=0) if minimums is None else minimums
+        self.maximums = self.values.max(axis=0) if maximums is None else maximums
+
+        self.features = self.get_features(design_means)
+        self.means = design_means["mean"].values.astype(float)
+        self.variances = design_means["variance"].values.astype(float)
+
+        if self.kind == GAUSSIAN_PROCESS:
+            self.fit_gaussian_process(kernel)
+        else:
+            self.fit_polynomial()
+
+        logger.info("Response surface (" + self.kind + ") fitted over " + str(len(self.means)) + " design points." +
+                    (" Kernel: " + str(self.model.kernel_) if self.kind == GAUSSIAN_PROCESS else ""))
+        return self
+
+    def fit_gaussian_process(self, kernel):
+        """
+        The variance of each mean is used as its noise level, so design points with few replications are trusted less.
+        """
+        optimizer = "fmin_l_bfgs_b"
+        if kernel is None:
+            kernel = ConstantKernel() * RBF(length_scale=np.ones(len(self.parameters)),
+                                            length_scale_bounds=(1e-2, 1e2))
+        else:
+            optimizer = None
+
+        self.model = GaussianProcessRegressor(kernel=kernel, alpha=self.variances + NUGGET, normalize_y=True,
+                                              optimizer=optimizer, n_restarts_optimizer=2, random_state=0)
+        self.model.fit(self.features, self.means)
+
+    def fit_polynomial(self):
+        """
+        Ordinary least squares over the polynomial terms of the parameters. The covariance of the coefficients provides
+        the standard deviation of the predictions.
+        """
+        self.model = PolynomialFeatures(degree=self.degree)
+        terms = self.model.fit_transform(self.features)
+
+        self.coefficients = np.linalg.lstsq(terms, self.means, rcond=None)[0]
+        residuals = self.means - terms.dot(self.coefficients)
+        degrees_of_freedom = max(len(self.means) - terms.shape[1], 1)
+
+        residual_variance = residuals.dot(residuals) / degrees_of_freedom
+        self.covariance = residual_variance * np.linalg.pinv(terms.T.dot(terms))
+
+    def predict(self, design_points):
+        """
+        Predicts the mean response on design points.
+
+        :param design_points: Dataframe, or list of maps, containing the parameters.
+        :return: Array of predicted means and array of standard deviations.
+        """
+        features = self.get_features(design_points)
+
+        if self.kind == GAUSSIAN_PROCESS:
+            return self.model.predict(features, return_std=True)
+
+        terms = self.model.transform(features)
+        deviations = np.sqrt(np.maximum((terms.dot(self.covariance) * terms).sum(axis=1), 0.0))
+        return terms.dot(self.coefficients), deviations
+
+    def get_conditioned(self, design_points):
+        """
+        Surface that also includes design points not simulated yet, assuming their response is the predicted one. The
+        prediction uncertainty does not depend on the response values, so this shows how it would shrink once the
+        points are simulated.
+
+        :param design_points: Dataframe, or list of maps, containing the parameters.
+        :return: A new response surface, with the same hyper-parameters and parameter scaling.
+        """
+        new_points = pd.DataFrame(design_points)[self.parameters]
+        new_points["mean"], _ = self.predict(new_points)
+        new_points["variance"] = 0.0
+
+        design_means = pd.DataFrame(self.values, columns=self.parameters)
+        design_means["mean"] = self.means
+        design_means["variance"] = self.variances
+
+        conditioned_surface = ResponseSurface(self.parameters, kind=self.kind, degree=self.degree)
+        kernel = self.model.kernel_ if self.kind == GAUSSIAN_PROCESS else None
+        return conditioned_surface.fit(pd.concat([design_means, new_points], ignore_index=True, sort=False),
+                                       kernel=kernel, minimums=self.minimums, maximums=self.maximums)
+
+
+def propose_design_points(surface, parameter_ranges, points, candidates=1000, seed=0):
+    """
+    Sequential design: Selects, one at a time, the candidate point with the highest prediction uncertainty. After each
+    selection, the surface is conditioned on the point, so the next ones are not proposed in the same region.
+
+    :param surface: Fitted response surface.
+    :param parameter_ranges: Map of parameter names to ranges, as in doe.get_design.
+    :param points: Number of design points to propose.
+    :param candidates: Number of candidate points, from a Latin hypercube design.
+    :param seed: Seed for generating the candidates.
+    :return: Dataframe with the proposed points, and their predicted mean and standard deviation before selection.
+    """
+    candidate_points = doe.get_design(parameter_ranges, candidates, seed=seed, candidates=1)
+    predicted_means, _ = surface.predict(candidate_points)
+
+    proposals = []
+    conditioned_surface = surface
+    for _ in range(min(points, len(candidate_points.index))):
+        _, deviations = conditioned_surface.predict(candidate_points)
+        best_candidate = int(np.argmax(deviations))
+
+        proposal = candidate_points.iloc[best_candidate].to_dict()
+        proposal.update({"predicted_mean": predicted_means[best_candidate],
+                         "predicted_deviation": deviations[best_candidate]})
+        proposals.append(proposal)
+
+        conditioned_surface = conditioned_surface.get_conditioned(candidate_points.iloc[[best_candidate]])
+        candidate_points = candidate_points.drop(candidate_points.index[best_candidate])
+        predicted_means = np.delete(predicted_means, best_candidate)
+
+    return pd.DataFrame(proposals, columns=list(parameter_ranges.keys()) + ["predicted_mean", "predicted_deviation"])
+
+
+def get_parameter_ranges(responses, parameters):
+    """
+    Parameter ranges observed in a results file, for designs not generated from doe.MECHANISM_PARAMETERS.
+
+    :param responses: Dataframe with one row per design point and replication.
+    :param parameters: Columns identifying a design point.
+    :return: Map of parameter names to ranges, as in doe.get_design. Boolean parameters are categorical.
+    """
+    parameter_ranges = {}
+    for parameter in parameters:
+        if responses[parameter].dtype == bool:
+            parameter_ranges[parameter] = [True, False]
+        else:
+            parameter_ranges[parameter] = (responses[parameter].min(), responses[parameter].max())
+
+    return parameter_ranges
+
+
+def parse_design_point(assignments):
+    """
+    :param assignments: List of strings with the format parameter=value.
+    :return: Map of parameter names to values.
+    """
+    design_point = {}
+    for assignment in assignments:
+        parameter, value = assignment.split("=")
+        design_point[parameter] = float(value)
+
+    return design_point
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response surface over the results of a parameter sweep.")
+    parser.add_argument("--file", required=True, help="CSV file with one row per design point and replication.")
+    parser.add_argument("--mechanism", choices=sorted(doe.MECHANISM_PARAMETERS.keys()), default="gatekeeper",
+                        help="Mechanism whose parameters were explored.")
+    parser.add_argument("--parameters", nargs="*", default=[],
+                        help="Columns identifying a design point, like normalized_value for infanalysis.py sweeps. "
+                             "If provided, --mechanism is ignored and the ranges are taken from the file.")
+    parser.add_argument("--response", default="severe_fixed_ratio", help="Performance metric to model.")
+    parser.add_argument("--kind", choices=[GAUSSIAN_PROCESS, POLYNOMIAL], default=GAUSSIAN_PROCESS,
+                        help="Type of response surface.")
+    parser.add_argument("--at", nargs="*", default=[], help="Design point to predict, as parameter=value pairs.")
+    parser.add_argument("--proposals", type=int, default=5, help="Design points to propose for simulation.")
+    arguments = parser.parse_args()
+
+    responses = pd.read_csv(arguments.file)
+    parameter_ranges = doe.MECHANISM_PARAMETERS[arguments.mechanism]
+    file_prefix = arguments.mechanism
+    if len(arguments.parameters) > 0:
+        parameter_ranges = get_parameter_ranges(responses, arguments.parameters)
+        file_prefix = "_".join(sorted(arguments.parameters))
+    parameters = sorted(parameter_ranges.keys())
+
+    design_means = get_design_means(responses, parameters, arguments.response)
+    surface = ResponseSurface(parameters, kind=arguments.kind).fit(design_means)
+
+    if len(arguments.at) > 0:
+        design_point = parse_design_point(arguments.at)
+        means, deviations = surface.predict([design_point])
+        logger.info("Predicted " + arguments.response + " at " + str(design_point) + ": " + str(means[0]) +
+                    " (standard deviation " + str(deviations[0]) + ")")
+
+    proposals = propose_design_points(surface, parameter_ranges, arguments.proposals)
+    file_name = "csv/" + file_prefix + "_" + arguments.response + "_proposed_points.csv"
+    proposals.to_csv(file_name, index=False)
+
+    logger.info("Proposed design points: \n" + str(proposals))
+    logger.info("Proposed design points stored at " + file_name)
+
+
+if __name__ == "__main__":
+    main()
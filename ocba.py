@@ -0,0 +1,174 @@
+"""
+This module distributes a simulation budget across strategy profiles, using the Optimal Computing Budget Allocation
+(OCBA) rule of Chen et al. For equilibrium analysis, what matters are the best-response comparisons: For each team and
+each strategy of its opponents, which of its strategies provides the highest payoff. Each of these comparisons is a
+selection problem, where OCBA assigns more replications to noisy profiles whose payoff is close to the best one.
+"""
+
+import logging
+import math
+from collections import defaultdict
+
+import numpy as np
+
+import gtconfig
+import payoffstore
+
+logger = gtconfig.get_logger("ocba_allocation", "ocba_allocation.txt", level=logging.INFO)
+
+
+def get_ocba_ratios(means, deviations, minimum_difference=1e-6):
+    """
+    Asymptotically optimal allocation ratios for selecting the design with the highest mean.
+
+    :param means: Sample mean per design.
+    :param deviations: Sample standard deviation per design.
+    :param minimum_difference: Lower bound for the difference of means, to avoid dividing by zero.
+    :return: Array of allocation ratios, adding up to one.
+    """
+    means = np.array(means, dtype=float)
+    deviations = np.array(deviations, dtype=float)
+
+    best = np.argmax(means)
+    ratios = np.zeros(len(means))
+
+    for design in range(len(means)):
+        if design != best:
+            difference = max(means[best] - means[design], minimum_difference)
+            ratios[design] = (deviations[design] / difference) ** 2
+
+    others = [design for design in range(len(means)) if design != best and deviations[design] > 0]
+    ratios[best] = deviations[best] * math.sqrt(sum([ratios[design] ** 2 / deviations[design] ** 2
+                                                     for design in others]))
+
+    if ratios.sum() == 0:
+        return np.ones(len(means)) / len(means)
+
+    return ratios / ratios.sum()
+
+
+def get_profile_weights(strategy_maps, teams, payoff_store):
+    """
+    Adds the OCBA ratios a profile obtains on each of the best-response comparisons it is involved in.
+
+    :param strategy_maps: Strategy maps of all the profiles in the game.
+    :param teams: Number of teams in the game.
+    :param payoff_store: Payoff store containing samples for all the profiles.
+    :return: Map of profile keys to weights.
+    """
+    weights = defaultdict(float)
+
+    for team in range(teams):
+        comparisons = defaultdict(list)
+        for strategy_map in strategy_maps:
+            profile_key = payoffstore.get_profile_key(strategy_map, teams)
+            opponent_key = profile_key[:team] + profile_key[team + 1:]
+            comparisons[opponent_key].append(profile_key)
+
+        for profile_keys in comparisons.values():
+            if len(set(profile_keys)) < 2:
+                continue
+
+            means = [payoff_store.get_payoffs(profile_key)[team] for profile_key in profile_keys]
+            deviations = [payoff_store.get_standard_errors(profile_key)[team] * math.sqrt(
+                payoff_store.get_replications(profile_key)) for profile_key in profile_keys]
+
+            for profile_key, ratio in zip(profile_keys, get_ocba_ratios(means, deviations)):
+                weights[profile_key] += ratio
+
+    return weights
+
+
+def allocate_replications(weights, current_replications, round_budget):
+    """
+    Distributes the replications of a round, so the total per profile approaches the proportions given by the
+    weights.
+
+    :param weights: Map of profile keys to weights.
+    :param current_replications: Map of profile keys to replications already executed.
+    :param round_budget: Replications available for the round.
+    :return: Map of profile keys to additional replications.
+    """
+    total_weight = sum(weights.values())
+    total_replications = sum(current_replications.values()) + round_budget
+
+    shortfalls = {}
+    for profile_key, weight in weights.iteritems():
+        target = total_replications * weight / total_weight if total_weight > 0 else 0
+        shortfalls[profile_key] = max(0.0, target - current_replications[profile_key])
+
+    total_shortfall = sum(shortfalls.values())
+    if total_shortfall == 0:
+        return {}
+
+    allocation = {profile_key: round_budget * shortfall / total_shortfall for profile_key, shortfall in
+                  shortfalls.iteritems()}
+    replications = {profile_key: int(math.floor(value)) for profile_key, value in allocation.iteritems()}
+
+    remaining = round_budget - sum(replications.values())
+    by_remainder = sorted(allocation.keys(),
+                          key=lambda profile_key: allocation[profile_key] - replications[profile_key], reverse=True)
+    for profile_key in by_remainder[:remaining]:
+        replications[profile_key] += 1
+
+    return {profile_key: value for profile_key, value in replications.iteritems() if value > 0}
+
+
+def run_allocation(strategy_maps, teams, payoff_store, replication_runner, total_budget, initial_replications=5,
+                   rounds=5):
+    """
+    Simulates all the profiles of a game within a replication budget. After an initial batch per profile, the rest
+    of the budget is spent in rounds according to OCBA.
+
+    :param strategy_maps: Strategy maps of all the profiles in the game.
+    :param teams: Number of teams in the game.
+    :param payoff_store: Payoff store instance.
+    :param replication_runner: Function that receives a list of (strategy map, replications) tuples, simulates them
+    -possibly in parallel- and returns the list of payoff samples per team for each.
+    :param total_budget: Total number of replications for all the profiles, including the initial batch.
+    :param initial_replications: Replications per profile before the first allocation round. At least two, for
+    estimating variances.
+    :param rounds: Number of allocation rounds.
+    :return: Number of replications executed.
+    """
+    profiles = {}
+    for strategy_map in strategy_maps:
+        profiles[payoffstore.get_profile_key(strategy_map, teams)] = strategy_map
+
+    spent = 0
+    initial_replications = max(2, initial_replications)
+
+    def execute(jobs):
+        outputs = replication_runner([(profiles[profile_key], replications) for profile_key, replications in jobs])
+        for (profile_key, replications), samples_per_team in zip(jobs, outputs):
+            payoff_store.add_samples(profile_key, samples_per_team)
+
+        return sum([replications for _, replications in jobs])
+
+    initial_jobs = [(profile_key, initial_replications - payoff_store.get_replications(profile_key)) for
+                    profile_key in profiles.keys() if payoff_store.get_replications(profile_key) < initial_replications]
+    if len(initial_jobs) > 0:
+        spent += execute(initial_jobs)
+
+    logger.info("Initial batch: " + str(spent) + " replications over " + str(len(profiles)) + " profiles. Budget: " +
+                str(total_budget))
+
+    for allocation_round in range(rounds):
+        round_budget = (total_budget - spent) / (rounds - allocation_round)
+        if round_budget <= 0:
+            break
+
+        weights = get_profile_weights(profiles.values(), teams, payoff_store)
+        current_replications = {profile_key: payoff_store.get_replications(profile_key) for profile_key in profiles}
+        allocation = allocate_replications(weights, current_replications, round_budget)
+
+        logger.info("Allocation round " + str(allocation_round + 1) + " of " + str(rounds) + ": " + str(
+            round_budget) + " replications over " + str(len(allocation)) + " profiles.")
+
+        if len(allocation) == 0:
+            break
+
+        spent += execute(allocation.items())
+
+    logger.info("Replications executed: " + str(spent) + " of a budget of " + str(total_budget))
+    return spent
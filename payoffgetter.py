@@ -9,15 +9,24 @@ Experiment parameters can be tuned in gtconfig.py.
 import logging
 import time
 import sys
+import functools
 
 from recordtype import recordtype
 import pandas as pd
 
 import itertools
 from sklearn.cluster import KMeans
+from pathos.multiprocessing import ProcessingPool as Pool
 
 import simmodel
 import simtwins
+import payoffstore
+import eqverification
+import heuristicpayoff
+import surrogate
+import ocba
+import profilesearch
+import dataset
 import simdata
 import simdriver
 import simutils
@@ -62,7 +71,42 @@ DEFAULT_CONFIGURATION = {
     'AGGREGATE_AGENT_TEAM': -1,
     'ENABLE_RECYCLING': True,  # Remembers previous simulation execution. Currently working for symmetric with twins.
     'SYMMETRIC': True,  # If all the players have the same strategic vision, i.e  there are no advantages per player.
-    'ALL_EQUILIBRIA': True  # Instructs gambit to find all equilibria. Only supported for 2 player games.
+    'ALL_EQUILIBRIA': True,  # Instructs gambit to find all equilibria. Only supported for 2 player games.
+
+    # Lazy profile exploration: Profiles are simulated on demand, starting from a subgame. See profilesearch.py
+    'LAZY_EXPLORATION': False,
+    'LAZY_INITIAL_STRATEGIES': 2,
+    'LAZY_REGRET_THRESHOLD': 1.0,  # Payoffs on the NFG file are rounded to integers.
+
+    # Equilibrium verification: Deviation gains are checked using per-profile confidence intervals.
+    # See eqverification.py
+    'VERIFY_EQUILIBRIA': False,
+    'VERIFICATION_CONFIDENCE': 0.95,
+    'VERIFICATION_REPLICATIONS': 30,
+    'VERIFICATION_ROUNDS': 3,
+
+    # Heuristic payoff table: Symmetric games with many players, where reporters are split in HPT_PLAYERS groups.
+    # See heuristicpayoff.py
+    'HEURISTIC_PAYOFF_TABLE': False,
+    'HPT_PLAYERS': 10,
+    'HPT_MAX_TABLE_SIZE': 100000,
+
+    # Payoff persistence: Samples are stored by strategy parameters, so extending the catalog only simulates the new
+    # profiles. Previous equilibria warm-start the equilibrium calculation.
+    'PERSIST_PAYOFFS': False,
+
+    # Surrogate pruning: Only the profiles critical for the equilibria are simulated. See surrogate.py
+    'SURROGATE_PRUNING': False,
+    'SURROGATE_INITIAL_PROFILES': 10,
+    'SURROGATE_CONFIDENCE': 0.95,
+    'SURROGATE_VALIDATION': False,  # True for also simulating all profiles, and comparing the equilibria found.
+
+    # Budget allocation: Replications are assigned to profiles according to OCBA, instead of REPLICATIONS_PER_PROFILE
+    # for each. See ocba.py
+    'OCBA_ALLOCATION': False,
+    'OCBA_TOTAL_BUDGET': None,  # None for the same budget as the uniform allocation.
+    'OCBA_INITIAL_REPLICATIONS': 5,
+    'OCBA_ROUNDS': 5
 }
 
 logger = gtconfig.get_logger("exp_equilibrium_results", "exp_equilibrium_results.txt", level=logging.INFO)
@@ -400,8 +444,8 @@ def configure_strategies_per_team(player_configuration, strategy_map):
         config[simmodel.STRATEGY_KEY] = strategy_map[config['team']]
 
 
-def get_simulation_results(file_prefix, strategy_map, player_configuration, game_configuration, simfunction, simparams,
-                           simulation_history):
+def get_simulation_results(file_prefix, strategy_map, player_configuration, game_configuration, simfunction,
+                           simulation_config, simulation_history):
     """
     For a given strategy profile, it returns the results of its simulation execution.
     :return: 
@@ -409,21 +453,8 @@ def get_simulation_results(file_prefix, strategy_map, player_configuration, game
     configure_strategies_per_team(player_configuration, strategy_map)
 
     simulation_output = simfunction(
-        team_capacity=simparams['dev_team_size'],
-        ignored_gen=simparams['ignored_gen'],
-        reporter_gen=simparams['reporter_gen'],
-        target_fixes=simparams['target_fixes'],
-        batch_size_gen=simparams['batch_size_gen'],
-        interarrival_time_gen=simparams['interarrival_time_gen'],
-        priority_generator=simparams['priority_generator'],
-        reporters_config=player_configuration,
-        resolution_time_gen=simparams['resolution_time_gen'],
-        max_time=simparams['simulation_time'],
-        catcher_generator=simparams['catcher_generator'],
-        max_iterations=game_configuration["REPLICATIONS_PER_PROFILE"],
-        inflation_factor=game_configuration["INFLATION_FACTOR"],
-        quota_system=game_configuration["THROTTLING_ENABLED"],
-        gatekeeper_config=game_configuration["GATEKEEPER_CONFIG"])
+        simulation_config=simulation_config,
+        max_iterations=game_configuration["REPLICATIONS_PER_PROFILE"])
 
     simulation_result = simcruncher.consolidate_payoff_results("ALL", player_configuration,
                                                                simulation_output,
@@ -434,15 +465,343 @@ def get_simulation_results(file_prefix, strategy_map, player_configuration, game
 
     file_name = "csv/all_teams_" + file_prefix + '_simulation_results.csv'
     overall_dataframe.to_csv(file_name, index=False)
-    logger.info("The simulation results for the strategy profile were stored at " + file)
+    logger.info("The simulation results for the strategy profile were stored at " + file_name)
 
     return overall_dataframe
 
 
+def get_simulation_config(player_configuration, dev_team_size, resolution_time_gen, game_configuration,
+                          ignored_gen=None, reporter_gen=None, target_fixes=None, batch_size_gen=None,
+                          interarrival_time_gen=None, catcher_generator=None, priority_generator=None,
+                          priority_queue=False, dev_team_factor=1.0):
+    """
+    Produces the simulation configuration shared by all the strategy profiles of a game.
+    :return: A SimulationConfig instance.
+    """
+    simulation_time = sys.maxint
+    team_capacity = int(dev_team_size * dev_team_factor)
+
+    logger.info("Team capacity: " + str(team_capacity) + ". After applying the factor of " + str(
+        dev_team_factor) + " to a team of " + str(dev_team_size))
+
+    return simutils.SimulationConfig(team_capacity=team_capacity,
+                                     ignored_gen=ignored_gen,
+                                     reporter_gen=reporter_gen,
+                                     target_fixes=target_fixes,
+                                     batch_size_gen=batch_size_gen,
+                                     interarrival_time_gen=interarrival_time_gen,
+                                     priority_generator=priority_generator,
+                                     reporters_config=player_configuration,
+                                     resolution_time_gen=resolution_time_gen,
+                                     max_time=simulation_time,
+                                     catcher_generator=catcher_generator,
+                                     priority_queue=priority_queue,
+                                     inflation_factor=game_configuration["INFLATION_FACTOR"],
+                                     quota_system=game_configuration["THROTTLING_ENABLED"],
+                                     gatekeeper_config=game_configuration["GATEKEEPER_CONFIG"])
+
+
+def get_profile_results(file_prefix, strategy_map, player_configuration, game_configuration, simfunction,
+                        simulation_config, simulation_history):
+    """
+    Simulates a strategy profile, according to the player aggregation rules of the game.
+    :return: List of dataframes containing simulation execution information.
+    """
+    if game_configuration['TWINS_REDUCTION']:
+        return simtwins.get_simulation_results(file_prefix, strategy_map, player_configuration,
+                                               game_configuration, simfunction,
+                                               simulation_config, simulation_history)
+
+    return [get_simulation_results(file_prefix, strategy_map, player_configuration,
+                                   game_configuration, simfunction,
+                                   simulation_config, simulation_history)]
+
+
+def get_profile_simulator(payoff_store, game_desc, player_configuration, game_configuration, simfunction,
+                          simulation_config, teams):
+    """
+    Returns a function that simulates a strategy profile and stores its payoff samples.
+
+    :param payoff_store: Payoff store instance.
+    :return: A function that receives a strategy map, the number of replications and optionally the simulation history
+    for recycling.
+    """
+
+    def profile_simulator(strategy_map, replications, simulation_history=None):
+        profile_key = payoffstore.get_profile_key(strategy_map, teams)
+        file_prefix = game_desc + "_".join([strategy_map[team].name for team in range(teams)])
+
+        configuration = dict(game_configuration)
+        configuration["REPLICATIONS_PER_PROFILE"] = replications
+
+        if simulation_history is None:
+            simulation_history = []
+
+        overall_dataframes = get_profile_results(file_prefix, strategy_map, player_configuration,
+                                                 configuration, simfunction, simulation_config,
+                                                 simulation_history)
+        team_dataframe = simcruncher.get_team_dataframe(
+            str(payoff_store.get_replications(profile_key)) + "-" + file_prefix, "ALL", teams, overall_dataframes,
+            game_configuration["NUMBER_OF_TEAMS"])
+
+        payoff_store.add_samples(profile_key, simcruncher.get_score_samples(team_dataframe,
+                                                                            game_configuration["NUMBER_OF_TEAMS"]))
+
+    return profile_simulator
+
+
+def get_payoff_oracle(payoff_store, profile_simulator, game_desc, game_configuration, teams):
+    """
+    Returns a function that provides the payoffs of a strategy profile, simulating it only if it is not available on
+    the payoff store.
+
+    :param payoff_store: Payoff store instance.
+    :param profile_simulator: Function for simulating a profile, as returned by get_profile_simulator.
+    :return: A function that receives a strategy map and returns the payoff per team.
+    """
+    simulation_history = []
+
+    def payoff_oracle(strategy_map):
+        profile_key = payoffstore.get_profile_key(strategy_map, teams)
+
+        if not payoff_store.contains(profile_key):
+            logger.info("Current scenario: " + game_desc + ". Simulating profile " + str(
+                len(payoff_store) + 1) + ": " + str(profile_key))
+
+            profile_simulator(strategy_map, game_configuration["REPLICATIONS_PER_PROFILE"], simulation_history)
+
+        return payoff_store.get_payoffs(profile_key)
+
+    return payoff_oracle
+
+
+def get_subgame_solver(payoff_oracle, game_desc, player_configuration, game_configuration, teams, suffix="_SUBGAME"):
+    """
+    Returns a function that calculates the equilibria of the game restricted to a list of strategies.
+    :param payoff_oracle: Function that provides the payoffs per strategy profile.
+    :param suffix: Added to the game description on the NFG file name.
+    :return: A function that receives a list of strategies and returns the list of equilibrium profiles.
+    """
+
+    def equilibrium_solver(subgame_catalog):
+        profile_payoffs = []
+
+        for map_info in get_strategy_map(subgame_catalog, teams):
+            payoffs = payoff_oracle(map_info['map'])
+            profile_payoffs.append((game_desc + map_info['name'], [str(int(payoff)) for payoff in payoffs]))
+
+        subgame_desc = game_desc + suffix
+        gambit_file = gtutils.get_strategic_game_format(subgame_desc, player_configuration, subgame_catalog,
+                                                        profile_payoffs, teams)
+        logger.info("NFG File for subgame created at " + gambit_file)
+
+        return gtutils.calculate_equilibrium(strategies_catalog=subgame_catalog, gambit_file=gambit_file,
+                                             all_equilibria=game_configuration['ALL_EQUILIBRIA'])
+
+    return equilibrium_solver
+
+
+def run_lazy_simulation(strategies_catalog, player_configuration, teams, game_configuration, payoff_store,
+                        profile_simulator, game_desc, warm_start_equilibria=None):
+    """
+    Obtains the equilibria of the game simulating strategy profiles on demand. See the profilesearch module.
+    :param warm_start_equilibria: Equilibria of a previous catalog. Their supports form the initial subgame.
+    :return: List of equilibrium profiles.
+    """
+    payoff_oracle = get_payoff_oracle(payoff_store, profile_simulator, game_desc, game_configuration, teams)
+    equilibrium_solver = get_subgame_solver(payoff_oracle, game_desc, player_configuration, game_configuration, teams)
+
+    warm_start_strategies = []
+    if warm_start_equilibria:
+        support_names = set([strategy_name for equilibrium_profile in warm_start_equilibria for
+                             strategy_probabilities in equilibrium_profile.values() for strategy_name, _ in
+                             gtutils.get_support(strategy_probabilities)])
+        warm_start_strategies = [strategy for strategy in strategies_catalog if strategy.name in support_names]
+        logger.info("LAZY EXPLORATION: Initial subgame taken from previous equilibria: " + str(support_names))
+
+    equilibrium_list, regret_list = profilesearch.explore_profiles(
+        strategies_catalog=strategies_catalog, teams=teams, payoff_oracle=payoff_oracle,
+        equilibrium_solver=equilibrium_solver,
+        initial_strategies=game_configuration['LAZY_INITIAL_STRATEGIES'],
+        regret_threshold=game_configuration['LAZY_REGRET_THRESHOLD'],
+        initial_catalog=warm_start_strategies)
+
+    total_profiles = len(strategies_catalog) ** teams
+    logger.info("LAZY EXPLORATION: " + str(len(payoff_store)) + " of " + str(total_profiles) +
+                " strategy profiles were simulated. Regret per equilibrium: " + str(regret_list))
+
+    return equilibrium_list
+
+
+def run_hpt_simulation(strategies_catalog, player_configuration, game_configuration, simfunction, simulation_config,
+                       game_desc):
+    """
+    Obtains the symmetric equilibria of a game with many players, using a heuristic payoff table. Reporters are assigned
+    to players in round-robin fashion. See the heuristicpayoff module.
+
+    :return: List of equilibrium profiles.
+    """
+    players = game_configuration['HPT_PLAYERS']
+    heuristicpayoff.check_game_size(len(player_configuration), players, len(strategies_catalog),
+                                    game_configuration['HPT_MAX_TABLE_SIZE'])
+    logger.info("HEURISTIC PAYOFF TABLE: " + str(len(player_configuration)) + " reporters assigned to " + str(
+        players) + " players.")
+
+    for index, config in enumerate(player_configuration):
+        config['team'] = index % players
+
+    count_profiles = heuristicpayoff.get_count_profiles(players, len(strategies_catalog))
+    payoff_table = payoffstore.PayoffStore(len(strategies_catalog))
+
+    def row_simulator(count_profile):
+        file_prefix = game_desc + "_HPT_" + "_".join([str(count) for count in count_profile])
+        strategy_map = heuristicpayoff.get_strategy_map(count_profile, strategies_catalog)
+
+        overall_dataframe = get_simulation_results(file_prefix, strategy_map, player_configuration, game_configuration,
+                                                   simfunction, simulation_config, [])
+        team_dataframe = simcruncher.get_team_dataframe(file_prefix, "ALL", players, [overall_dataframe], players)
+
+        return heuristicpayoff.get_strategy_samples(team_dataframe, count_profile)
+
+    heuristicpayoff.simulate_table(count_profiles, payoff_table, row_simulator)
+    counts, payoffs = heuristicpayoff.get_payoff_matrix(count_profiles, payoff_table)
+
+    table_dataframe = pd.DataFrame(counts, columns=["COUNT_" + strategy.name for strategy in strategies_catalog])
+    for index, strategy in enumerate(strategies_catalog):
+        table_dataframe["PAYOFF_" + strategy.name] = payoffs[:, index]
+
+    file_name = "csv/" + game_desc + "_heuristic_payoff_table.csv"
+    table_dataframe.to_csv(file_name, index=False)
+    logger.info("Heuristic payoff table written to " + file_name)
+
+    equilibrium_list = [heuristicpayoff.get_equilibrium_profile(mixed_strategy, strategies_catalog, players) for
+                        mixed_strategy in heuristicpayoff.get_equilibria(counts, payoffs)]
+
+    logger.info("Equilibria found using replicator dynamics: " + str(len(equilibrium_list)) + str(
+        [profile[0] for profile in equilibrium_list]))
+    return equilibrium_list
+
+
+def run_surrogate_simulation(strategy_maps, strategies_catalog, player_configuration, teams, game_configuration,
+                             payoff_store, profile_simulator, game_desc):
+    """
+    Obtains the equilibria of the game simulating only the profiles critical according to a surrogate payoff model.
+    See the surrogate module. The number of profiles simulated, and optionally the agreement with the exhaustive
+    approach, are written to a CSV file.
+
+    :return: List of equilibrium profiles.
+    """
+    payoff_oracle = get_payoff_oracle(payoff_store, profile_simulator, game_desc, game_configuration, teams)
+    previously_stored = len(payoff_store)
+
+    def equilibrium_solver(surrogate_oracle):
+        return get_subgame_solver(surrogate_oracle, game_desc, player_configuration, game_configuration, teams,
+                                  suffix="_SURROGATE")(strategies_catalog)
+
+    equilibrium_list = surrogate.prune_profiles(strategy_maps=[map_info['map'] for map_info in strategy_maps],
+                                                strategies_catalog=strategies_catalog, teams=teams,
+                                                payoff_store=payoff_store, payoff_oracle=payoff_oracle,
+                                                equilibrium_solver=equilibrium_solver,
+                                                initial_profiles=game_configuration['SURROGATE_INITIAL_PROFILES'],
+                                                confidence=game_configuration['SURROGATE_CONFIDENCE'],
+                                                regret_threshold=game_configuration['LAZY_REGRET_THRESHOLD'])
+
+    surrogate_report = {"total_profiles": len(strategy_maps),
+                        "stored_profiles": previously_stored,
+                        "simulated_profiles": len(payoff_store) - previously_stored,
+                        "surrogate_equilibria": len(equilibrium_list)}
+
+    logger.info("SURROGATE PRUNING: " + str(len(payoff_store)) + " of " + str(
+        len(strategy_maps)) + " strategy profiles were simulated.")
+
+    if game_configuration['SURROGATE_VALIDATION']:
+        logger.info("SURROGATE PRUNING: Simulating the remaining profiles for validation...")
+        exhaustive_list = get_subgame_solver(payoff_oracle, game_desc, player_configuration, game_configuration,
+                                             teams, suffix="")(strategies_catalog)
+        recall, precision = surrogate.get_equilibria_agreement(equilibrium_list, exhaustive_list)
+
+        surrogate_report["exhaustive_equilibria"] = len(exhaustive_list)
+        surrogate_report["exhaustive_found"] = recall
+        surrogate_report["surrogate_confirmed"] = precision
+        logger.info("SURROGATE PRUNING: Agreement with exhaustive simulation " + str(surrogate_report))
+
+    file_name = "csv/" + game_desc + "_surrogate_report.csv"
+    pd.DataFrame([surrogate_report]).to_csv(file_name, index=False)
+    logger.info("Surrogate pruning report written to " + file_name)
+
+    return equilibrium_list
+
+
+def get_warm_start_equilibrium(warm_start_equilibria, strategies_catalog, teams, payoff_store, game_configuration):
+    """
+    Checks if an equilibrium of a previous catalog is still an equilibrium after the catalog changed. All the profiles
+    of the current game should be available on the payoff store.
+
+    :param warm_start_equilibria: Equilibria of a previous catalog.
+    :return: A list with the first equilibrium still valid, or None if there is none.
+    """
+
+    def payoff_oracle(strategy_map):
+        return payoff_store.get_payoffs(payoffstore.get_profile_key(strategy_map, teams))
+
+    for equilibrium_profile in warm_start_equilibria:
+        if len(equilibrium_profile) != teams:
+            continue
+
+        profilesearch.complete_profile(equilibrium_profile, strategies_catalog)
+        regret, _ = gtutils.get_regret(equilibrium_profile, strategies_catalog, teams, payoff_oracle)
+
+        if regret <= game_configuration['LAZY_REGRET_THRESHOLD']:
+            logger.info("WARM START: Previous equilibrium " + str(equilibrium_profile) + " has regret " + str(
+                regret) + ". Equilibrium calculation is not necessary.")
+            return [equilibrium_profile]
+
+    return None
+
+
+def get_store_files(game_desc, teams):
+    """
+    Files for persisting payoff samples and equilibria of a game. Profiles have one strategy per team, so games with a
+    different number of teams are stored separately.
+    :return: Payoff samples file and equilibria file.
+    """
+    store_prefix = "csv/" + game_desc + "_TEAMS" + str(teams)
+    return store_prefix + "_payoff_samples.csv", store_prefix + "_warm_start_equilibria.csv"
+
+
+def verify_equilibria(equilibrium_list, strategies_catalog, teams, game_configuration, payoff_store,
+                      profile_simulator, game_desc):
+    """
+    Verifies each equilibrium against the sampling error of the payoffs, and writes the results to a CSV file.
+    :return: List containing the verification results per equilibrium.
+    """
+    verification_results = []
+
+    for index, equilibrium_profile in enumerate(equilibrium_list):
+        logger.info("Verifying equilibrium " + str(index + 1) + " of " + str(len(equilibrium_list)))
+
+        verification_result = eqverification.verify_equilibrium(
+            equilibrium_profile=equilibrium_profile, strategies_catalog=strategies_catalog, teams=teams,
+            payoff_store=payoff_store, profile_simulator=profile_simulator,
+            confidence=game_configuration['VERIFICATION_CONFIDENCE'],
+            additional_replications=game_configuration['VERIFICATION_REPLICATIONS'],
+            max_rounds=game_configuration['VERIFICATION_ROUNDS'])
+
+        verification_result['equilibrium'] = str(equilibrium_profile)
+        verification_results.append(verification_result)
+
+    file_name = "csv/" + game_desc + "_equilibrium_verification.csv"
+    pd.DataFrame(verification_results).to_csv(file_name, index=False)
+    logger.info("Equilibrium verification results written to " + file_name)
+
+    return verification_results
+
+
 def run_simulation(strategy_maps, strategies_catalog, player_configuration, dev_team_size, resolution_time_gen, teams,
                    game_configuration, ignored_gen=None, reporter_gen=None, target_fixes=None, batch_size_gen=None,
                    interarrival_time_gen=None, catcher_generator=None, priority_generator=None,
-                   simfunction=simutils.launch_simulation_parallel, priority_queue=False, dev_team_factor=1.0):
+                   simfunction=simutils.launch_simulation_parallel, priority_queue=False, dev_team_factor=1.0,
+                   solver_scheduler=None, equilibrium_callback=None):
     """
 
     :param strategy_maps: Strategy profiles of the game.
@@ -454,22 +813,203 @@ def run_simulation(strategy_maps, strategies_catalog, player_configuration, dev_
     :param dev_team_bandwith: Number of dev time hours for bug fixing.
     :param teams: Number of teams available.
     :param game_configuration: Game configuration parameters.
-    :return: List of equilibrium profiles.
+    :param solver_scheduler: If provided, the equilibrium calculation is submitted to this SolverScheduler instance and
+    the function returns after simulation.
+    :param equilibrium_callback: Function that receives the list of equilibrium profiles. Required when using a solver
+    scheduler.
+    :return: List of equilibrium profiles, or None if the calculation was scheduled.
     """
 
-    simulation_time = sys.maxint
-
-    profile_payoffs = []
-    logger.info("Simulating " + str(len(strategy_maps)) + " strategy profiles...")
-
-    simulation_history = []
-
     if not game_configuration['TWINS_REDUCTION'] and game_configuration["NUMBER_OF_TEAMS"] == len(player_configuration):
         logger.info("PLAYER AGGREGATION: Agents are not agregated. No player reduction is applied.")
         assign_teams(player_configuration)
 
     game_desc = get_game_description(game_configuration, priority_queue=priority_queue, dev_team_factor=dev_team_factor)
 
+    simulation_config = get_simulation_config(player_configuration=player_configuration, dev_team_size=dev_team_size,
+                                              resolution_time_gen=resolution_time_gen,
+                                              game_configuration=game_configuration, ignored_gen=ignored_gen,
+                                              reporter_gen=reporter_gen, target_fixes=target_fixes,
+                                              batch_size_gen=batch_size_gen,
+                                              interarrival_time_gen=interarrival_time_gen,
+                                              catcher_generator=catcher_generator,
+                                              priority_generator=priority_generator, priority_queue=priority_queue,
+                                              dev_team_factor=dev_team_factor)
+
+    if not gtconfig.parallel:
+        logger.info("PARALLEL EXECUTION: Has been disabled.")
+        simfunction = simutils.launch_simulation
+
+    payoff_store = payoffstore.PayoffStore(teams)
+    profile_simulator = get_profile_simulator(payoff_store, game_desc, player_configuration, game_configuration,
+                                              simfunction, simulation_config, teams)
+
+    samples_file, equilibria_file = get_store_files(game_desc, teams)
+    warm_start_equilibria = []
+    reports_stamp = None
+    if game_configuration['PERSIST_PAYOFFS']:
+        # Payoffs stored before the reports of the game changed are not reused.
+        reports_stamp = dataset.get_reports_stamp(game_configuration['PROJECT_FILTER'])
+        payoff_store.load(samples_file, stamp=reports_stamp)
+        warm_start_equilibria = payoffstore.load_equilibria(strategies_catalog, equilibria_file, stamp=reports_stamp)
+
+        if equilibrium_callback is not None:
+            notify_equilibria = equilibrium_callback
+
+            def store_and_notify(equilibrium_list):
+                if equilibrium_list is not None:
+                    payoffstore.save_equilibria(equilibrium_list, strategies_catalog, equilibria_file,
+                                                stamp=reports_stamp)
+                notify_equilibria(equilibrium_list)
+
+            equilibrium_callback = store_and_notify
+
+    if game_configuration['HEURISTIC_PAYOFF_TABLE']:
+        equilibrium_list = run_hpt_simulation(strategies_catalog=strategies_catalog,
+                                              player_configuration=player_configuration,
+                                              game_configuration=game_configuration, simfunction=simfunction,
+                                              simulation_config=simulation_config, game_desc=game_desc)
+
+        if solver_scheduler is not None:
+            equilibrium_callback(equilibrium_list)
+            return None
+
+        return equilibrium_list
+
+    if game_configuration['LAZY_EXPLORATION']:
+        logger.info("LAZY EXPLORATION: Strategy profiles will be simulated on demand.")
+        equilibrium_list = run_lazy_simulation(strategies_catalog=strategies_catalog,
+                                               player_configuration=player_configuration, teams=teams,
+                                               game_configuration=game_configuration, payoff_store=payoff_store,
+                                               profile_simulator=profile_simulator, game_desc=game_desc,
+                                               warm_start_equilibria=warm_start_equilibria)
+    elif game_configuration['SURROGATE_PRUNING']:
+        logger.info("SURROGATE PRUNING: Strategy profiles will be simulated according to a surrogate model.")
+        equilibrium_list = run_surrogate_simulation(strategy_maps=strategy_maps, strategies_catalog=strategies_catalog,
+                                                    player_configuration=player_configuration, teams=teams,
+                                                    game_configuration=game_configuration, payoff_store=payoff_store,
+                                                    profile_simulator=profile_simulator, game_desc=game_desc)
+    else:
+        gambit_file = run_exhaustive_simulation(strategy_maps=strategy_maps, strategies_catalog=strategies_catalog,
+                                                player_configuration=player_configuration, teams=teams,
+                                                game_configuration=game_configuration, simfunction=simfunction,
+                                                simulation_config=simulation_config, payoff_store=payoff_store,
+                                                game_desc=game_desc)
+
+        equilibrium_list = None
+        if not game_configuration['ALL_EQUILIBRIA']:
+            equilibrium_list = get_warm_start_equilibrium(warm_start_equilibria, strategies_catalog, teams,
+                                                          payoff_store, game_configuration)
+
+        if equilibrium_list is None and solver_scheduler is not None and not game_configuration['VERIFY_EQUILIBRIA']:
+            if game_configuration['PERSIST_PAYOFFS']:
+                payoff_store.save(samples_file, stamp=reports_stamp)
+
+            logger.info("Equilibrium calculation for " + game_desc + " has been scheduled.")
+            solver_scheduler.submit(strategies_catalog=strategies_catalog, gambit_file=gambit_file,
+                                    callback=equilibrium_callback,
+                                    all_equilibria=game_configuration['ALL_EQUILIBRIA'])
+            return None
+
+        if equilibrium_list is None:
+            logger.info("Executing Gambit for equilibrium calculation...")
+            equilibrium_list = gtutils.calculate_equilibrium(strategies_catalog=strategies_catalog,
+                                                             gambit_file=gambit_file,
+                                                             all_equilibria=game_configuration['ALL_EQUILIBRIA'])
+            logger.info("Equilibria found: " + str(len(equilibrium_list)) + str(equilibrium_list))
+
+    if game_configuration['VERIFY_EQUILIBRIA']:
+        verify_equilibria(equilibrium_list=equilibrium_list, strategies_catalog=strategies_catalog, teams=teams,
+                          game_configuration=game_configuration, payoff_store=payoff_store,
+                          profile_simulator=profile_simulator, game_desc=game_desc)
+
+    if game_configuration['PERSIST_PAYOFFS']:
+        payoff_store.save(samples_file, stamp=reports_stamp)
+
+    if solver_scheduler is not None:
+        equilibrium_callback(equilibrium_list)
+        return None
+
+    if game_configuration['PERSIST_PAYOFFS']:
+        payoffstore.save_equilibria(equilibrium_list, strategies_catalog, equilibria_file, stamp=reports_stamp)
+
+    return equilibrium_list
+
+
+def get_replication_runner(game_desc, player_configuration, game_configuration, simulation_config, teams):
+    """
+    Returns a function that simulates several strategy profiles at once, each one on a worker process.
+    :return: A function that receives a list of (strategy map, replications) tuples and returns the list of payoff
+    samples per team for each.
+    """
+    job_counter = [0]
+
+    def simulate_profile(job):
+        strategy_map, replications, block_id = job
+        file_prefix = game_desc + "_".join([strategy_map[team].name for team in range(teams)])
+
+        configuration = dict(game_configuration)
+        configuration["REPLICATIONS_PER_PROFILE"] = replications
+
+        # Each job needs a different seed, since all of them start at the same time.
+        simfunction = functools.partial(simutils.launch_simulation, show_progress=False, block_id=block_id)
+
+        overall_dataframes = get_profile_results(file_prefix, strategy_map, player_configuration, configuration,
+                                                 simfunction, simulation_config, [])
+        team_dataframe = simcruncher.get_team_dataframe("OCBA" + str(block_id) + "-" + file_prefix, "ALL", teams,
+                                                        overall_dataframes, game_configuration["NUMBER_OF_TEAMS"])
+
+        return simcruncher.get_score_samples(team_dataframe, game_configuration["NUMBER_OF_TEAMS"])
+
+    def replication_runner(profiles):
+        jobs = []
+        for strategy_map, replications in profiles:
+            jobs.append((strategy_map, replications, job_counter[0] * 10000))
+            job_counter[0] += 1
+
+        if gtconfig.parallel:
+            pool = Pool(processes=gtconfig.parallel_blocks)
+            try:
+                return pool.map(simulate_profile, jobs)
+            finally:
+                pool.close()
+                pool.join()
+                pool.clear()
+
+        return map(simulate_profile, jobs)
+
+    return replication_runner
+
+
+def run_exhaustive_simulation(strategy_maps, strategies_catalog, player_configuration, teams, game_configuration,
+                              simfunction, simulation_config, payoff_store, game_desc):
+    """
+    Simulates every strategy profile of the game, and stores the resulting payoff matrix in a Gambit NFG file.
+    :return: Name of the NFG file.
+    """
+    profile_payoffs = []
+    simulation_history = []
+
+    minimum_replications = game_configuration["REPLICATIONS_PER_PROFILE"]
+
+    if game_configuration['OCBA_ALLOCATION']:
+        total_budget = game_configuration['OCBA_TOTAL_BUDGET']
+        if total_budget is None:
+            total_budget = game_configuration["REPLICATIONS_PER_PROFILE"] * len(strategy_maps)
+
+        logger.info("OCBA ALLOCATION: Distributing " + str(total_budget) + " replications over " + str(
+            len(strategy_maps)) + " strategy profiles...")
+        replication_runner = get_replication_runner(game_desc, player_configuration, game_configuration,
+                                                    simulation_config, teams)
+        ocba.run_allocation(strategy_maps=[map_info['map'] for map_info in strategy_maps], teams=teams,
+                            payoff_store=payoff_store, replication_runner=replication_runner,
+                            total_budget=total_budget,
+                            initial_replications=game_configuration['OCBA_INITIAL_REPLICATIONS'],
+                            rounds=game_configuration['OCBA_ROUNDS'])
+        minimum_replications = game_configuration['OCBA_INITIAL_REPLICATIONS']
+
+    logger.info("Simulating " + str(len(strategy_maps)) + " strategy profiles...")
+
     for index, map_info in enumerate(strategy_maps):
         logger.info("Current scenario: " + game_desc + ". Simulating profile " + str((index + 1)) + " of " + str(
             len(strategy_maps)))
@@ -477,45 +1017,24 @@ def run_simulation(strategy_maps, strategies_catalog, player_configuration, dev_
         file_prefix, strategy_map = map_info['name'], map_info['map']
 
         file_prefix = game_desc + file_prefix
+        profile_key = payoffstore.get_profile_key(strategy_map, teams)
+
+        if payoff_store.get_replications(profile_key) >= minimum_replications:
+            logger.info("Profile " + str(profile_key) + " was simulated before. Its payoffs will be recycled.")
+            payoffs = [str(int(payoff)) for payoff in payoff_store.get_payoffs(profile_key)]
+            profile_payoffs.append((file_prefix, payoffs))
+            continue
+
+        overall_dataframes = get_profile_results(file_prefix, strategy_map, player_configuration, game_configuration,
+                                                 simfunction, simulation_config, simulation_history)
 
-        overall_dataframes = []
-
-        team_capacity = int(dev_team_size * dev_team_factor)
-
-        logger.info("Team capacity: " + str(team_capacity) + ". After applying the factor of " + str(
-            dev_team_factor) + " to a team of " + str(dev_team_size))
-
-        simulation_config = simutils.SimulationConfig(team_capacity=team_capacity,
-                                                      ignored_gen=ignored_gen,
-                                                      reporter_gen=reporter_gen,
-                                                      target_fixes=target_fixes,
-                                                      batch_size_gen=batch_size_gen,
-                                                      interarrival_time_gen=interarrival_time_gen,
-                                                      priority_generator=priority_generator,
-                                                      reporters_config=player_configuration,
-                                                      resolution_time_gen=resolution_time_gen,
-                                                      max_time=simulation_time,
-                                                      catcher_generator=catcher_generator,
-                                                      priority_queue=priority_queue,
-                                                      inflation_factor=game_configuration["INFLATION_FACTOR"],
-                                                      quota_system=game_configuration["THROTTLING_ENABLED"],
-                                                      gatekeeper_config=game_configuration["GATEKEEPER_CONFIG"])
-
-        if not gtconfig.parallel:
-            logger.info("PARALLEL EXECUTION: Has been disabled.")
-            simfunction = simutils.launch_simulation
-
-        if game_configuration['TWINS_REDUCTION']:
-            overall_dataframes += simtwins.get_simulation_results(file_prefix, strategy_map, player_configuration,
-                                                                  game_configuration, simfunction,
-                                                                  simulation_config, simulation_history)
-        else:
-            overall_dataframes.append(get_simulation_results(file_prefix, strategy_map, player_configuration,
-                                                             game_configuration, simfunction,
-                                                             simulation_config, simulation_history))
-
-        payoffs = simcruncher.get_team_metrics(str(index) + "-" + file_prefix, "ALL", teams, overall_dataframes,
-                                               game_configuration["NUMBER_OF_TEAMS"])
+        team_dataframe = simcruncher.get_team_dataframe(str(index) + "-" + file_prefix, "ALL", teams,
+                                                        overall_dataframes, game_configuration["NUMBER_OF_TEAMS"])
+        payoff_store.add_samples(profile_key, simcruncher.get_score_samples(team_dataframe,
+                                                                            game_configuration["NUMBER_OF_TEAMS"]))
+
+        payoffs = simcruncher.get_team_averages(str(index) + "-" + file_prefix, team_dataframe,
+                                                game_configuration["NUMBER_OF_TEAMS"])
         profile_payoffs.append((file_prefix, payoffs))
 
     logger.info("Generating Gambit NFG file ...")
@@ -523,12 +1042,7 @@ def run_simulation(strategy_maps, strategies_catalog, player_configuration, dev_
                                                     profile_payoffs, teams)
     logger.info("NFG File created at " + gambit_file)
 
-    logger.info("Executing Gambit for equilibrium calculation...")
-    equilibrium_list = gtutils.calculate_equilibrium(strategies_catalog=strategies_catalog, gambit_file=gambit_file,
-                                                     all_equilibria=game_configuration['ALL_EQUILIBRIA'])
-
-    logger.info("Equilibria found: " + str(len(equilibrium_list)) + str(equilibrium_list))
-    return equilibrium_list
+    return gambit_file
 
 
 def get_game_description(game_configuration, priority_queue=False, dev_team_factor=1.0):
@@ -556,11 +1070,7 @@ def get_game_description(game_configuration, priority_queue=False, dev_team_fact
 
 
 def main():
-    logger.info("Loading information from " + str(simdata.ALL_ISSUES_CSV))
-    all_issues = pd.read_csv(simdata.ALL_ISSUES_CSV)
-
-    logger.info("Adding calculated fields to " + str(len(all_issues.index)) + " issues ...")
-    enhanced_dataframe = simdata.enhace_report_dataframe(all_issues)
+    enhanced_dataframe = dataset.load_enhanced_dataframe()
 
     all_valid_projects = simdriver.get_valid_projects(enhanced_dataframe=enhanced_dataframe,
                                                       exclude_self_fix=gtconfig.exclude_self_fix)
@@ -572,6 +1082,16 @@ def main():
     simulation_configuration['REPLICATIONS_PER_PROFILE'] = gtconfig.replications_per_profile
     simulation_configuration['EMPIRICAL_STRATEGIES'] = gtconfig.use_empirical_strategies
     simulation_configuration['N_CLUSTERS'] = 5
+    simulation_configuration['LAZY_EXPLORATION'] = gtconfig.lazy_exploration
+    simulation_configuration['VERIFY_EQUILIBRIA'] = gtconfig.verify_equilibria
+    simulation_configuration['HEURISTIC_PAYOFF_TABLE'] = gtconfig.heuristic_payoff_table
+    simulation_configuration['HPT_PLAYERS'] = gtconfig.hpt_players
+    simulation_configuration['HPT_MAX_TABLE_SIZE'] = gtconfig.hpt_max_table_size
+    simulation_configuration['PERSIST_PAYOFFS'] = gtconfig.persist_payoffs
+    simulation_configuration['SURROGATE_PRUNING'] = gtconfig.surrogate_pruning
+    simulation_configuration['SURROGATE_VALIDATION'] = gtconfig.surrogate_validation
+    simulation_configuration['OCBA_ALLOCATION'] = gtconfig.ocba_allocation
+    simulation_configuration['OCBA_TOTAL_BUDGET'] = gtconfig.ocba_budget
 
     valid_projects = all_valid_projects
 
@@ -0,0 +1,236 @@
+"""
+This module keeps the payoff samples gathered per strategy profile, so each profile is simulated only once. Profiles
+are identified by the parameters of their strategies, not by their names, so the samples can be stored on disk and
+reused when the strategy catalog changes between experiments.
+
+Stored files can carry a stamp of the bug reports the payoffs were obtained from -see dataset.get_reports_stamp-.
+Files with a different stamp are ignored when loading.
+"""
+
+import logging
+import os
+from collections import defaultdict
+
+import numpy as np
+import pandas as pd
+import scipy.stats as st
+
+import gtconfig
+
+logger = gtconfig.get_logger("payoff_store", "payoff_store.txt", level=logging.INFO)
+
+STAMP_COLUMN = "reports_stamp"
+
+
+def get_strategy_identity(strategy):
+    """
+    Identifies a strategy by its behaviour. Empirical strategies with the same inflation and deflation probabilities
+    are the same strategy, regardless of the name assigned after clustering.
+
+    :param strategy: Strategy instance.
+    :return: A string identifier.
+    """
+    if hasattr(strategy, 'inflation_prob') and hasattr(strategy, 'deflation_prob'):
+        return "INF%.6f_DEF%.6f" % (strategy.inflation_prob, strategy.deflation_prob)
+
+    return strategy.name
+
+
+def get_profile_key(strategy_map, teams):
+    """
+    Returns the identifier of a strategy profile in the payoff store.
+    :param strategy_map: Map containing the strategy per team.
+    :param teams: Number of teams in the game.
+    :return: A tuple with the strategy identities, ordered by team.
+    """
+    return tuple(get_strategy_identity(strategy_map[team]) for team in range(teams))
+
+
+def is_stamp_current(stored_dataframe, stamp, file_name):
+    """
+    Checks if a stored file was written with the stamp of the current reports.
+    :param stored_dataframe: Contents of the file.
+    :param stamp: Stamp of the current reports. If None, any file is accepted.
+    :param file_name: CSV file, for logging purposes.
+    :return: True if the contents can be used.
+    """
+    if stamp is None:
+        return True
+
+    if STAMP_COLUMN in stored_dataframe.columns and (stored_dataframe[STAMP_COLUMN] == stamp).all():
+        return True
+
+    logger.info("Contents of " + file_name + " were obtained from other bug reports. They are ignored.")
+    return False
+
+
+def save_equilibria(equilibrium_list, strategies_catalog, file_name, stamp=None):
+    """
+    Stores equilibrium profiles using strategy identities, so they can warm-start the analysis of a different catalog.
+    :param equilibrium_list: List of equilibrium profiles.
+    :param strategies_catalog: Catalog of strategies the profiles refer to.
+    :param file_name: CSV file.
+    :param stamp: Stamp of the reports the equilibria were obtained from.
+    :return: None.
+    """
+    identities = {strategy.name: get_strategy_identity(strategy) for strategy in strategies_catalog}
+
+    rows = []
+    for index, equilibrium_profile in enumerate(equilibrium_list):
+        for team, strategy_probabilities in equilibrium_profile.iteritems():
+            for strategy_name, probability in strategy_probabilities.iteritems():
+                rows.append({"equilibrium": index,
+                             "team": team,
+                             "strategy": identities[strategy_name],
+                             "probability": str(probability)})
+
+    equilibria_dataframe = pd.DataFrame(rows, columns=["equilibrium", "team", "strategy", "probability"])
+    if stamp is not None:
+        equilibria_dataframe[STAMP_COLUMN] = stamp
+
+    equilibria_dataframe.to_csv(file_name, index=False)
+    logger.info(str(len(equilibrium_list)) + " equilibria stored at " + file_name)
+
+
+def load_equilibria(strategies_catalog, file_name, stamp=None):
+    """
+    Reads equilibrium profiles stored with save_equilibria, expressed over the strategy names of the current catalog.
+    Strategies not present on the catalog are ignored.
+
+    :param strategies_catalog: Current catalog of strategies.
+    :param file_name: CSV file.
+    :param stamp: Stamp of the current reports. If provided, equilibria stored with a different one are ignored.
+    :return: List of equilibrium profiles. Empty if the file does not exist.
+    """
+    if not os.path.isfile(file_name):
+        return []
+
+    names = {get_strategy_identity(strategy): strategy.name for strategy in strategies_catalog}
+    equilibria_dataframe = pd.read_csv(file_name, dtype={"strategy": str, "probability": str, STAMP_COLUMN: str})
+    if not is_stamp_current(equilibria_dataframe, stamp, file_name):
+        return []
+
+    equilibrium_list = []
+    for _, equilibrium_rows in equilibria_dataframe.groupby("equilibrium"):
+        equilibrium_profile = defaultdict(dict)
+
+        for _, row in equilibrium_rows.iterrows():
+            if row["strategy"] in names:
+                equilibrium_profile[int(row["team"])][names[row["strategy"]]] = row["probability"]
+
+        equilibrium_list.append(dict(equilibrium_profile))
+
+    logger.info(str(len(equilibrium_list)) + " equilibria loaded from " + file_name)
+    return equilibrium_list
+
+
+class PayoffStore:
+    """
+    Contains the payoff samples per team for each of the strategy profiles simulated so far.
+    """
+
+    def __init__(self, teams):
+        self.teams = teams
+        self.samples = {}
+
+    def contains(self, profile_key):
+        return profile_key in self.samples
+
+    def add_samples(self, profile_key, samples_per_team):
+        """
+        Stores new payoff samples for a profile. If the profile was already simulated, samples are appended.
+        :param profile_key: Profile identifier.
+        :param samples_per_team: List containing the payoff samples per team.
+        :return: None.
+        """
+        if profile_key not in self.samples:
+            self.samples[profile_key] = [[] for _ in range(self.teams)]
+
+        for team, team_samples in enumerate(samples_per_team):
+            self.samples[profile_key][team].extend(team_samples)
+
+    def get_payoffs(self, profile_key):
+        """
+        Returns the sample mean of the payoff per team.
+        :param profile_key: Profile identifier.
+        :return: List of payoffs, per team.
+        """
+        return [np.mean(team_samples) for team_samples in self.samples[profile_key]]
+
+    def get_standard_errors(self, profile_key):
+        """
+        Returns the standard error of the payoff mean, per team.
+        :param profile_key: Profile identifier.
+        :return: List of standard errors, per team.
+        """
+        return [st.sem(team_samples) if len(team_samples) > 1 else float("inf") for team_samples in
+                self.samples[profile_key]]
+
+    def get_replications(self, profile_key):
+        """
+        Number of simulation replications available for a profile.
+        :param profile_key: Profile identifier.
+        :return: Number of replications.
+        """
+        if profile_key not in self.samples:
+            return 0
+
+        return len(self.samples[profile_key][0])
+
+    def __len__(self):
+        return len(self.samples)
+
+    def save(self, file_name, stamp=None):
+        """
+        Writes all the samples to a CSV file, one row per sample.
+        :param file_name: CSV file.
+        :param stamp: Stamp of the reports the samples were obtained from.
+        :return: None.
+        """
+        rows = []
+        for profile_key, samples_per_team in self.samples.iteritems():
+            for team, team_samples in enumerate(samples_per_team):
+                for sample in team_samples:
+                    row = {"team": team, "sample": sample}
+                    row.update({"team_" + str(index) + "_strategy": identity for index, identity in
+                                enumerate(profile_key)})
+                    rows.append(row)
+
+        samples_dataframe = pd.DataFrame(rows)
+        if stamp is not None:
+            samples_dataframe[STAMP_COLUMN] = stamp
+
+        samples_dataframe.to_csv(file_name, index=False)
+        logger.info("Samples of " + str(len(self)) + " profiles stored at " + file_name)
+
+    def load(self, file_name, stamp=None):
+        """
+        Adds the samples stored on a CSV file by the save method.
+        :param file_name: CSV file.
+        :param stamp: Stamp of the current reports. If provided, samples stored with a different one are ignored.
+        :return: None.
+        """
+        if not os.path.isfile(file_name):
+            logger.info("No previous samples found at " + file_name)
+            return
+
+        key_columns = ["team_" + str(index) + "_strategy" for index in range(self.teams)]
+        column_types = {column: str for column in key_columns + [STAMP_COLUMN]}
+        samples_dataframe = pd.read_csv(file_name, dtype=column_types)
+        if not is_stamp_current(samples_dataframe, stamp, file_name):
+            return
+
+        stored_columns = [column for column in samples_dataframe.columns if column.endswith("_strategy")]
+        if sorted(stored_columns) != sorted(key_columns):
+            logger.error("Samples at " + file_name + " are for " + str(len(stored_columns)) + " teams, not " + str(
+                self.teams) + ". They are ignored.")
+            return
+
+        for profile_key, profile_samples in samples_dataframe.groupby(key_columns):
+            if not isinstance(profile_key, tuple):
+                profile_key = (profile_key,)
+
+            self.add_samples(profile_key, [profile_samples[profile_samples["team"] == team]["sample"].tolist()
+                                                  for team in range(self.teams)])
+
+        logger.info("Samples of " + str(len(self)) + " profiles loaded from " + file_name)
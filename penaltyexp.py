@@ -9,6 +9,7 @@ import pandas as pd
 import time
 from fractions import Fraction
 
+import dataset
 import simdata
 import simdriver
 import simmodel
@@ -16,6 +17,7 @@ import simmodel
 import payoffgetter
 import gtutils
 import simutils
+import solverscheduler
 import gtconfig
 
 if gtconfig.is_windows:
@@ -57,14 +59,39 @@ def get_profile_for_plotting(equilibrium_list):
 
 
 def simulate_and_obtain_equilibria(input_params, game_configuration, prefix="", file_name=None, priority_queue=False,
-                                   dev_team_factor=1.0):
+                                   dev_team_factor=1.0, solver_scheduler=None, callback=None):
     """
     Given a game configuration, it computes the heuristic payoff matrix and calculates the symmetric Nash Equilibrium
     :param input_params: Simulation parameters.
     :param game_configuration: Game configuration.
     :param prefix: Prefix for the generated file.
-    :return: A list of equilibria, including the symmetric ones.
+    :param solver_scheduler: If provided, equilibrium calculation is delegated to this SolverScheduler instance.
+    :param callback: Function that receives the list of equilibria and the symmetric ones, once they are available.
+    :return: A list of equilibria, including the symmetric ones. None if the calculation was scheduled.
     """
+
+    if file_name is None:
+        file_name = "csv/" + prefix + "_equilibrium_results.csv"
+
+    def process_equilibria(equilibrium_list):
+        if equilibrium_list is None:
+            logger.error("Equilibrium calculation failed for " + prefix)
+            equilibrium_list = []
+
+        symmetric_equilibrium = [profile for profile in equilibrium_list if
+                                 gtutils.is_symmetric_equilibrium(profile)]
+        logger.info("Symmetric Equilibria: " + str(len(symmetric_equilibrium)))
+
+        pd.DataFrame(
+            [gtutils.get_equilibrium_as_dict(identifier=prefix, profile=profile) for profile in
+             equilibrium_list]).to_csv(file_name)
+        logger.info("Equilibrium results stored in " + str(file_name))
+
+        if callback is not None:
+            callback(equilibrium_list, symmetric_equilibrium)
+
+        return equilibrium_list, symmetric_equilibrium
+
     equilibrium_list = payoffgetter.run_simulation(strategy_maps=input_params.strategy_maps,
                                                    strategies_catalog=input_params.strategies_catalog,
                                                    player_configuration=input_params.player_configuration,
@@ -80,28 +107,35 @@ def simulate_and_obtain_equilibria(input_params, game_configuration, prefix="",
                                                    catcher_generator=input_params.catcher_generator,
                                                    priority_queue=priority_queue,
                                                    dev_team_factor=dev_team_factor,
-                                                   game_configuration=game_configuration)
+                                                   game_configuration=game_configuration,
+                                                   solver_scheduler=solver_scheduler,
+                                                   equilibrium_callback=process_equilibria)
 
-    symmetric_equilibrium = [profile for profile in equilibrium_list if gtutils.is_symmetric_equilibrium(profile)]
-    logger.info("Symmetric Equilibria: " + str(len(symmetric_equilibrium)))
+    if solver_scheduler is not None:
+        return None
+
+    return process_equilibria(equilibrium_list)
 
-    if file_name is None:
-        file_name = "csv/" + prefix + "_equilibrium_results.csv"
-    pd.DataFrame(
-        [gtutils.get_equilibrium_as_dict(identifier=prefix, profile=profile) for profile in equilibrium_list]).to_csv(
-        file_name)
-    logger.info("Equilibrium results stored in " + str(file_name))
 
-    return equilibrium_list, symmetric_equilibrium
+def get_penalty_prefix(inflation_factor, priority_queue, dev_team_factor):
+    """
+    Descriptive name for a penalty experiment scenario.
+    :return: A name.
+    """
+    return "INF" + str(inflation_factor * 100) + "_PRIQUEUE_" + str(priority_queue) + "_DEVFACTOR_" + str(
+        dev_team_factor)
 
 
-def do_penalty_experiments(input_params, game_configuration, priority_queue=False, dev_team_factor=1.0):
+def do_penalty_experiments(input_params, game_configuration, priority_queue=False, dev_team_factor=1.0,
+                           solver_scheduler=None):
     """
     Executes the simulation model using different settings for the penalty factor, and calculates the equilibrium under
     each of this conditions.
 
     :param input_params: Simulation inputs.
     :param game_configuration: Game parameters.
+    :param solver_scheduler: If provided, games are solved while the next inflation factor is simulated. Results are
+    written once all the games are solved.
     :return: None.
     """
     game_configuration['THROTTLING_ENABLED'] = True
@@ -112,49 +146,61 @@ def do_penalty_experiments(input_params, game_configuration, priority_queue=Fals
     experiment_results = []
 
     inflation_factors = gtconfig.inflation_factors
-    for raw_inflation in inflation_factors:
-        game_configuration['INFLATION_FACTOR'] = raw_inflation
 
-        print "Current inflation factor: ", game_configuration['INFLATION_FACTOR']
+    project_prefix = "ALL"
+    if game_configuration['PROJECT_FILTER'] is not None and len(game_configuration['PROJECT_FILTER']) > 0:
+        project_prefix = "_".join(game_configuration['PROJECT_FILTER'])
 
-        prefix = "INF" + str(game_configuration['INFLATION_FACTOR'] * 100) + "_PRIQUEUE_" + str(
-            priority_queue) + "_DEVFACTOR_" + str(dev_team_factor)
-        equilibrium_list, symmetric_equilibrium = simulate_and_obtain_equilibria(input_params, game_configuration,
-                                                                                 prefix=prefix,
-                                                                                 priority_queue=priority_queue,
-                                                                                 dev_team_factor=dev_team_factor)
+    filename = "csv/" + project_prefix + "_" + get_penalty_prefix(inflation_factors[-1], priority_queue,
+                                                                  dev_team_factor) + "_penalty_experiment_results.csv"
 
-        profile_for_plotting = get_profile_for_plotting(symmetric_equilibrium)
-        sample_team = 0
-        inflation_at_equilibrium = float(Fraction(profile_for_plotting[sample_team][simmodel.SIMPLE_INFLATE_STRATEGY]))
+    def get_results_callback(inflation_factor):
 
-        results = {"total_equilibrium": len(equilibrium_list),
-                   "symmetric equilibrium": len(symmetric_equilibrium),
-                   "inflation_factor": game_configuration['INFLATION_FACTOR'],
-                   "inflation_at_equilibrium": inflation_at_equilibrium,
-                   "priority_queue": priority_queue,
-                   "dev_team_factor": dev_team_factor}
+        def record_results(equilibrium_list, symmetric_equilibrium):
+            inflation_at_equilibrium = None
+            if len(symmetric_equilibrium) > 0:
+                profile_for_plotting = get_profile_for_plotting(symmetric_equilibrium)
+                sample_team = 0
+                inflation_at_equilibrium = float(
+                    Fraction(profile_for_plotting[sample_team][simmodel.SIMPLE_INFLATE_STRATEGY]))
 
-        logger.info("results: " + str(results))
+            results = {"total_equilibrium": len(equilibrium_list),
+                       "symmetric equilibrium": len(symmetric_equilibrium),
+                       "inflation_factor": inflation_factor,
+                       "inflation_at_equilibrium": inflation_at_equilibrium,
+                       "priority_queue": priority_queue,
+                       "dev_team_factor": dev_team_factor}
 
-        experiment_results.append(results)
+            logger.info("results: " + str(results))
 
-    dataframe = pd.DataFrame(experiment_results)
-    project_prefix = "ALL"
+            experiment_results.append(results)
 
-    if game_configuration['PROJECT_FILTER'] is not None and len(game_configuration['PROJECT_FILTER']) > 0:
-        project_prefix = "_".join(game_configuration['PROJECT_FILTER'])
+            if len(experiment_results) == len(inflation_factors):
+                dataframe = pd.DataFrame(experiment_results).sort_values("inflation_factor")
+                dataframe.to_csv(filename, index=False)
+                logger.info("Penalty experiment results stored in " + filename)
 
-    filename = "csv/" + project_prefix + "_" + prefix + "_penalty_experiment_results.csv"
-    dataframe.to_csv(filename, index=False)
-    logger.info("Penalty experiment results stored in " + filename)
+        return record_results
 
+    for raw_inflation in inflation_factors:
+        game_configuration['INFLATION_FACTOR'] = raw_inflation
 
-def do_gatekeeper_experiments(input_params, game_configuration, priority_queue=False, dev_team_factor=1.0):
+        print "Current inflation factor: ", game_configuration['INFLATION_FACTOR']
+
+        prefix = get_penalty_prefix(game_configuration['INFLATION_FACTOR'], priority_queue, dev_team_factor)
+        simulate_and_obtain_equilibria(input_params, game_configuration, prefix=prefix,
+                                       priority_queue=priority_queue, dev_team_factor=dev_team_factor,
+                                       solver_scheduler=solver_scheduler,
+                                       callback=get_results_callback(raw_inflation))
+
+
+def do_gatekeeper_experiments(input_params, game_configuration, priority_queue=False, dev_team_factor=1.0,
+                              solver_scheduler=None):
     """
     Performs the Gatekeeper game with several levels of success rate for inflation detection.
     :param input_params: Simulation inputs.
     :param game_configuration: Game parameters.
+    :param solver_scheduler: If provided, games are solved while the next success rate is simulated.
     :return: None
     """
 
@@ -167,11 +213,12 @@ def do_gatekeeper_experiments(input_params, game_configuration, priority_queue=F
         prefix = "GATEKEEPER_SUCCESS" + str(game_configuration['SUCCESS_RATE']) + "_PRIQUEUE_" + str(
             priority_queue) + "_DEVFACTOR_" + str(dev_team_factor)
         simulate_and_obtain_equilibria(input_params, game_configuration, prefix=prefix, priority_queue=priority_queue,
-                                       dev_team_factor=dev_team_factor)
+                                       dev_team_factor=dev_team_factor, solver_scheduler=solver_scheduler)
 
 
 def analyse_project(project_list, enhanced_dataframe, valid_projects, replications_per_profile=1000,
-                    use_empirical=False, use_heuristic=True, priority_queue=False, dev_team_factor=1.0):
+                    use_empirical=False, use_heuristic=True, priority_queue=False, dev_team_factor=1.0,
+                    solver_scheduler=None):
     """
 
     :param project_list:
@@ -204,7 +251,7 @@ def analyse_project(project_list, enhanced_dataframe, valid_projects, replicatio
         logger.info("Starting Throttling penalty experiments...")
         game_configuration['THROTTLING_ENABLED'] = True
         do_penalty_experiments(input_params, game_configuration, priority_queue=priority_queue,
-                               dev_team_factor=dev_team_factor)
+                               dev_team_factor=dev_team_factor, solver_scheduler=solver_scheduler)
 
     if do_gatekeeper:
         print "Starting gatekeeper analysis ..."
@@ -213,7 +260,7 @@ def analyse_project(project_list, enhanced_dataframe, valid_projects, replicatio
         game_configuration['GATEKEEPER_CONFIG'] = DEFAULT_GATEKEEPER_CONFIG
 
         do_gatekeeper_experiments(input_params, game_configuration, priority_queue=priority_queue,
-                                  dev_team_factor=dev_team_factor)
+                                  dev_team_factor=dev_team_factor, solver_scheduler=solver_scheduler)
 
 
 def main():
@@ -221,11 +268,7 @@ def main():
     Initial execution point
     :return:
     """
-    logger.info("Loading information from " + simdata.ALL_ISSUES_CSV)
-    all_issues = pd.read_csv(simdata.ALL_ISSUES_CSV)
-
-    logger.info("Adding calculated fields...")
-    enhanced_dataframe = simdata.enhace_report_dataframe(all_issues)
+    enhanced_dataframe = dataset.load_enhanced_dataframe()
 
     valid_projects = simdriver.get_valid_projects(enhanced_dataframe=enhanced_dataframe,
                                                   exclude_self_fix=gtconfig.exclude_self_fix)
@@ -235,29 +278,44 @@ def main():
 
     replications_per_profile = gtconfig.replications_per_profile
 
-    for priority_queue in gtconfig.priority_queues:
-        for dev_team_factor in gtconfig.dev_team_factors:
+    solver_scheduler = None
+    if gtconfig.parallel_solving:
+        solver_scheduler = solverscheduler.SolverScheduler(max_workers=gtconfig.solver_workers,
+                                                           timeout=gtconfig.solver_timeout)
 
-            logger.info("GAME CONFIGURATION: Priority Queue " + str(priority_queue) + " Dev Team Factor: " + str(
-                dev_team_factor))
-
-            if per_project:
-                logger.info("Running per-project analysis ...")
-                for project in valid_projects:
-                    analyse_project([project], enhanced_dataframe, valid_projects,
+    try:
+        for priority_queue in gtconfig.priority_queues:
+            for dev_team_factor in gtconfig.dev_team_factors:
+
+                logger.info("GAME CONFIGURATION: Priority Queue " + str(priority_queue) + " Dev Team Factor: " + str(
+                    dev_team_factor))
+
+                if per_project:
+                    logger.info("Running per-project analysis ...")
+                    for project in valid_projects:
+                        analyse_project([project], enhanced_dataframe, valid_projects,
+                                        replications_per_profile=replications_per_profile,
+                                        use_empirical=gtconfig.use_empirical_strategies,
+                                        use_heuristic=gtconfig.use_heuristic_strategies,
+                                        priority_queue=priority_queue,
+                                        dev_team_factor=dev_team_factor,
+                                        solver_scheduler=solver_scheduler)
+
+                if consolidated:
+                    analyse_project(None, enhanced_dataframe, valid_projects,
                                     replications_per_profile=replications_per_profile,
                                     use_empirical=gtconfig.use_empirical_strategies,
                                     use_heuristic=gtconfig.use_heuristic_strategies,
                                     priority_queue=priority_queue,
-                                    dev_team_factor=dev_team_factor)
-
-            if consolidated:
-                analyse_project(None, enhanced_dataframe, valid_projects,
-                                replications_per_profile=replications_per_profile,
-                                use_empirical=gtconfig.use_empirical_strategies,
-                                use_heuristic=gtconfig.use_heuristic_strategies,
-                                priority_queue=priority_queue,
-                                dev_team_factor=dev_team_factor)
+                                    dev_team_factor=dev_team_factor,
+                                    solver_scheduler=solver_scheduler)
+
+        if solver_scheduler is not None:
+            logger.info("Waiting for the pending equilibrium calculations...")
+            solver_scheduler.wait()
+    finally:
+        if solver_scheduler is not None:
+            solver_scheduler.shutdown()
 
 
 if __name__ == "__main__":
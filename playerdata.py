@@ -2,6 +2,7 @@
 This modules contain some data analysis do detect players actions and strategies.
 """
 
+import dataset
 import simdata
 import pandas as pd
 import numpy as np
@@ -54,9 +55,7 @@ def get_inflation_behaviour(inflation_percentage, real_priority, corrected_issue
 
 if __name__ == "__main__":
     print "Starting analysis ..."
-    all_issues = pd.read_csv(simdata.ALL_ISSUES_CSV)
-
-    all_issues = simdata.enhace_report_dataframe(all_issues)
+    all_issues = dataset.load_enhanced_dataframe()
     simplified_priorities = {"Blocker": "Severe",
                              "Critical": "Severe",
                              "Major": "Regular",
@@ -11,6 +11,7 @@ from scipy import stats
 import gtconfig
 import time
 
+import dataset
 import simdata
 import simdriver
 
@@ -65,11 +66,7 @@ def perform_nonparametric_test(first_sample, second_sample, threshold):
 def main():
     logger.info("Starting priority analysis ...")
 
-    logger.info("Loading information from " + simdata.ALL_ISSUES_CSV)
-    all_issues = pd.read_csv(simdata.ALL_ISSUES_CSV)
-
-    logger.info("Adding calculated fields...")
-    enhanced_dataframe = simdata.enhace_report_dataframe(all_issues)
+    enhanced_dataframe = dataset.load_enhanced_dataframe()
 
     valid_projects = simdriver.get_valid_projects(enhanced_dataframe, threshold=simdriver.VALID_THRESHOLD)
 
@@ -0,0 +1,83 @@
+"""
+This module implements the incremental exploration of the strategy profile space, in the style of the double-oracle
+algorithm used in empirical game-theoretic analysis. Instead of simulating every profile before equilibrium calculation,
+we start from a small subgame, solve it, and only simulate the unilateral deviations from its equilibria. The subgame
+is expanded when one of these deviations is beneficial.
+"""
+
+import logging
+
+import gtutils
+import gtconfig
+
+logger = gtconfig.get_logger("profile_search", "profile_search.txt", level=logging.INFO)
+
+
+def complete_profile(equilibrium_profile, strategies_catalog):
+    """
+    Assigns zero probability to the strategies outside the subgame, so the equilibrium is expressed over the whole
+    catalog.
+
+    :param equilibrium_profile: Equilibrium of the subgame.
+    :param strategies_catalog: Catalog of available strategies.
+    :return: None.
+    """
+    for team, strategy_probabilities in equilibrium_profile.iteritems():
+        for strategy in strategies_catalog:
+            if strategy.name not in strategy_probabilities:
+                strategy_probabilities[strategy.name] = "0"
+
+
+def explore_profiles(strategies_catalog, teams, payoff_oracle, equilibrium_solver, initial_strategies=2,
+                     regret_threshold=0.0, initial_catalog=None):
+    """
+    Finds equilibria with bounded regret, simulating only the profiles needed to verify them.
+
+    :param strategies_catalog: Catalog of available strategies.
+    :param teams: Number of teams in the game.
+    :param payoff_oracle: Function that receives a strategy map and returns the payoffs per team. It should cache its
+    results.
+    :param equilibrium_solver: Function that receives a list of strategies and returns the equilibria of the subgame
+    restricted to them.
+    :param initial_strategies: Number of strategies of the catalog on the initial subgame.
+    :param regret_threshold: Deviations with a gain below this value are not considered beneficial.
+    :param initial_catalog: Strategies of the initial subgame. If empty, the first strategies of the catalog are used.
+    :return: List of equilibrium profiles, and the list with their corresponding regret.
+    """
+
+    subgame_catalog = list(strategies_catalog[:max(1, initial_strategies)])
+    if initial_catalog:
+        subgame_catalog = list(initial_catalog)
+
+    while True:
+        logger.info("Solving subgame with " + str(len(subgame_catalog)) + " of " + str(
+            len(strategies_catalog)) + " strategies: " + str(subgame_catalog))
+
+        equilibrium_list = equilibrium_solver(subgame_catalog)
+        regret_list = []
+        new_strategies = []
+
+        for index, equilibrium_profile in enumerate(equilibrium_list):
+            regret, best_deviations = gtutils.get_regret(equilibrium_profile, strategies_catalog, teams,
+                                                         payoff_oracle)
+            regret_list.append(regret)
+            logger.info("Equilibrium " + str(index + 1) + " of " + str(len(equilibrium_list)) + ": Regret " + str(
+                regret))
+
+            for team, (strategy_name, gain) in best_deviations.iteritems():
+                deviation = [strategy for strategy in strategies_catalog if strategy.name == strategy_name][0]
+
+                if gain > regret_threshold and deviation not in subgame_catalog and deviation not in new_strategies:
+                    logger.info("Team " + str(team) + " can benefit by deviating to " + strategy_name + ". Gain: " +
+                                str(gain))
+                    new_strategies.append(deviation)
+
+        if len(new_strategies) == 0:
+            logger.info("No beneficial deviations found. Subgame equilibria are equilibria of the full game.")
+
+            for equilibrium_profile in equilibrium_list:
+                complete_profile(equilibrium_profile, strategies_catalog)
+
+            return equilibrium_list, regret_list
+
+        subgame_catalog += new_strategies
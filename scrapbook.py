@@ -1,10 +1,10 @@
+import dataset
 import simdata
 import pandas as pd
 
 
 def main():
-    all_issues = pd.read_csv(simdata.ALL_ISSUES_CSV)
-    all_issues = simdata.enhace_report_dataframe(all_issues)
+    all_issues = dataset.load_enhanced_dataframe()
 
     print "len(all_issues.index) ", len(all_issues.index)
 
@@ -65,15 +65,15 @@ def consolidate_payoff_results(period, reporter_configuration, simulation_output
     return simulation_results
 
 
-def get_team_metrics(file_prefix, game_period, teams, overall_dataframes, number_of_teams):
+def get_team_dataframe(file_prefix, game_period, teams, overall_dataframes, number_of_teams):
     """
-    Analizes the performance of the team based on fixed issues, according to a scenario description.
+    Consolidates the per-run results of each team, according to a scenario description.
 
     :param teams: Number of teams in the game.
     :param file_prefix: Strategy profile descripcion.
     :param game_period: Game period description.
     :param overall_dataframe: Dataframe with run information.
-    :return: List of outputs per team
+    :return: Dataframe with a row per run, and the results, reports and score per team as columns.
     """
     runs = overall_dataframes[0]['run'].unique()
 
@@ -107,15 +107,55 @@ def get_team_metrics(file_prefix, game_period, teams, overall_dataframes, number
         for team_index in range(number_of_teams):
             team_prefix = "team_" + str(team_index + 1) + "_"
 
-            simulation_result[team_prefix + "results"] = team_results[team_index]['team_resolved']
-            simulation_result[team_prefix + "reports"] = team_results[team_index]['team_reported']
-            simulation_result[team_prefix + "score"] = team_results[team_index]['team_score']
+            # Teams without reports on a run get no results.
+            team_result = team_results.get(team_index, {"team_resolved": 0, "team_reported": 0, "team_score": 0})
+            simulation_result[team_prefix + "results"] = team_result['team_resolved']
+            simulation_result[team_prefix + "reports"] = team_result['team_reported']
+            simulation_result[team_prefix + "score"] = team_result['team_score']
 
         consolidated_result.append(simulation_result)
 
     consolidated_dataframe = pd.DataFrame(consolidated_result)
     consolidated_dataframe.to_csv("csv/" + file_prefix + "_consolidated_result.csv", index=False)
 
+    return consolidated_dataframe
+
+
+def get_score_samples(consolidated_dataframe, number_of_teams):
+    """
+    Extracts the payoff score obtained by each team on every run.
+
+    :param consolidated_dataframe: Dataframe with per-run team results.
+    :param number_of_teams: Number of teams in the game.
+    :return: List containing the score samples per team.
+    """
+    return [consolidated_dataframe["team_" + str(team_index + 1) + "_score"].tolist() for team_index in
+            range(number_of_teams)]
+
+
+def get_team_metrics(file_prefix, game_period, teams, overall_dataframes, number_of_teams):
+    """
+    Analizes the performance of the team based on fixed issues, according to a scenario description.
+
+    :param teams: Number of teams in the game.
+    :param file_prefix: Strategy profile descripcion.
+    :param game_period: Game period description.
+    :param overall_dataframe: Dataframe with run information.
+    :return: List of outputs per team
+    """
+    consolidated_dataframe = get_team_dataframe(file_prefix, game_period, teams, overall_dataframes, number_of_teams)
+    return get_team_averages(file_prefix, consolidated_dataframe, number_of_teams)
+
+
+def get_team_averages(file_prefix, consolidated_dataframe, number_of_teams):
+    """
+    Calculates the average score per team, logging its confidence interval.
+
+    :param file_prefix: Strategy profile descripcion.
+    :param consolidated_dataframe: Dataframe with per-run team results.
+    :param number_of_teams: Number of teams in the game.
+    :return: List of outputs per team
+    """
     team_averages = []
 
     for team_index in range(number_of_teams):
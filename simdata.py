@@ -1,11 +1,13 @@
 """
 This module contains the data providing logic for the simulation random variate streams.
 """
+import bisect
+import heapq
+
 import dateutil.parser
 import pandas as pd
 import numpy as np
 import datetime
-import pytz
 import gtconfig
 
 import matplotlib
@@ -40,6 +42,12 @@ TIME_FACTOR = 60.0 * 60.0
 VALID_RESOLUTION_VALUES = ['Done', 'Implemented', 'Fixed']
 RESOLUTION_STATUS = ['Closed', 'Resolved']
 
+# Precomputed resolution flags, per value of only_with_commits and only_valid_resolution.
+RESOLVED_COLUMNS = {(True, True): 'Resolved (Commits, Valid Resolution)',
+                    (True, False): 'Resolved (Commits)',
+                    (False, True): 'Resolved (Valid Resolution)',
+                    (False, False): 'Resolved (Status)'}
+
 SEVERE_PRIORITY = 3
 NORMAL_PRIORITY = 2
 NON_SEVERE_PRIORITY = 1
@@ -52,6 +60,10 @@ SUPPORTED_PRIORITIES = [NON_SEVERE_PRIORITY, SEVERE_PRIORITY]
 
 BATCH_SIZE = 20
 
+# Format of the date columns in the CSV file. If None or not matching, the format is inferred. ISO 8601 dates are
+# already parsed fast without it.
+DATE_FORMAT = None
+
 
 def launch_histogram(data_points, config=None):
     """
@@ -206,100 +218,229 @@ def period_identifier(report_series, batch_size=BATCH_SIZE):
     return batch_identifier
 
 
-def include_batch_information(bug_reports, target_fixes=20, only_with_commits=True, only_valid_resolution=True):
-    """
-    Includes the column for grouping bug reports in batches.
-    :param bug_reports:
-    :return: Dataframe with a batch column
+def assign_batches(creation_times, resolution_times, fixable, target_fixes):
     """
+    Groups the reports in batches, in a single sweep. A batch is closed when the fixes among the reports created since
+    the batch start -and resolved before the creation of the current report- reach the target. Pending fixes are kept
+    in a heap, ordered by resolution time.
 
-    print "Starting batch assignment for ", len(bug_reports.index), " bug reports. Target fixes ", target_fixes
-    with_refreshed_index = bug_reports.sort_values(by=[CREATED_DATE_COLUMN], ascending=[1])
-    with_refreshed_index = with_refreshed_index.reset_index()
-
-    current_batch = 0
-    current_batch_start = None
+    :param creation_times: Creation times of the reports, as a sorted list of integers.
+    :param resolution_times: Resolution times of the reports, as integers.
+    :param fixable: True for the reports that count as fixes and have a resolution time.
+    :param target_fixes: Fixes per batch.
+    :return: List with the batch of each report, and list with the position of the first report per batch.
+    """
+    report_count = len(creation_times)
     batches = []
-    resolved_in_batch = []
     batch_starts = []
 
-    report_counter = 0
+    current_batch = 0
+    batch_started = False
+    next_candidate = 0
+    pending_fixes = []
+    fixes_so_far = 0
+    closing_start_time = None
+
+    for position in range(report_count):
+        current_creation_time = creation_times[position]
+
+        if not batch_started:
+            batch_starts.append(position)
+            batches.append(current_batch)
+
+            if current_creation_time == closing_start_time:
+                # Same window as the previous batch, that was closed by its first report.
+                current_batch += 1
+                continue
+
+            batch_started = True
+
+            # Reports created at the same time as the batch start are in the window, even if they precede it.
+            next_candidate = bisect.bisect_left(creation_times, current_creation_time)
+            pending_fixes = []
+            fixes_so_far = 0
+        else:
+            batches.append(current_batch)
 
-    for _, report_series in with_refreshed_index.iterrows():
+        while next_candidate < report_count and creation_times[next_candidate] <= current_creation_time:
+            if fixable[next_candidate]:
+                heapq.heappush(pending_fixes, resolution_times[next_candidate])
+            next_candidate += 1
 
-        if current_batch_start is None:
-            current_batch_start = report_series[CREATED_DATE_COLUMN]
-            batch_starts.append(current_batch_start)
+        while len(pending_fixes) > 0 and pending_fixes[0] <= current_creation_time:
+            heapq.heappop(pending_fixes)
+            fixes_so_far += 1
 
-        batches.append(current_batch)
-        report_counter += 1
-        current_creation_date = report_series[CREATED_DATE_COLUMN]
+        if fixes_so_far >= target_fixes:
+            if batch_starts[-1] == position:
+                closing_start_time = current_creation_time
 
-        previous_reports = with_refreshed_index[
-            (with_refreshed_index[CREATED_DATE_COLUMN] >= current_batch_start) &
-            (with_refreshed_index[CREATED_DATE_COLUMN] <= current_creation_date) &
-            (with_refreshed_index[RESOLUTION_DATE_COLUMN] <= current_creation_date)]
+            current_batch += 1
+            batch_started = False
 
-        fixes_so_far = 0
-        if not previous_reports.empty:
-            current_fixes = filter_resolved(previous_reports, only_with_commits, only_valid_resolution)
-            fixes_so_far = len(current_fixes.index)
+    return batches, batch_starts
 
-        if fixes_so_far >= target_fixes:
-            current_batch += 1
-            report_counter = 0
-            current_batch_start = None
 
-    print "The bug reports where grouped in ", current_batch + 1, " batches."
-    print "Starting resoluton in batch status calculation ..."
+def get_resolved_in_batch(batches, batch_starts, creation_times, resolution_times, fixable, target_fixes):
+    """
+    Flags the reports that were fixed within the time window of their batch, up to the target fixes per batch.
 
-    with_refreshed_index[BATCH_COLUMN] = pd.Series(batches, index=with_refreshed_index.index)
+    :param batches: Batch per report, as returned by assign_batches.
+    :param batch_starts: Position of the first report per batch.
+    :param creation_times: Creation times of the reports, sorted, as integers.
+    :param resolution_times: Resolution times of the reports, as integers.
+    :param fixable: True for the reports that count as fixes and have a resolution time.
+    :param target_fixes: Fixes per batch.
+    :return: List of booleans.
+    """
+    batch_ends = [creation_times[next_start - 1] for next_start in batch_starts[1:]] + [creation_times[-1]]
 
+    resolved_in_batch = []
     previous_batch = 0
     batch_resolved_count = 0
-    for _, report_series in with_refreshed_index.iterrows():
 
-        current_batch = report_series[BATCH_COLUMN]
+    for position, current_batch in enumerate(batches):
         if previous_batch != current_batch:
             batch_resolved_count = 0
 
-        batch_start = batch_starts[current_batch]
-        batch_reports = with_refreshed_index[with_refreshed_index[BATCH_COLUMN] == current_batch]
-        batch_end = max(batch_reports[CREATED_DATE_COLUMN].dropna().values)
-
         resolved = False
-        if (resolved_definition(report_series, only_with_commits, only_valid_resolution)) and \
-                (batch_resolved_count < target_fixes) and \
-                (report_series[RESOLUTION_DATE_COLUMN] is not None) and \
-                (batch_start <= report_series[RESOLUTION_DATE_COLUMN] <= batch_end):
+        if fixable[position] and batch_resolved_count < target_fixes and \
+                creation_times[batch_starts[current_batch]] <= resolution_times[position] <= batch_ends[current_batch]:
             resolved = True
             batch_resolved_count += 1
 
         resolved_in_batch.append(resolved)
         previous_batch = current_batch
 
+    return resolved_in_batch
+
+
+def include_batch_information(bug_reports, target_fixes=20, only_with_commits=True, only_valid_resolution=True):
+    """
+    Includes the column for grouping bug reports in batches.
+    :param bug_reports:
+    :return: Dataframe with a batch column
+    """
+
+    print "Starting batch assignment for ", len(bug_reports.index), " bug reports. Target fixes ", target_fixes
+    with_refreshed_index = bug_reports.sort_values(by=[CREATED_DATE_COLUMN], ascending=[1])
+    with_refreshed_index = with_refreshed_index.reset_index()
+
+    if with_refreshed_index.empty:
+        with_refreshed_index[BATCH_COLUMN] = pd.Series(index=with_refreshed_index.index, dtype=int)
+        with_refreshed_index[RESOLVED_IN_BATCH_COLUMN] = pd.Series(index=with_refreshed_index.index, dtype=bool)
+        return with_refreshed_index
+
+    creation_times = with_refreshed_index[CREATED_DATE_COLUMN].values.astype(np.int64).tolist()
+    resolution_dates = with_refreshed_index[RESOLUTION_DATE_COLUMN]
+    resolution_times = resolution_dates.values.astype(np.int64).tolist()
+
+    resolved_mask = get_resolved_mask(with_refreshed_index, only_with_commits, only_valid_resolution)
+    fixable = (resolved_mask & resolution_dates.notnull()).values.tolist()
+
+    batches, batch_starts = assign_batches(creation_times, resolution_times, fixable, target_fixes)
+
+    print "The bug reports where grouped in ", batches[-1] + 1, " batches."
+    print "Starting resoluton in batch status calculation ..."
+
+    with_refreshed_index[BATCH_COLUMN] = pd.Series(batches, index=with_refreshed_index.index)
+
+    resolved_in_batch = get_resolved_in_batch(batches, batch_starts, creation_times, resolution_times, fixable,
+                                              target_fixes)
     with_refreshed_index[RESOLVED_IN_BATCH_COLUMN] = pd.Series(resolved_in_batch, index=with_refreshed_index.index)
     return with_refreshed_index
 
 
-def enhace_report_dataframe(bug_reports):
+def parse_date_series(date_strings, date_format=None):
+    """
+    Vectorized equivalent of parsing each date string with dateutil. Missing values are returned as NaT.
+
+    :param date_strings: Series of date strings.
+    :param date_format: Expected date format. If the strings do not follow it, the format is inferred.
+    :return: Series of dates.
+    """
+    if date_format is not None:
+        try:
+            return pd.to_datetime(date_strings, format=date_format)
+        except ValueError:
+            pass
+
+    parsed_dates = pd.to_datetime(date_strings, infer_datetime_format=True)
+    if parsed_dates.dtype == object:
+        # Dates with different UTC offsets cannot share a timezone-aware column.
+        parsed_dates = pd.to_datetime(date_strings, utc=True)
+
+    return parsed_dates
+
+
+def get_wall_clock_dates(date_strings, parsed_dates):
+    """
+    Local date and time of each report, with the UTC offset written on its date string. Dates with different offsets
+    are parsed to UTC, so their calendar fields can differ from the ones the reporter saw.
+
+    :param date_strings: Series of date strings.
+    :param parsed_dates: Series of dates, as returned by parse_date_series.
+    :return: Series of timezone-naive dates.
+    """
+    if parsed_dates.dt.tz is None:
+        return parsed_dates
+
+    offsets = date_strings.astype(object).str.extract(r"([+-])(\d{2}):?(\d{2})\s*$", expand=True)
+    offset_minutes = (offsets[1].astype(float) * 60 + offsets[2].astype(float)).fillna(0)
+    offset_minutes = offset_minutes.where(offsets[0] != "-", -offset_minutes)
+
+    utc_dates = parsed_dates.dt.tz_convert("UTC").dt.tz_localize(None)
+    return utc_dates + pd.to_timedelta(offset_minutes, unit="m")
+
+
+def get_elapsed_time(start_dates, end_dates):
+    """
+    Vectorized equivalent of get_resolution_time and get_priority_change_time: The time between two dates, in the
+    units defined by time factor.
+
+    :param start_dates: Series of start dates.
+    :param end_dates: Series of end dates.
+    :return: Series with the elapsed time, or NaN if an end date is missing or not after the start date.
+    """
+    if end_dates.isnull().all():
+        return pd.Series(np.nan, index=start_dates.index)
+
+    if start_dates.dt.tz is not None and end_dates.dt.tz is not None:
+        end_dates = end_dates.dt.tz_convert(start_dates.dt.tz)
+
+    elapsed_time = (end_dates - start_dates) / np.timedelta64(1, 's') / TIME_FACTOR
+    return elapsed_time.where(start_dates < end_dates)
+
+
+def enhace_report_dataframe(bug_reports, date_format=None):
     """
     Adds additional series to the original report dataframe.
     :param bug_reports: Original dataframe.
+    :param date_format: Format of the date columns. By default, DATE_FORMAT.
     :return: Improved dataframe.
     """
-    bug_reports[CREATED_DATE_COLUMN] = bug_reports.apply(parse_create_date, axis=1)
-    bug_reports[RESOLUTION_DATE_COLUMN] = bug_reports.apply(parse_resolution_date, axis=1)
+    if date_format is None:
+        date_format = DATE_FORMAT
 
-    bug_reports[PERIOD_COLUMN] = bug_reports.apply(date_as_string, axis=1)
+    bug_reports[CREATED_DATE_COLUMN] = parse_date_series(bug_reports['Creation Date'], date_format)
+    bug_reports[RESOLUTION_DATE_COLUMN] = parse_date_series(bug_reports['JIRA Resolved Date'], date_format)
 
-    bug_reports[RESOLUTION_TIME_COLUMN] = bug_reports.apply(get_resolution_time, axis=1)
-    bug_reports[PRIORITY_CHANGE_TIME_COLUMN] = bug_reports.apply(get_priority_change_time, axis=1)
+    bug_reports[PERIOD_COLUMN] = get_wall_clock_dates(bug_reports['Creation Date'],
+                                                      bug_reports[CREATED_DATE_COLUMN]).dt.strftime("%Y-%m")
+
+    bug_reports[RESOLUTION_TIME_COLUMN] = get_elapsed_time(bug_reports[CREATED_DATE_COLUMN],
+                                                           bug_reports[RESOLUTION_DATE_COLUMN])
+    priority_change_dates = parse_date_series(bug_reports['Priority Change Date'], date_format)
+    bug_reports[PRIORITY_CHANGE_TIME_COLUMN] = get_elapsed_time(bug_reports[CREATED_DATE_COLUMN], priority_change_dates)
 
     bug_reports[SIMPLE_PRIORITY_COLUMN] = bug_reports['Priority'].replace(SIMPLIFIED_PRIORITIES)
     bug_reports[ORIGINAL_SIMPLE_PRIORITY_COLUMN] = bug_reports['Original Priority']
     bug_reports[NEW_SIMPLE_PRIORITY_COLUMN] = bug_reports['New Priority'].replace(SIMPLIFIED_PRIORITIES)
 
+    for (only_with_commits, only_valid_resolution), resolved_column in RESOLVED_COLUMNS.iteritems():
+        bug_reports[resolved_column] = get_resolved_mask(bug_reports, only_with_commits, only_valid_resolution,
+                                                         use_precomputed=False)
+
     # bug_reports[SIMPLE_PRIORITY_COLUMN] = bug_reports[SIMPLE_PRIORITY_COLUMN].fillna(NON_SEVERE_PRIORITY)
     # bug_reports[ORIGINAL_SIMPLE_PRIORITY_COLUMN] = bug_reports[ORIGINAL_SIMPLE_PRIORITY_COLUMN].fillna(
     #     NON_SEVERE_PRIORITY)
@@ -372,6 +513,32 @@ def resolved_definition(bug_report, only_with_commits=True, only_valid_resolutio
     return is_resolved
 
 
+def get_resolved_mask(bug_reports, only_with_commits=True, only_valid_resolution=True, use_precomputed=True):
+    """
+    Vectorized version of resolved_definition. If the dataframe contains the flag precomputed by
+    enhace_report_dataframe, it is returned directly.
+
+    :param bug_reports: Bug report dataframe.
+    :param only_with_commits: True if it should have commits related to it.
+    :param only_valid_resolution: True if the resolution value implies development effort.
+    :param use_precomputed: False for ignoring the precomputed flag.
+    :return: Boolean series.
+    """
+    resolved_column = RESOLVED_COLUMNS[(only_with_commits, only_valid_resolution)]
+    if use_precomputed and resolved_column in bug_reports.columns:
+        return bug_reports[resolved_column]
+
+    resolved_mask = bug_reports[STATUS_COLUMN].isin(RESOLUTION_STATUS)
+
+    if only_valid_resolution:
+        resolved_mask = resolved_mask & bug_reports['Resolution'].isin(VALID_RESOLUTION_VALUES)
+
+    if only_with_commits:
+        resolved_mask = resolved_mask & (bug_reports['Commits'] > 0)
+
+    return resolved_mask
+
+
 def filter_resolved(bug_reports, only_with_commits=True, only_valid_resolution=True):
     """
     Return the issues that are Closed/Resolved with a valid resolution and with commits in Git.
@@ -379,9 +546,7 @@ def filter_resolved(bug_reports, only_with_commits=True, only_valid_resolution=T
     :return: Only resolved issues.
     """
 
-    resolved_mask = bug_reports.apply(
-        lambda report: resolved_definition(report, only_with_commits, only_valid_resolution), axis=1)
-    resolved_issues = bug_reports[resolved_mask]
+    resolved_issues = bug_reports[get_resolved_mask(bug_reports, only_with_commits, only_valid_resolution)]
     return resolved_issues
 
 
@@ -406,8 +571,10 @@ def get_modified_priority_bugs(bug_reports):
     :return: Bug reports with a corrected priority.
     """
 
+    # Categorical columns do not consider a missing reporter different from the changer.
     third_party_changer = (~bug_reports[PRIORITY_CHANGER_COLUMN].isnull()) & \
-                          (bug_reports[REPORTER_COLUMN] != bug_reports[PRIORITY_CHANGER_COLUMN])
+                          ((bug_reports[REPORTER_COLUMN] != bug_reports[PRIORITY_CHANGER_COLUMN]) |
+                           bug_reports[REPORTER_COLUMN].isnull())
 
     issues_validated_priority = bug_reports.loc[third_party_changer]
     return issues_validated_priority
@@ -430,58 +597,46 @@ def get_distance_in_hours(distance):
 def get_interarrival_times(arrival_times, period_start):
     """
     Given a list of report dates, it returns the list corresponding to the interrival times.
-    :param arrival_times: List of arrival times.
+    :param arrival_times: Sorted arrival times, as datetime64 values in UTC.
+    :param period_start: Start of the period. The time until the first arrival is included if positive.
     :return: List of inter-arrival times.
     """
-    interarrival_times = []
+    arrival_times = np.asarray(arrival_times, dtype="datetime64[ns]")
+    if len(arrival_times) == 0:
+        return pd.Series(data=[])
 
-    for position, created_date in enumerate(arrival_times):
-        if position > 0:
-            distance = created_date - arrival_times[position - 1]
-            interarrival_times.append(get_distance_in_hours(distance))
-        else:
-            if isinstance(created_date, np.datetime64):
-                created_date = datetime.datetime.utcfromtimestamp(created_date.tolist() / 1e9)
-                created_date = pytz.utc.localize(created_date)
+    period_start = pd.Timestamp(period_start)
+    if period_start.tz is not None:
+        period_start = period_start.tz_convert("UTC").tz_localize(None)
 
-            distance = get_distance_in_hours(created_date - period_start)
+    interarrival_times = np.diff(arrival_times) / np.timedelta64(1, 's') / TIME_FACTOR
 
-            if distance > 0:
-                interarrival_times.append(distance)
+    first_distance = (arrival_times[0] - period_start.to_datetime64()) / np.timedelta64(1, 's') / TIME_FACTOR
+    if first_distance > 0:
+        interarrival_times = np.concatenate([[first_distance], interarrival_times])
 
     return pd.Series(data=interarrival_times)
 
 
 def get_report_batches(bug_reports, window_size=1):
     """
-    Return a list of bug report batches, according to a batch size.
+    Groups the reports in batches: A batch contains the reports created less than window_size + 1 days after its first
+    report -i.e., within window_size complete days-.
+
     :param bug_reports: Bug report dataframe.
     :param window_size: Size of the window that represents a batch. In DAYS
-    :return: List containing batch start and batch count.
+    :return: Array with the creation time of the first report per batch, and array with the reports per batch.
     """
+    report_dates = np.sort(bug_reports[CREATED_DATE_COLUMN].values)
+    window_end = np.timedelta64(int(np.floor(window_size)) + 1, 'D')
 
-    report_dates = bug_reports[CREATED_DATE_COLUMN]
-    report_dates = report_dates.sort_values()
+    batch_starts = []
+    position = 0
+    while position < len(report_dates):
+        batch_starts.append(position)
+        position = int(np.searchsorted(report_dates, report_dates[position] + window_end, side="left"))
 
-    batches = []
-    for position, created_date in enumerate(report_dates.values):
-        if len(batches) == 0:
-            batches.append({"batch_head": created_date,
-                            "batch_count": 1})
-        else:
-            last_batch_head = batches[-1]["batch_head"]
-            distance = created_date - last_batch_head
-
-            if hasattr(distance, 'days'):
-                distance_in_days = distance.days
-            else:
-                distance_in_days = distance.astype('timedelta64[D]')
-                distance_in_days = distance_in_days / np.timedelta64(1, 'D')
-
-            if distance_in_days <= window_size:
-                batches[-1]["batch_count"] += 1
-            else:
-                batches.append({"batch_head": created_date,
-                                "batch_count": 1})
-
-    return batches
+    batch_starts = np.array(batch_starts, dtype=int)
+    batch_counts = np.diff(np.append(batch_starts, len(report_dates)))
+
+    return report_dates[batch_starts], batch_counts
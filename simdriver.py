@@ -2,6 +2,7 @@
 This modules triggers the bug report simulation. Launch this module to trigger the simulation validation per
 project dataset.
 """
+import functools
 import logging
 import time
 import traceback
@@ -14,6 +15,7 @@ from collections import defaultdict
 
 import analytics
 import defaultabuse
+import dataset
 import simdata
 import simvalid
 import simutils
@@ -35,6 +37,8 @@ VALID_THRESHOLD = .3
 # Also, it was found in Discrete Event Simulation by George Fishman (Chapter 100
 MINIMUM_P_VALUE = 0.05
 
+GROUP_INDEX_COLUMN = "Tester Group"
+
 logger = gtconfig.get_logger("simulation_driver", "simulation_driver.txt", level=logging.INFO)
 
 
@@ -112,12 +116,62 @@ def get_reporter_groups(bug_dataset):
     :return: List of reporters, sorted by activity.
     """
     issues_by_tester = bug_dataset[simdata.REPORTER_COLUMN].value_counts()
+    issues_by_tester = issues_by_tester[issues_by_tester > 0]
     testers_in_order = [index for index, _ in issues_by_tester.iteritems()]
     tester_groups = [[tester] for tester in testers_in_order]
 
     return tester_groups
 
 
+def get_reporter_statistics(training_dataset, tester_groups):
+    """
+    Gathers the reports and priority statistics of each tester group, with a single grouping of the dataset. A
+    reporter can belong to more than one group.
+
+    :param training_dataset: Bug report data frame.
+    :param tester_groups: List of reporter lists.
+    :return: Map from group index to a dictionary of statistics.
+    """
+    membership = pd.DataFrame([(reporter, group_index) for group_index, reporter_list in enumerate(tester_groups)
+                               for reporter in reporter_list],
+                              columns=[simdata.REPORTER_COLUMN, GROUP_INDEX_COLUMN])
+    columns = [simdata.REPORTER_COLUMN, simdata.CREATED_DATE_COLUMN, simdata.SIMPLE_PRIORITY_COLUMN,
+               simdata.ORIGINAL_SIMPLE_PRIORITY_COLUMN, simdata.PRIORITY_CHANGER_COLUMN]
+    grouped_reports = training_dataset[columns].merge(membership, on=simdata.REPORTER_COLUMN)
+
+    reports_per_priority = defaultdict(dict)
+    for (group_index, priority), count in grouped_reports.groupby(
+            [GROUP_INDEX_COLUMN, simdata.SIMPLE_PRIORITY_COLUMN]).size().iteritems():
+        reports_per_priority[group_index][priority] = count
+
+    modified_priority = simdata.get_modified_priority_bugs(grouped_reports)
+    is_true_report = modified_priority[simdata.SIMPLE_PRIORITY_COLUMN] == modified_priority[
+        simdata.ORIGINAL_SIMPLE_PRIORITY_COLUMN]
+    with_modified_priority = modified_priority.groupby(GROUP_INDEX_COLUMN).size().to_dict()
+    inflation_counts = modified_priority.groupby(
+        [modified_priority[GROUP_INDEX_COLUMN], modified_priority[simdata.SIMPLE_PRIORITY_COLUMN],
+         is_true_report]).size().to_dict()
+
+    reports_by_group = {group_index: group_reports for group_index, group_reports in
+                        grouped_reports.groupby(GROUP_INDEX_COLUMN)}
+    empty_reports = grouped_reports.iloc[0:0]
+
+    statistics = {}
+    for group_index in range(len(tester_groups)):
+        inflation_records = {}
+        for priority in simdata.SUPPORTED_PRIORITIES:
+            for is_true, suffix in [(True, "_true"), (False, "_false")]:
+                inflation_records["priority_" + str(priority) + suffix] = inflation_counts.get(
+                    (group_index, priority, is_true), 0)
+
+        statistics[group_index] = {'bug_reports': reports_by_group.get(group_index, empty_reports),
+                                   'reports_per_priority': defaultdict(int, reports_per_priority[group_index]),
+                                   'with_modified_priority': with_modified_priority.get(group_index, 0),
+                                   'inflation_records': inflation_records}
+
+    return statistics
+
+
 def get_reporter_configuration(training_dataset, tester_groups=None, drive_by_filter=gtconfig.exclude_drive_by,
                                debug=False, window_size=1):
     """
@@ -143,16 +197,15 @@ def get_reporter_configuration(training_dataset, tester_groups=None, drive_by_fi
     else:
         logger.info("REPORT STREAM: No batching is made for the bug arrival.")
 
+    reporter_statistics = get_reporter_statistics(training_dataset, tester_groups)
+
     for index, reporter_list in enumerate(tester_groups):
 
-        bug_reports = simdata.filter_by_reporter(training_dataset, reporter_list)
+        bug_reports = reporter_statistics[index]['bug_reports']
         reports = len(bug_reports.index)
 
         if batching:
-            batches = simdata.get_report_batches(bug_reports, window_size)
-            arrival_times = [batch["batch_head"] for batch in batches]
-
-            batch_sizes_sample = [batch["batch_count"] for batch in batches]
+            arrival_times, batch_sizes_sample = simdata.get_report_batches(bug_reports, window_size)
             sample_as_observations = pd.Series(data=batch_sizes_sample)
 
             batch_size_gen = simutils.DiscreteEmpiricalDistribution(name="batch_dist",
@@ -178,23 +231,9 @@ def get_reporter_configuration(training_dataset, tester_groups=None, drive_by_fi
                 observations=bug_reports[simdata.SIMPLE_PRIORITY_COLUMN])
             priority_map = priority_distribution.get_probabilities()
 
-            reports_per_priority = {index: value for index, value in
-                                    bug_reports[simdata.SIMPLE_PRIORITY_COLUMN].value_counts().iteritems()}
-            reports_per_priority = defaultdict(int, reports_per_priority)
-
-            modified_priority = simdata.get_modified_priority_bugs(bug_reports)
-            with_modified_priority = len(modified_priority.index)
-
-            inflation_records = {}
-            for priority in simdata.SUPPORTED_PRIORITIES:
-                bugs = modified_priority[modified_priority[simdata.SIMPLE_PRIORITY_COLUMN] == priority]
-                true_reports = bugs[
-                    bugs[simdata.SIMPLE_PRIORITY_COLUMN] == bugs[simdata.ORIGINAL_SIMPLE_PRIORITY_COLUMN]]
-                inflated_reports = bugs[
-                    bugs[simdata.SIMPLE_PRIORITY_COLUMN] != bugs[simdata.ORIGINAL_SIMPLE_PRIORITY_COLUMN]]
-
-                inflation_records["priority_" + str(priority) + "_true"] = len(true_reports.index)
-                inflation_records["priority_" + str(priority) + "_false"] = len(inflated_reports.index)
+            reports_per_priority = reporter_statistics[index]['reports_per_priority']
+            with_modified_priority = reporter_statistics[index]['with_modified_priority']
+            inflation_records = reporter_statistics[index]['inflation_records']
 
             if debug:
                 logger.debug(
@@ -243,19 +282,25 @@ def fit_reporter_distributions(reporters_config):
     :param reporters_config: List of basic reporter configurations.
     :return: None.
     """
+    samples = {}
     for config in reporters_config:
         inter_arrival_sample = config['inter_arrival_sample']
         print "INTERARRIVAL TIME: Fitting distribution according to the current sample: ", inter_arrival_sample.describe()
 
-        reporter_list = config['name']
-
-        description = "INTERRIVAL_TIME_" + str(reporter_list)
+        description = "INTERRIVAL_TIME_" + str(config['name'])
         file_name = "csv/" + description + ".csv"
-        inter_arrival_sample.to_csv(file_name)
+        siminput.store_sample(inter_arrival_sample, file_name)
         print "Inter-arrival samples stored in ", file_name
 
-        best_fit = siminput.launch_input_analysis(inter_arrival_sample, description,
-                                                  show_data_plot=False, save_plot=False)
+        samples[description] = inter_arrival_sample
+
+    best_fits = siminput.fit_samples(samples)
+
+    for config in reporters_config:
+        inter_arrival_sample = config['inter_arrival_sample']
+        reporter_list = config['name']
+
+        best_fit = best_fits["INTERRIVAL_TIME_" + str(reporter_list)]
         inter_arrival_time_gen = None
 
         if best_fit["ks_p_value"] >= MINIMUM_P_VALUE:
@@ -321,6 +366,87 @@ def get_reporting_metrics(reported_dataset, resolved_dataset, reporters_config):
     return resolution_metrics
 
 
+def get_batch_metrics(issues_in_batches, reporters_config, unique_batches):
+    """
+    Gathers the development team production and the reporting metrics of all the batches at once. Instead of filtering
+    the dataset per batch, priority and reporter, it groups once by batch and priority and once by batch and reporter
+    group. The metrics are the same as get_dev_team_production and get_reporting_metrics.
+
+    :param issues_in_batches: Dataframe with batch information, as returned by simdata.include_batch_information.
+    :param reporters_config: List of reporter configurations.
+    :param unique_batches: Batch identifiers.
+    :return: List of (dev team size, dev team bandwith, reporting metrics) tuples, for the batches that are valid
+    according to is_valid_period, in the order of unique_batches.
+    """
+    batch_column = simdata.BATCH_COLUMN
+    resolved_issues = issues_in_batches[issues_in_batches[simdata.RESOLVED_IN_BATCH_COLUMN].astype(bool)]
+
+    reports_by_batch = issues_in_batches.groupby(batch_column)
+    reported_per_batch = reports_by_batch.size().to_dict()
+    first_report = reports_by_batch[simdata.CREATED_DATE_COLUMN].min().to_dict()
+    last_report = reports_by_batch[simdata.CREATED_DATE_COLUMN].max().to_dict()
+
+    resolved_by_batch = resolved_issues.groupby(batch_column)
+    resolved_per_batch = resolved_by_batch.size().to_dict()
+    time_per_batch = resolved_by_batch[simdata.RESOLUTION_TIME_COLUMN].sum().to_dict()
+    team_per_batch = resolved_issues[simdata.RESOLVER_COLUMN].astype(object).groupby(
+        resolved_issues[batch_column]).nunique().to_dict()
+
+    priority_keys = [batch_column, simdata.SIMPLE_PRIORITY_COLUMN]
+    reported_per_priority = issues_in_batches.groupby(priority_keys).size().to_dict()
+    resolved_per_priority = resolved_issues.groupby(priority_keys).size().to_dict()
+    time_per_priority = resolved_issues.groupby(priority_keys)[simdata.RESOLUTION_TIME_COLUMN].sum().to_dict()
+
+    membership = pd.DataFrame([(reporter, group_index) for group_index, config in enumerate(reporters_config)
+                               for reporter in config['reporter_list']],
+                              columns=[simdata.REPORTER_COLUMN, GROUP_INDEX_COLUMN])
+    grouped_reports = issues_in_batches[[batch_column, simdata.REPORTER_COLUMN,
+                                         simdata.RESOLVED_IN_BATCH_COLUMN]].merge(membership,
+                                                                                  on=simdata.REPORTER_COLUMN)
+    reports_by_group = grouped_reports.groupby([batch_column, GROUP_INDEX_COLUMN])
+    reported_per_group = reports_by_group.size().to_dict()
+    resolved_per_group = reports_by_group[simdata.RESOLVED_IN_BATCH_COLUMN].sum().to_dict()
+
+    batch_metrics = []
+    for batch in unique_batches:
+        true_resolved = resolved_per_batch.get(batch, 0)
+        if not is_valid_batch(true_resolved, reported_per_batch.get(batch, 0), batch):
+            continue
+
+        total_time_spent = time_per_batch.get(batch, 0.0)
+        reporting_time = (last_report[batch] - first_report[batch]).total_seconds() / simdata.TIME_FACTOR
+
+        resolution_metrics = {"results_per_priority": [],
+                              "results_per_reporter": [],
+                              'true_resolved': true_resolved,
+                              'reporting_time': reporting_time,
+                              'true_time': total_time_spent}
+
+        for priority in simdata.SUPPORTED_PRIORITIES:
+            priority_resolved = resolved_per_priority.get((batch, priority), 0)
+            priority_reported = reported_per_priority.get((batch, priority), 0)
+            time_spent_per_priority = time_per_priority.get((batch, priority), 0.0)
+
+            resolution_metrics['results_per_priority'].append(
+                {'priority': priority,
+                 'true_resolved': priority_resolved,
+                 'true_reported': priority_reported,
+                 'true_time': time_spent_per_priority,
+                 'true_time_ratio': time_spent_per_priority / float(
+                     total_time_spent) if total_time_spent > 0 else 0.0,
+                 'true_fixed_ratio': priority_resolved / float(priority_reported) if priority_reported > 0 else 0.0})
+
+        for group_index, reporter_config in enumerate(reporters_config):
+            resolution_metrics["results_per_reporter"].append(
+                {"reporter_name": reporter_config['name'],
+                 "true_resolved": int(resolved_per_group.get((batch, group_index), 0)),
+                 'true_reported': reported_per_group.get((batch, group_index), 0)})
+
+        batch_metrics.append((team_per_batch.get(batch, 0), total_time_spent, resolution_metrics))
+
+    return batch_metrics
+
+
 def consolidate_results(year_month, issues_for_period, resolved_in_month, reporters_config, simulation_metrics,
                         project_keys,
                         debug=False):
@@ -449,14 +575,13 @@ def consolidate_results(year_month, issues_for_period, resolved_in_month, report
     return simulation_result
 
 
-def get_resolution_time_gen(resolved_issues, desc=""):
+def get_resolution_time_sample(resolved_issues, desc=""):
     """
-    Generates a sample generator for resolution time.
+    Resolution times of a group of resolved issues, also stored in a CSV file.
     :param resolved_issues: Dataframe with resolved issues
     :param desc: Description of the sample
-    :return: Resolution time generator.
+    :return: Sample description and resolution time series.
     """
-
     resolution_time_sample = resolved_issues[simdata.RESOLUTION_TIME_COLUMN].dropna()
 
     logger.info("Resolution times in Training Range for " + str(desc) + ": \n" + str(resolution_time_sample.describe()))
@@ -464,11 +589,35 @@ def get_resolution_time_gen(resolved_issues, desc=""):
     description = "RESOL_TIME_" + desc
 
     file_name = "csv/" + description + ".csv"
-    resolution_time_sample.to_csv(file_name)
+    siminput.store_sample(resolution_time_sample, file_name)
     logger.info("Resolution time samples stored in " + str(file_name))
 
+    return description, resolution_time_sample
+
+
+def get_resolution_time_gen(resolved_issues, desc=""):
+    """
+    Generates a sample generator for resolution time.
+    :param resolved_issues: Dataframe with resolved issues
+    :param desc: Description of the sample
+    :return: Resolution time generator.
+    """
+
+    description, resolution_time_sample = get_resolution_time_sample(resolved_issues, desc)
+
     best_fit = siminput.launch_input_analysis(resolution_time_sample, description,
                                               show_data_plot=False, save_plot=False)
+    return get_fitted_resolution_time_gen(resolution_time_sample, best_fit, desc)
+
+
+def get_fitted_resolution_time_gen(resolution_time_sample, best_fit, desc=""):
+    """
+    Generates a sample generator for resolution time, from the distribution fitted to the sample.
+    :param resolution_time_sample: Resolution times.
+    :param best_fit: Best fit, as returned by siminput.launch_input_analysis.
+    :param desc: Description of the sample
+    :return: Resolution time generator.
+    """
     resolution_time_gen = None
 
     # According to  Modelling and Simulation Fundamentals by J. Sokolowski (Chapter 2 - Page 46)
@@ -499,7 +648,7 @@ def get_priority_change_gen(training_issues):
 
     description = "PRIORITY_CHANGE"
     file_name = "csv/" + description + ".csv"
-    change_time_sample.to_csv(file_name)
+    siminput.store_sample(change_time_sample, file_name)
     print "Priority change samples stored in ", file_name
 
     best_fit = siminput.launch_input_analysis(change_time_sample, description,
@@ -544,10 +693,24 @@ def get_simulation_input(training_issues=None, disable_ignore=False):
     most_relevant_priority = None
     most_relevant_probability = None
 
+    # The resolution times of all priorities are fitted at once.
+    descriptions = {}
+    samples = {}
     for priority in priority_sample.unique():
         if not np.isnan(priority):
             priority_resolved = all_resolved_issues[all_resolved_issues[simdata.SIMPLE_PRIORITY_COLUMN] == priority]
-            resolution_time_gen = get_resolution_time_gen(priority_resolved, desc="Priority_" + str(priority))
+            description, resolution_time_sample = get_resolution_time_sample(priority_resolved,
+                                                                             desc="Priority_" + str(priority))
+            descriptions[priority] = description
+            samples[description] = resolution_time_sample
+
+    best_fits = siminput.fit_samples(samples)
+
+    for priority in priority_sample.unique():
+        if not np.isnan(priority):
+            description = descriptions[priority]
+            resolution_time_gen = get_fitted_resolution_time_gen(samples[description], best_fits[description],
+                                                                 desc="Priority_" + str(priority))
             resolution_per_priority[priority] = resolution_time_gen
 
             priority_ignored = all_ignored_issues[all_ignored_issues[simdata.SIMPLE_PRIORITY_COLUMN] == priority]
@@ -584,7 +747,7 @@ def get_simulation_input(training_issues=None, disable_ignore=False):
     return resolution_per_priority, ignored_per_priority, priority_generator
 
 
-def get_valid_reports(project_keys, enhanced_dataframe, exclude_priority=None, exclude_self_fix=True):
+def get_valid_reports(project_keys, enhanced_dataframe=None, exclude_priority=None, exclude_self_fix=True):
     """
 
     Returns the issues valid for simulation analysis. It includes:
@@ -593,13 +756,16 @@ def get_valid_reports(project_keys, enhanced_dataframe, exclude_priority=None, e
     - Excluding self-fixes
 
     :param project_keys: Project identifiers.
-    :param enhanced_dataframe: Bug report dataframe.
+    :param enhanced_dataframe: Bug report dataframe. If None, only the partitions of the projects are loaded.
     :param exclude_priority: List of priorities to exclude.
     :param exclude_self_fix: True to exclude self fixes
     :return:
     """
     logger.info("Starting analysis for projects " + str(project_keys) + " ...")
 
+    if enhanced_dataframe is None:
+        enhanced_dataframe = dataset.load_project_reports(project_keys, exclude_self_fix=exclude_self_fix)
+
     project_bugs = simdata.filter_by_project(enhanced_dataframe, project_keys)
     logger.info("Total issues for projects " + str(project_keys) + ": " + str(len(project_bugs.index)))
 
@@ -609,8 +775,7 @@ def get_valid_reports(project_keys, enhanced_dataframe, exclude_priority=None, e
     else:
         logger.info("Self-fixes were not excluded!!")
 
-    project_reporters = project_bugs[simdata.REPORTER_COLUMN].value_counts()
-    logger.info("Total Reporters: " + str(len(project_reporters.index)))
+    logger.info("Total Reporters: " + str(project_bugs[simdata.REPORTER_COLUMN].nunique()))
 
     if exclude_priority is not None:
         project_bugs = project_bugs[project_bugs[simdata.SIMPLE_PRIORITY_COLUMN] != exclude_priority]
@@ -628,14 +793,25 @@ def is_valid_period(issues_for_period, batch=-1):
     :return: True if valid for simulation. False otherwise.
     """
 
-    tolerance = 0.0
     resolved_issues = issues_for_period[issues_for_period[simdata.RESOLVED_IN_BATCH_COLUMN]]
-    result = abs(len(resolved_issues.index) - TARGET_FIXES) <= tolerance
+    return is_valid_batch(len(resolved_issues.index), len(issues_for_period.index), batch)
+
+
+def is_valid_batch(resolved_count, reported_count, batch=-1):
+    """
+    Same rule as is_valid_period, from the report counts of the batch.
+    :param resolved_count: Reports resolved in the batch.
+    :param reported_count: Reports in the batch.
+    :param batch: Batch identifier.
+    :return: True if valid for simulation. False otherwise.
+    """
+    tolerance = 0.0
+    result = abs(resolved_count - TARGET_FIXES) <= tolerance
 
     if not result:
         logger.info(
-            "The invalid period only has " + str(len(resolved_issues.index)) + " fixes in a batch of " + str(len(
-                issues_for_period.index)) + " Identifier " + str(batch))
+            "The invalid period only has " + str(resolved_count) + " fixes in a batch of " + str(
+                reported_count) + " Identifier " + str(batch))
 
     return result
 
@@ -684,21 +860,13 @@ def get_team_training_data(training_issues, reporters_config):
 
     metrics_on_training = []
 
-    excluded_counter = 0
-    for train_batch in unique_batches:
-
-        issues_for_batch = training_in_batches[training_in_batches[simdata.BATCH_COLUMN] == train_batch]
-        if is_valid_period(issues_for_batch, train_batch):
-            dev_team_size, _, resolved_batch, dev_team_bandwith = get_dev_team_production(issues_for_batch)
-
-            dev_team_sizes.append(dev_team_size)
-            dev_team_bandwiths.append(dev_team_bandwith)
-
-            reporting_metrics = get_reporting_metrics(issues_for_batch, resolved_batch, reporters_config)
-            metrics_on_training.append(reporting_metrics)
-        else:
-            excluded_counter += 1
+    for dev_team_size, dev_team_bandwith, reporting_metrics in get_batch_metrics(training_in_batches,
+                                                                                 reporters_config, unique_batches):
+        dev_team_sizes.append(dev_team_size)
+        dev_team_bandwiths.append(dev_team_bandwith)
+        metrics_on_training.append(reporting_metrics)
 
+    excluded_counter = len(unique_batches) - len(metrics_on_training)
     print excluded_counter, " batches were excluded from a total of ", len(unique_batches)
 
     dev_team_series = pd.Series(data=dev_team_sizes)
@@ -759,7 +927,8 @@ def get_report_stream_params(training_issues, reporters_config, symmetric=False)
 
 def train_validate_simulation(project_key, max_iterations, reporters_config, training_issues, valid_issues,
                               parallel=True,
-                              prefix="", priority_queue=False, disable_ignore=False, test_issues=None):
+                              prefix="", priority_queue=False, disable_ignore=False, test_issues=None,
+                              simfunction=None):
     """
 
     Train the simulation model on a dataset and test it in another dataset.
@@ -773,11 +942,14 @@ def train_validate_simulation(project_key, max_iterations, reporters_config, tra
     :param project_key:List of projects key.
     :param keys_train:Issues in training dataset.
     :param keys_valid: Issues in the validation dataset.
+    :param simfunction: Simulation function. If None, it depends on the parallel flag.
     :return: Consolidated simulation results.
     """
 
     simulate_func = simutils.launch_simulation_parallel
-    if not parallel:
+    if simfunction is not None:
+        simulate_func = simfunction
+    elif not parallel:
         logger.info("Project " + str(project_key) + ": Disabling parallel execution ...")
         simulate_func = simutils.launch_simulation
 
@@ -853,21 +1025,10 @@ def collect_reporting_metrics(valid_issues, reporters_config, unique_batches):
     :param unique_batches:
     :return:
     """
-    metrics_on_validation = []
-
-    excluded_counter = 0
-    for valid_period in unique_batches:
-        issues_for_period = valid_issues[valid_issues[simdata.BATCH_COLUMN] == valid_period]
-
-        _, issues_resolved, resolved_in_period, dev_team_bandwith = get_dev_team_production(
-            issues_for_period)
-
-        if is_valid_period(issues_for_period, valid_period):
-            reporting_metrics = get_reporting_metrics(issues_for_period, resolved_in_period, reporters_config)
-            metrics_on_validation.append(reporting_metrics)
-        else:
-            excluded_counter += 1
+    metrics_on_validation = [reporting_metrics for _, _, reporting_metrics in
+                             get_batch_metrics(valid_issues, reporters_config, unique_batches)]
 
+    excluded_counter = len(unique_batches) - len(metrics_on_validation)
     logger.info(str(excluded_counter) + " batches where excluded from a total of " + str(len(unique_batches)))
 
     return metrics_on_validation
@@ -893,18 +1054,20 @@ def split_dataset(dataframe, set_size):
     return None, None
 
 
-def get_experiment_prefix(project_key, test_size, priority_queue=False):
+def get_experiment_prefix(project_key, test_size, priority_queue=False, disable_ignore=False):
     """
     A convenient prefix to identify an experiment instance.
     :param project_key: Projects under analysis.
     :param test_size: Size of the test dataset.
+    :param disable_ignore: True if ignored reports are disabled.
     :return: The prefix.
     """
-    return "_".join(project_key) + "_Test_" + str(test_size) + "_PRIQUEUE_" + str(priority_queue)
+    return "_".join(project_key) + "_Test_" + str(test_size) + "_PRIQUEUE_" + str(priority_queue) + "_IGNORE_" + str(
+        disable_ignore)
 
 
 def simulate_project(project_key, enhanced_dataframe, parallel=True, test_size=None, max_iterations=1000,
-                     priority_queue=False, disable_ignore=False):
+                     priority_queue=False, disable_ignore=False, simfunction=None):
     """
     Launches simulation analysis for an specific project.
     :param priority_queue: True if the developers use a priority queue, false otherwise.
@@ -912,6 +1075,7 @@ def simulate_project(project_key, enhanced_dataframe, parallel=True, test_size=N
     :param parallel: True if the replications should run in parallel, false otherwise.
     :param project_key: Project identifier.
     :param enhanced_dataframe: Dataframe with additional fields
+    :param simfunction: Simulation function. If None, it depends on the parallel flag.
     :return: None
     """
 
@@ -920,7 +1084,7 @@ def simulate_project(project_key, enhanced_dataframe, parallel=True, test_size=N
         test_size=test_size,
         valid_projects=project_key)
 
-    experiment_prefix = get_experiment_prefix(project_key, test_size, priority_queue)
+    experiment_prefix = get_experiment_prefix(project_key, test_size, priority_queue, disable_ignore)
 
     if test_size is not None:
 
@@ -933,7 +1097,8 @@ def simulate_project(project_key, enhanced_dataframe, parallel=True, test_size=N
                                                     prefix=experiment_prefix,
                                                     priority_queue=priority_queue,
                                                     disable_ignore=disable_ignore,
-                                                    test_issues=test_issues)
+                                                    test_issues=test_issues,
+                                                    simfunction=simfunction)
         if training_output is None:
             logger.info("TRAINING FAILED for Project " + str(project_key))
             return None
@@ -996,7 +1161,7 @@ def get_valid_projects(enhanced_dataframe, threshold=0.3, exclude_self_fix=True)
 
 
 def get_simulation_results(project_list, enhanced_dataframe, test_size, max_iterations, parallel, priority_queue,
-                           disable_ignore):
+                           disable_ignore, simfunction=None):
     """
     Applies the simulation and validation procedures to a project list.
     :param priority_queue: True if the development team uses a Priority Queue, false otherwise.
@@ -1005,6 +1170,7 @@ def get_simulation_results(project_list, enhanced_dataframe, test_size, max_iter
     :param test_size: Percentage of bug reports for testing.
     :param max_iterations:Iterations per simulation.
     :param parallel: True for parallel simulation execution.
+    :param simfunction: Simulation function. If None, it depends on the parallel flag.
     :return:Validation results.
     """
     simulation_output = simulate_project(project_list, enhanced_dataframe,
@@ -1012,7 +1178,8 @@ def get_simulation_results(project_list, enhanced_dataframe, test_size, max_iter
                                          max_iterations=max_iterations,
                                          parallel=parallel,
                                          priority_queue=priority_queue,
-                                         disable_ignore=disable_ignore)
+                                         disable_ignore=disable_ignore,
+                                         simfunction=simfunction)
 
     if simulation_output is None:
         return [{'test_size': test_size,
@@ -1029,21 +1196,22 @@ def get_simulation_results(project_list, enhanced_dataframe, test_size, max_iter
                              'TIME_RATIO_FROM_PRIORITY_1', 'TIME_RATIO_FROM_PRIORITY_3', 'FIX_RATIO_FROM_PRIORITY_1',
                              'FIX_RATIO_FROM_PRIORITY_3']
 
+    experiment_prefix = get_experiment_prefix(project_list, test_size, priority_queue, disable_ignore)
     results = []
     for meassure in performance_meassures:
-        column_value = get_experiment_prefix(project_list, test_size, priority_queue) + "_TRAINING_" + meassure
+        column_value = experiment_prefix + "_TRAINING_" + meassure
 
         training_series = training_results.loc[training_results['desc'] == column_value].iloc[0]
         simulation_value = training_series['sample_mean']
         training_value = training_series['population_mean']
         accept_simulation_training = training_series['ci_accept_simulation']
 
-        column_value = get_experiment_prefix(project_list, test_size, priority_queue) + "_VALIDATION_" + meassure
+        column_value = experiment_prefix + "_VALIDATION_" + meassure
         validation_series = validation_results.loc[validation_results['desc'] == column_value].iloc[0]
         validation_value = validation_series['population_mean']
         accept_simulation_validation = validation_series['ci_accept_simulation']
 
-        testing_column_value = get_experiment_prefix(project_list, test_size, priority_queue) + "_TEST_" + meassure
+        testing_column_value = experiment_prefix + "_TEST_" + meassure
         testing_series = test_results.loc[test_results['desc'] == testing_column_value].iloc[0]
         testing_value = testing_series['population_mean']
         accept_simulation_test = testing_series['ci_accept_simulation']
@@ -1062,68 +1230,143 @@ def get_simulation_results(project_list, enhanced_dataframe, test_size, max_iter
     return results
 
 
-def main():
-    logger.info("Loading information from " + simdata.ALL_ISSUES_CSV)
-    all_issues = pd.read_csv(simdata.ALL_ISSUES_CSV)
+def get_validation_cells(valid_projects, test_sizes, priority_queues, ignore_configs, consolidated=True,
+                         per_project=False):
+    """
+    Lists the independent simulation and validation runs of the analysis. Each cell is a combination of project list,
+    test size, priority queue and ignore configuration.
+
+    :param valid_projects: Projects considered in the analysis.
+    :param test_sizes: Percentages of bug reports for testing.
+    :param priority_queues: Priority queue configurations.
+    :param ignore_configs: Configurations for disabling ignored reports.
+    :param consolidated: True for including cells with all the projects together.
+    :param per_project: True for including cells for each project.
+    :return: List of cells.
+    """
+    project_lists = []
+    if consolidated:
+        project_lists.append(list(valid_projects))
+    if per_project:
+        project_lists.extend([[project] for project in valid_projects])
+
+    return [{'project_list': project_list,
+             'test_size': test_size,
+             'priority_queue': priority_queue,
+             'disable_ignore': disable_ignore} for priority_queue in priority_queues for disable_ignore in
+            ignore_configs for project_list in project_lists for test_size in test_sizes]
+
+
+def get_cell_prefix(cell):
+    """
+    :return: Prefix for the files of a validation cell.
+    """
+    return get_experiment_prefix(cell['project_list'], cell['test_size'], cell['priority_queue'],
+                                 cell['disable_ignore'])
+
+
+def run_validation_cell(cell, enhanced_dataframe=None, simfunction=None):
+    """
+    Applies the simulation and validation procedures to a validation cell. Errors are returned instead of raised, so a
+    failed cell does not abort the others.
+
+    :param cell: Validation cell, including the number of replications and the parallel flag for the simulation.
+    :param enhanced_dataframe: Bug report dataframe. If None, the reports are loaded from the shared dataset folder
+    in the cell.
+    :param simfunction: Simulation function. If None, it depends on the parallel flag of the cell.
+    :return: Cell, list of results and error description. The error is None if the cell succeeded.
+    """
+    try:
+        if enhanced_dataframe is None:
+            enhanced_dataframe = dataset.load_shared_reports(cell['shared_folder'], cell['project_list'])
+
+        results = get_simulation_results(project_list=cell['project_list'],
+                                         enhanced_dataframe=enhanced_dataframe,
+                                         test_size=cell['test_size'],
+                                         max_iterations=cell['max_iterations'],
+                                         parallel=cell['parallel'],
+                                         priority_queue=cell['priority_queue'],
+                                         disable_ignore=cell['disable_ignore'],
+                                         simfunction=simfunction)
+        return cell, [result for result in results if result is not None], None
+    except Exception:
+        return cell, [], traceback.format_exc()
+
+
+def run_validation_cells(cells, enhanced_dataframe, max_iterations, parallel=gtconfig.parallel_validation):
+    """
+    Runs all the validation cells, on a process pool if configured -see simutils.run_scenarios-. Workers read the
+    reports from a shared copy of the dataset, instead of receiving the dataframe. The results of each cell are written
+    to a CSV file as soon as it finishes.
+
+    :param cells: Validation cells, as returned by get_validation_cells.
+    :param enhanced_dataframe: Bug report dataframe.
+    :param max_iterations: Replications per simulation.
+    :param parallel: True for running the cells on a process pool.
+    :return: List of (cell, results, error) tuples, in order of completion.
+    """
+    if parallel and len(cells) > 1:
+        shared_folder = dataset.share_dataframe(enhanced_dataframe)
+        jobs = [dict(cell, shared_folder=shared_folder, max_iterations=max_iterations, parallel=False) for cell in
+                cells]
+        cell_outputs = simutils.run_scenarios(run_validation_cell, jobs, simfunction=None, parallel=True,
+                                              processes=gtconfig.validation_workers)
+    else:
+        jobs = [dict(cell, max_iterations=max_iterations, parallel=gtconfig.parallel) for cell in cells]
+        cell_outputs = simutils.run_scenarios(functools.partial(run_validation_cell,
+                                                                enhanced_dataframe=enhanced_dataframe),
+                                              jobs, simfunction=None, parallel=False, processes=None)
+
+    finished_cells = []
+    for cell, results, error in cell_outputs:
+        if error is None:
+            file_name = "csv/" + get_cell_prefix(cell) + "_cell_results.csv"
+            pd.DataFrame(results).to_csv(file_name)
+            logger.info("Validation cell " + get_cell_prefix(cell) + " finished. Results written to " + file_name)
+        else:
+            logger.error("Validation cell " + get_cell_prefix(cell) + " failed: " + error)
 
-    logger.info("Adding calculated fields...")
-    enhanced_dataframe = simdata.enhace_report_dataframe(all_issues)
+        finished_cells.append((cell, results, error))
+        logger.info(str(len(finished_cells)) + " of " + str(len(jobs)) + " validation cells finished.")
+
+    return finished_cells
+
+
+def main():
+    enhanced_dataframe = dataset.load_enhanced_dataframe()
 
     max_iterations = gtconfig.replications_per_profile
     valid_projects = get_valid_projects(enhanced_dataframe, threshold=VALID_THRESHOLD,
                                         exclude_self_fix=gtconfig.exclude_self_fix)
-    parallel = gtconfig.parallel
-    test_sizes = gtconfig.valid_test_sizes
     per_project = False
     consolidated = True
 
-    for priority_queue in gtconfig.priority_queues:
-
-        for disable_ignore in gtconfig.valid_ignore_config:
-
-            consolidated_results = []
-
-            try:
-                project_name = None
+    cells = get_validation_cells(valid_projects, gtconfig.valid_test_sizes, gtconfig.priority_queues,
+                                 gtconfig.valid_ignore_config, consolidated=consolidated, per_project=per_project)
+    finished_cells = run_validation_cells(cells, enhanced_dataframe, max_iterations)
 
-                logger.info("USING PRIORITY QUEUE? " + str(priority_queue))
+    prefix = ""
+    if consolidated:
+        prefix += "ALL_"
+    if per_project:
+        prefix += "PROJECTS_"
 
-                if consolidated:
-                    logger.info("Starting consolidated analysis ...")
-                    project_name = "ALL"
-                    for test_size in test_sizes:
-                        consolidated_results += get_simulation_results(project_list=valid_projects,
-                                                                       max_iterations=max_iterations,
-                                                                       parallel=parallel,
-                                                                       test_size=test_size,
-                                                                       enhanced_dataframe=enhanced_dataframe,
-                                                                       priority_queue=priority_queue,
-                                                                       disable_ignore=disable_ignore)
+    failed_cells = [dict(cell, error=error) for cell, _, error in finished_cells if error is not None]
+    if len(failed_cells) > 0:
+        file_name = "csv/" + prefix + "failed_validation_cells.csv"
+        pd.DataFrame(failed_cells, columns=['project_list', 'test_size', 'priority_queue', 'disable_ignore',
+                                            'error']).to_csv(file_name)
+        logger.info(str(len(failed_cells)) + " validation cells failed. Details written to " + file_name)
 
-                if per_project:
-                    logger.info("Starting per-project analysis ...")
-                    for test_size in test_sizes:
-                        for project in valid_projects:
-                            project_name = project
-                            results = get_simulation_results(project_list=[project], max_iterations=max_iterations,
-                                                             parallel=parallel,
-                                                             test_size=test_size, enhanced_dataframe=enhanced_dataframe,
-                                                             priority_queue=priority_queue)
-
-                            consolidated_results += results
+    for priority_queue in gtconfig.priority_queues:
 
-            except:
-                print "ERROR!!!!: Could not simulate ", project_name
-                traceback.print_exc()
+        for disable_ignore in gtconfig.valid_ignore_config:
 
-            consolidated_results = [result for result in consolidated_results if result is not None]
+            consolidated_results = [result for cell, results, _ in finished_cells for result in results if
+                                    cell['priority_queue'] == priority_queue and cell[
+                                        'disable_ignore'] == disable_ignore]
 
             if len(consolidated_results) > 0:
-                prefix = ""
-                if consolidated:
-                    prefix += "ALL_"
-                if per_project:
-                    prefix += "PROJECTS_"
                 results_dataframe = pd.DataFrame(consolidated_results)
                 file_name = "csv/" + prefix + str(TARGET_FIXES) + "_fixes_" + str(
                     DIFFERENCE) + "_PRIQUEUE_" + str(priority_queue) + "_IGNORE_" + str(
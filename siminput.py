@@ -1,12 +1,26 @@
 """
 This modules does the analysis required to find the probability distributions and its parameters for the simulation input
+
+Fitting the candidate distributions is independent for each distribution and each sample, so when no plot is requested
+all the fits run in parallel over a process pool. See fit_samples. Best fits are stored in a cache file, keyed by the
+sample values and the candidate distributions, so a sample already seen is not fitted again.
+
+For large samples, candidates can be screened before fitting: Moment-based estimates are checked with the
+Kolmogorov-Smirnov statistic over a fixed-size subsample, and only the best candidates get the maximum likelihood fit.
+See get_screened_candidates.
 """
+import hashlib
+import json
+import os
+
+import dataset
 import simdata
 import datetime
 import pandas as pd
 import numpy as np
 from scipy import stats
 from scipy import arange
+from pathos.multiprocessing import ProcessingPool as Pool
 
 import gtconfig
 
@@ -17,6 +31,24 @@ if not gtconfig.is_windows:
 from matplotlib import pyplot as plt
 
 
+CANDIDATE_DISTRIBUTIONS = [("uniform", stats.uniform),
+                           ("triang", stats.triang),
+                           ("norm", stats.norm),
+                           ("gamma", stats.gamma),
+                           ("lognorm", stats.lognorm),
+                           ("expon", stats.expon),
+                           ("powerlaw", stats.powerlaw)]
+
+# Candidates that include others as limiting cases. They are screened with the best statistic among them, since the
+# maximum likelihood fit can reach those limits while the moment estimates cannot.
+NESTED_CANDIDATES = {"gamma": ["norm", "expon"],
+                     "lognorm": ["norm"],
+                     "powerlaw": ["uniform"]}
+
+FITS_CACHE = "fits"
+SAMPLES_CACHE = "samples"
+
+
 # ALL_ISSUES_CSV = "C:\Users\Carlos G. Gavidia\git\github-data-miner\UNFILTERED\Release_Counter_UNFILTERED_SPARK.csv"
 
 def date_as_string(report_series):
@@ -89,7 +121,7 @@ def apply_kolmogorov_smirnov(dist_name, cdf_function, data_series, debug=False):
     return p_value
 
 
-def fit_probability_distribution(dist_name, distribution, data_series, xmin, xmax, debug=True):
+def fit_probability_distribution(dist_name, distribution, data_series, xmin, xmax, debug=True, plot=True):
     """
     Plots and fitted distribution using the maximum likelihood estimation. Also, before that the Kolmogorov-Smirnov test is
     performed.
@@ -99,39 +131,40 @@ def fit_probability_distribution(dist_name, distribution, data_series, xmin, xma
     :param data_series: Data to fit.
     :param xmin: Minimum value to plot
     :param xmax: Maximum value to plot
+    :param plot: If False, the fitted distribution is not added to the current plot.
     :return: None
     """
 
     # Distribution fitting through maximum likelihood estimation.
     parameter_tuple = distribution.fit(data_series)
 
-    if not xmin:
-        xmin = data_series.min()
-
-    if not xmax:
-        xmax = data_series.max()
-
-    x_values = arange(start=xmin, stop=xmax)
-    cdf_function = None
-
     if len(parameter_tuple) == 2:
         loc = parameter_tuple[0]
         scale = parameter_tuple[1]
-        counts = distribution.pdf(x_values, loc=loc, scale=scale) * data_series.count()
         cdf_function = lambda x: distribution.cdf(x, loc=loc, scale=scale)
+        pdf_function = lambda x: distribution.pdf(x, loc=loc, scale=scale)
 
     elif len(parameter_tuple) == 3:
         shape = parameter_tuple[0]
         loc = parameter_tuple[1]
         scale = parameter_tuple[2]
 
-        counts = distribution.pdf(x_values, shape, loc=loc,
-                                  scale=scale) * data_series.count()
         cdf_function = lambda x: distribution.cdf(x, shape, loc=loc, scale=scale)
+        pdf_function = lambda x: distribution.pdf(x, shape, loc=loc, scale=scale)
 
     ks_p_value = apply_kolmogorov_smirnov(dist_name, cdf_function, data_series)
     apply_anderson_darling(dist_name, data_series)
-    plt.plot(counts, label=dist_name)
+
+    if plot:
+        if not xmin:
+            xmin = data_series.min()
+
+        if not xmax:
+            xmax = data_series.max()
+
+        x_values = arange(start=xmin, stop=xmax)
+        counts = pdf_function(x_values) * data_series.count()
+        plt.plot(counts, label=dist_name)
 
     if debug:
         print "Fitted distribution params for ", dist_name, ": ", parameter_tuple, " ks_p_value: ", ks_p_value
@@ -142,32 +175,286 @@ def fit_probability_distribution(dist_name, distribution, data_series, xmin, xma
             "parameters": parameter_tuple}
 
 
+def get_sample_key(data_series, screening=False):
+    """
+    Identifies a sample for the fit cache, by its values and the names of the candidate distributions.
+    :param data_series: Data points.
+    :param screening: True if the candidates are screened before fitting, since the best fit can differ.
+    :return: Hexadecimal digest.
+    """
+    digest = hashlib.sha1(np.ascontiguousarray(data_series.values, dtype=np.float64).tostring())
+    digest.update(",".join([dist_name for dist_name, _ in CANDIDATE_DISTRIBUTIONS]))
+
+    if screening:
+        digest.update("screening")
+
+    return digest.hexdigest()
+
+
+def get_cache_file(kind, key, cache_folder=None):
+    """
+    The fit cache keeps one JSON file per entry, so concurrent processes never overwrite the entries of each other.
+
+    :param kind: FITS_CACHE for best fits per sample key, or SAMPLES_CACHE for the sample stored on each CSV file.
+    :param key: Entry key.
+    :param cache_folder: Cache folder. By default, the one configured on gtconfig.
+    :return: File name of the entry.
+    """
+    if cache_folder is None:
+        cache_folder = gtconfig.fit_cache_folder
+
+    return os.path.join(cache_folder, kind, key + ".json")
+
+
+def read_cache_entry(kind, key, cache_folder=None):
+    """
+    :return: Entry of the fit cache, or None if it is not stored.
+    """
+    cache_file = get_cache_file(kind, key, cache_folder)
+    if not os.path.isfile(cache_file):
+        return None
+
+    with open(cache_file) as cache_input:
+        return json.load(cache_input)
+
+
+def write_cache_entry(kind, key, entry, cache_folder=None):
+    """
+    Writes an entry of the fit cache to a temporary file first, so a reader never gets a partial file.
+    :param kind: FITS_CACHE or SAMPLES_CACHE.
+    :param key: Entry key.
+    :param entry: Dictionary to store.
+    :param cache_folder: Cache folder. By default, the one configured on gtconfig.
+    :return: None.
+    """
+    cache_file = get_cache_file(kind, key, cache_folder)
+
+    try:
+        os.makedirs(os.path.dirname(cache_file))
+    except OSError:
+        if not os.path.isdir(os.path.dirname(cache_file)):
+            raise
+
+    temporary_file = cache_file + "." + str(os.getpid()) + ".tmp"
+    with open(temporary_file, "w") as cache_output:
+        json.dump(entry, cache_output)
+
+    os.rename(temporary_file, cache_file)
+
+
+def store_sample(data_series, file_name):
+    """
+    Writes a sample to a CSV file, unless the file already contains the same values according to the fit cache.
+    :param data_series: Data points.
+    :param file_name: CSV file.
+    :return: None.
+    """
+    sample_key = get_sample_key(data_series)
+    file_key = hashlib.sha1(file_name).hexdigest()
+
+    if gtconfig.use_fit_cache and os.path.isfile(file_name):
+        stored_sample = read_cache_entry(SAMPLES_CACHE, file_key)
+        if stored_sample is not None and stored_sample["sample_key"] == sample_key:
+            return
+
+    data_series.to_csv(file_name)
+
+    if gtconfig.use_fit_cache:
+        write_cache_entry(SAMPLES_CACHE, file_key, {"file_name": file_name, "sample_key": sample_key})
+
+
+def get_screening_parameters(dist_name, values):
+    """
+    Cheap parameter estimates for a candidate distribution, based on sample moments and extremes. They are only used to
+    discard implausible candidates before the maximum likelihood fit.
+
+    :param dist_name: Distribution name, as in CANDIDATE_DISTRIBUTIONS.
+    :param values: Array of data points.
+    :return: Tuple of parameters, in the order expected by scipy. None if no estimate is possible.
+    """
+    minimum, maximum = values.min(), values.max()
+    mean, deviation = values.mean(), values.std()
+    value_range = maximum - minimum
+
+    if value_range <= 0 or deviation <= 0:
+        return None
+
+    if dist_name == "uniform":
+        return minimum, value_range
+    if dist_name == "triang":
+        mode_position = np.clip((3 * mean - 2 * minimum - maximum) / value_range, 0.0, 1.0)
+        return mode_position, minimum, value_range
+    if dist_name == "norm":
+        return mean, deviation
+    if dist_name == "expon":
+        return minimum, mean - minimum
+    if dist_name == "gamma":
+        skewness = stats.skew(values)
+        if skewness <= 0:
+            return None
+        shape = 4.0 / skewness ** 2
+        scale = deviation / np.sqrt(shape)
+        return shape, mean - shape * scale, scale
+    if dist_name == "lognorm":
+        loc = min(0.0, minimum - value_range * 1e-3)
+        log_values = np.log(values - loc)
+        return log_values.std(), loc, np.exp(log_values.mean())
+    if dist_name == "powerlaw":
+        normalized_mean = (mean - minimum) / value_range
+        return normalized_mean / (1 - normalized_mean), minimum, value_range
+
+    return None
+
+
+def get_screened_candidates(data_series, candidates=None, subsample_size=None):
+    """
+    Ranks the candidate distributions by the Kolmogorov-Smirnov statistic of their screening estimates over a random
+    subsample, so the cost does not depend on the sample size.
+
+    :param data_series: Data points.
+    :param candidates: Number of candidates to keep. By default, the one configured on gtconfig.
+    :param subsample_size: Size of the subsample. By default, the one configured on gtconfig.
+    :return: List of indexes on CANDIDATE_DISTRIBUTIONS, best first.
+    """
+    if candidates is None:
+        candidates = gtconfig.screening_candidates
+    if subsample_size is None:
+        subsample_size = gtconfig.screening_subsample
+
+    values = data_series.values.astype(float)
+    if len(values) > subsample_size:
+        values = np.random.RandomState(0).choice(values, size=subsample_size, replace=False)
+
+    statistics = {}
+    for dist_name, distribution in CANDIDATE_DISTRIBUTIONS:
+        parameters = get_screening_parameters(dist_name, values)
+        statistic = np.inf
+
+        if parameters is not None:
+            with np.errstate(all="ignore"):
+                statistic, _ = stats.kstest(values, lambda x: distribution.cdf(x, *parameters))
+            if np.isnan(statistic):
+                statistic = np.inf
+
+        statistics[dist_name] = statistic
+
+    ranking = []
+    for candidate_index, (dist_name, _) in enumerate(CANDIDATE_DISTRIBUTIONS):
+        statistic = min([statistics[dist_name]] + [statistics[nested_name] for nested_name in
+                                                   NESTED_CANDIDATES.get(dist_name, [])])
+        ranking.append((statistic, candidate_index))
+
+    return [candidate_index for _, candidate_index in sorted(ranking)[:candidates]]
+
+
+def fit_candidate(fitting_job):
+    """
+    Fits one candidate distribution to a sample, without plotting. It runs on the worker processes of fit_samples.
+    :param fitting_job: Tuple with the sample description, the candidate index and the sample values.
+    :return: Sample description and fitting results.
+    """
+    desc, candidate_index, sample_values = fitting_job
+    dist_name, distribution = CANDIDATE_DISTRIBUTIONS[candidate_index]
+
+    return desc, fit_probability_distribution(dist_name, distribution, pd.Series(sample_values), None, None,
+                                              plot=False)
+
+
+def fit_samples(samples, parallel=None, screening=gtconfig.screen_candidates):
+    """
+    Fits all the candidate distributions to several samples, and selects the best fit for each according to the
+    Kolmogorov-Smirnov p-value. Each pair of sample and candidate distribution is a job for the process pool.
+
+    Samples found on the fit cache are not fitted again, if the cache is enabled on gtconfig. With screening, samples
+    larger than the screening subsample are only fitted to the candidates kept by get_screened_candidates.
+
+    :param samples: Dictionary of sample descriptions to data series.
+    :param parallel: True for fitting on a process pool. False for fitting one after another. By default, the value
+    configured on gtconfig.
+    :param screening: True for screening the candidates of large samples before fitting.
+    :return: Dictionary of sample descriptions to the best fit.
+    """
+    if parallel is None:
+        parallel = gtconfig.parallel_fitting
+
+    distributions = dict(CANDIDATE_DISTRIBUTIONS)
+
+    screened = {desc: screening and len(data_series.index) > gtconfig.screening_subsample for desc, data_series in
+                samples.iteritems()}
+    sample_keys = {desc: get_sample_key(data_series, screened[desc]) for desc, data_series in samples.iteritems()}
+    best_fits = {}
+    for desc, sample_key in sample_keys.iteritems():
+        cached_fit = read_cache_entry(FITS_CACHE, sample_key) if gtconfig.use_fit_cache else None
+        if cached_fit is not None:
+            best_fits[desc] = {"dist_name": cached_fit["dist_name"],
+                               "ks_p_value": cached_fit["ks_p_value"],
+                               "distribution": distributions[cached_fit["dist_name"]],
+                               "parameters": tuple(cached_fit["parameters"])}
+
+    if len(best_fits) == len(samples):
+        return best_fits
+
+    fitting_jobs = []
+    for desc, data_series in samples.iteritems():
+        if desc in best_fits:
+            continue
+
+        candidate_indexes = range(len(CANDIDATE_DISTRIBUTIONS))
+        if screened[desc]:
+            candidate_indexes = get_screened_candidates(data_series)
+
+        fitting_jobs.extend([(desc, candidate_index, data_series.values) for candidate_index in candidate_indexes])
+
+    if parallel and len(fitting_jobs) > 1:
+        pool = Pool(processes=gtconfig.fitting_workers)
+        try:
+            fitting_results = pool.map(fit_candidate, fitting_jobs)
+        finally:
+            pool.close()
+            pool.join()
+            pool.clear()
+    else:
+        fitting_results = map(fit_candidate, fitting_jobs)
+
+    fits_per_sample = {}
+    for desc, fit in fitting_results:
+        fits_per_sample.setdefault(desc, []).append(fit)
+
+    for desc, fits in fits_per_sample.iteritems():
+        best_fit = max(fits, key=lambda dist: dist["ks_p_value"])
+        best_fits[desc] = best_fit
+
+        if gtconfig.use_fit_cache:
+            write_cache_entry(FITS_CACHE, sample_keys[desc], {"dist_name": best_fit["dist_name"],
+                                                              "ks_p_value": best_fit["ks_p_value"],
+                                                              "parameters": list(best_fit["parameters"])})
+
+    return best_fits
+
+
 def launch_input_analysis(data_series, desc="default", show_data_plot=True, save_plot=True):
     """
     The input analysis includes the following activities: Show data statistics, plot an histogram of the data points,
     fit theoretical distributions, start a ks-test of the fitted distribution, plot the theoretical distributions.
 
+    When no plot is requested, the distributions are fitted in parallel through fit_samples.
+
     :param desc: Series description, for file generation analysis.
     :param data_series: Data points.
     :param show_data_plot: True for showing the plot, false otherwise.
     :return: None.
     """
+    if not show_data_plot and not save_plot:
+        return fit_samples({desc: data_series})[desc]
+
     xmin = None
     xmax = None
 
-    if show_data_plot or save_plot:
-        plt.clf()
-        plot_empirical_data(data_series)
-
-    p_values = []
+    plt.clf()
+    plot_empirical_data(data_series)
 
-    p_values.append(fit_probability_distribution("uniform", stats.uniform, data_series, xmin, xmax))
-    p_values.append(fit_probability_distribution("triang", stats.triang, data_series, xmin, xmax))
-    p_values.append(fit_probability_distribution("norm", stats.norm, data_series, xmin, xmax))
-    p_values.append(fit_probability_distribution("gamma", stats.gamma, data_series, xmin, xmax))
-    p_values.append(fit_probability_distribution("lognorm", stats.lognorm, data_series, xmin, xmax))
-    p_values.append(fit_probability_distribution("expon", stats.expon, data_series, xmin, xmax))
-    p_values.append(fit_probability_distribution("powerlaw", stats.powerlaw, data_series, xmin, xmax))
+    p_values = [fit_probability_distribution(dist_name, distribution, data_series, xmin, xmax) for
+                dist_name, distribution in CANDIDATE_DISTRIBUTIONS]
 
     plt.legend(loc='upper right')
 
@@ -193,8 +480,7 @@ def get_discrete_distribution(data_series):
 
 
 def main():
-    dataframe = pd.read_csv(simdata.ALL_ISSUES_CSV)
-    dataframe = simdata.enhace_report_dataframe(dataframe)
+    dataframe = dataset.load_enhanced_dataframe()
 
     print "Original dataframe issues ", len(dataframe.index)
 
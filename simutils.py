@@ -3,6 +3,7 @@ Utility types for supporting the simulation.
 """
 from collections import defaultdict
 
+import functools
 import sys
 
 import math
@@ -41,6 +42,9 @@ from matplotlib import pyplot as plt
 MINIMUM_OBSERVATIONS = 3
 EPSILON = 0.001
 
+# Distance between the block ids of scenarios simulated concurrently, so their replications do not share seeds.
+SCENARIO_BLOCK_OFFSET = 10000
+
 REPORTER_COLUMNS = [simmodel.NON_SEVERE_INFLATED_COLUMN, simmodel.SEVERE_DEFLATED_COLUMN]
 
 logger = gtconfig.get_logger("simulation_utils", "simulation_utils.txt", level=logging.INFO)
@@ -966,6 +970,55 @@ def launch_simulation_wrapper(input_params):
     return simulation_results
 
 
+def run_scenario_job(job):
+    """
+    Runs a scenario on a pool worker. Pool workers cannot start pools of their own, so input fitting and replications
+    run on a single core.
+    :param job: Tuple of scenario runner, scenario and simulation function.
+    :return: Output of the scenario runner.
+    """
+    scenario_runner, scenario, simfunction = job
+    gtconfig.parallel_fitting = False
+
+    return scenario_runner(scenario, simfunction=simfunction)
+
+
+def run_scenarios(scenario_runner, scenarios, simfunction, parallel, processes):
+    """
+    Runs independent scenarios, one after another or concurrently on a process pool. Each scenario is passed to the
+    runner together with the simulation function to use.
+
+    On a process pool, the simulation function provided is not used: Each scenario runs its replications with
+    launch_simulation on its worker, with a block id of its own so scenarios starting at the same second do not share
+    seeds.
+
+    :param scenario_runner: Function receiving a scenario and a simfunction keyword argument.
+    :param scenarios: List of scenarios.
+    :param simfunction: Simulation function, for sequential execution.
+    :param parallel: True for running the scenarios on a process pool.
+    :param processes: Number of pool workers.
+    :return: Generator of the runner outputs, in order of completion.
+    """
+    if not parallel or len(scenarios) <= 1:
+        for scenario in scenarios:
+            yield scenario_runner(scenario, simfunction=simfunction)
+        return
+
+    logger.info("Running " + str(len(scenarios)) + " scenarios IN PARALLEL, using " + str(processes) + " workers.")
+    jobs = [(scenario_runner, scenario,
+             functools.partial(launch_simulation, show_progress=False, block_id=index * SCENARIO_BLOCK_OFFSET)) for
+            index, scenario in enumerate(scenarios)]
+
+    pool = Pool(processes=processes)
+    try:
+        for output in pool.uimap(run_scenario_job, jobs):
+            yield output
+    finally:
+        pool.close()
+        pool.join()
+        pool.clear()
+
+
 def print_strategy_report(reporters_config):
     """
     Informative information regarding the strategies adopted by the reporters
@@ -0,0 +1,178 @@
+"""
+This module runs several Gambit equilibrium calculations at the same time. Solvers are launched as subprocesses, so
+the simulation of the next scenario can proceed while the games of previous scenarios are being solved. A background
+thread launches queued games, enforces the timeout and reaps finished solvers while the simulation is running.
+"""
+
+import logging
+import multiprocessing
+import subprocess
+import tempfile
+import threading
+import time
+
+import gtutils
+import gtconfig
+
+logger = gtconfig.get_logger("solver_scheduler", "solver_scheduler.txt", level=logging.INFO)
+
+
+class SolverScheduler:
+    """
+    Keeps a bounded number of Gambit processes running, and delivers their equilibria through callbacks. Processes are
+    serviced from a background thread, but callbacks are executed on the calling thread, while submitting new games or
+    waiting for the pending ones. Call shutdown when done, so no solver process outlives the scheduler.
+    """
+
+    def __init__(self, max_workers=None, timeout=None, poll_interval=1.0):
+        """
+        :param max_workers: Maximum number of concurrent solvers. By default, the number of cores.
+        :param timeout: Seconds before a solver process is killed. None for no timeout.
+        :param poll_interval: Seconds between status checks.
+        """
+        self.max_workers = max_workers if max_workers is not None else multiprocessing.cpu_count()
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+
+        self.queued = []
+        self.running = []
+        self.finished = []
+
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.service_thread = threading.Thread(target=self.service)
+        self.service_thread.daemon = True
+        self.service_thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.shutdown()
+
+    def get_command_line(self, solve_request):
+        return gtutils.get_solver_command(solve_request['gambit_file'], solve_request['all_equilibria'])
+
+    def submit(self, strategies_catalog, gambit_file, callback, all_equilibria=True):
+        """
+        Schedules the calculation of the equilibria of a game.
+
+        :param strategies_catalog: Catalog of available strategies.
+        :param gambit_file: NFG file containing the game.
+        :param callback: Function that receives the list of equilibrium profiles, or None if the solver timed out.
+        :param all_equilibria: True for enumerating all equilibria. Only one is found otherwise.
+        :return: None.
+        """
+        logger.info("Scheduling equilibrium calculation for " + gambit_file)
+        with self.lock:
+            self.queued.append({'strategies_catalog': strategies_catalog,
+                                'gambit_file': gambit_file,
+                                'callback': callback,
+                                'all_equilibria': all_equilibria})
+        self.poll()
+
+    def launch(self, solve_request):
+        output_file = tempfile.TemporaryFile()
+
+        solve_request['output_file'] = output_file
+        solve_request['process'] = subprocess.Popen(self.get_command_line(solve_request), stdout=output_file)
+        solve_request['start_time'] = time.time()
+
+        self.running.append(solve_request)
+
+    def reap(self, solve_request):
+        """
+        Kills the solver if it is still running, and reads its equilibria.
+        """
+        output_file = solve_request['output_file']
+
+        if solve_request['process'].poll() is None:
+            solve_request['process'].kill()
+            solve_request['process'].wait()
+            logger.error("Solver for " + solve_request['gambit_file'] + " timed out after " + str(
+                self.timeout) + " seconds.")
+            solve_request['equilibrium_list'] = None
+        else:
+            output_file.seek(0)
+            solve_request['equilibrium_list'] = gtutils.parse_equilibria(solve_request['strategies_catalog'],
+                                                                         output_file.readlines())
+            logger.info("Solver for " + solve_request['gambit_file'] + " finished after " + str(
+                time.time() - solve_request['start_time']) + " seconds. Equilibria found: " + str(
+                len(solve_request['equilibrium_list'])))
+
+        output_file.close()
+        self.finished.append(solve_request)
+
+    def update(self):
+        """
+        Reaps finished solvers, kills the ones past the timeout and launches queued games on the available slots.
+        Called with the lock held.
+        """
+        still_running = []
+
+        for solve_request in self.running:
+            elapsed_time = time.time() - solve_request['start_time']
+
+            if solve_request['process'].poll() is not None or (
+                    self.timeout is not None and elapsed_time > self.timeout):
+                self.reap(solve_request)
+            else:
+                still_running.append(solve_request)
+
+        self.running = still_running
+
+        while len(self.queued) > 0 and len(self.running) < self.max_workers:
+            self.launch(self.queued.pop(0))
+
+    def service(self):
+        """
+        Body of the background thread.
+        """
+        while not self.stopped.wait(self.poll_interval):
+            with self.lock:
+                self.update()
+
+    def poll(self):
+        """
+        Updates the solvers and delivers the results of the finished ones.
+
+        :return: Number of games not solved yet.
+        """
+        with self.lock:
+            self.update()
+            finished = self.finished
+            self.finished = []
+            pending = len(self.queued) + len(self.running)
+
+        for solve_request in finished:
+            solve_request['callback'](solve_request['equilibrium_list'])
+
+        return pending
+
+    def wait(self):
+        """
+        Blocks until all the submitted games are solved.
+        :return: None.
+        """
+        while self.poll() > 0:
+            time.sleep(self.poll_interval)
+
+    def shutdown(self):
+        """
+        Stops the background thread, and kills the solvers still running. Their games, and the queued ones, are not
+        delivered.
+        :return: None.
+        """
+        self.stopped.set()
+        self.service_thread.join()
+
+        with self.lock:
+            for solve_request in self.running:
+                if solve_request['process'].poll() is None:
+                    logger.error("Killing solver for " + solve_request['gambit_file'])
+                    solve_request['process'].kill()
+                    solve_request['process'].wait()
+                solve_request['output_file'].close()
+
+            self.running = []
+            self.queued = []
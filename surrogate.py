@@ -0,0 +1,221 @@
+"""
+This module reduces the number of strategy profiles to simulate, through a surrogate model of the payoff function. A
+Gaussian Process is fitted over the inflation and deflation probabilities of the strategies in a profile, using an
+initial sample of simulated profiles. The remaining cells of the payoff matrix are predicted, and a profile is only
+simulated if its prediction uncertainty could change the equilibria found.
+"""
+
+import fractions
+import itertools
+import logging
+import math
+
+import numpy as np
+import scipy.stats as st
+from sklearn.gaussian_process import GaussianProcessRegressor
+from sklearn.gaussian_process.kernels import ConstantKernel, RBF, WhiteKernel
+
+import eqverification
+import gtutils
+import gtconfig
+import payoffstore
+
+logger = gtconfig.get_logger("surrogate_model", "surrogate_model.txt", level=logging.INFO)
+
+
+def get_profile_features(strategy_map, team, teams):
+    """
+    Features of a team payoff: The inflation and deflation probabilities of its strategy, and the average ones of the
+    other teams.
+
+    :param strategy_map: Map containing the strategy per team.
+    :param team: Team whose payoff is of interest.
+    :param teams: Number of teams in the game.
+    :return: List of features.
+    """
+    opponents = [strategy_map[opponent] for opponent in range(teams) if opponent != team]
+
+    return [strategy_map[team].inflation_prob, strategy_map[team].deflation_prob,
+            np.mean([strategy.inflation_prob for strategy in opponents]),
+            np.mean([strategy.deflation_prob for strategy in opponents])]
+
+
+def fit_surrogate(strategy_maps, teams, payoff_store):
+    """
+    Fits a Gaussian Process over the simulated profiles. Since the game is symmetric, a single model is used for all
+    the teams.
+
+    :param strategy_maps: Strategy maps of the simulated profiles.
+    :param teams: Number of teams in the game.
+    :param payoff_store: Payoff store containing the simulated profiles.
+    :return: The fitted model.
+    """
+    features = []
+    payoffs = []
+
+    for strategy_map in strategy_maps:
+        profile_payoffs = payoff_store.get_payoffs(payoffstore.get_profile_key(strategy_map, teams))
+
+        for team in range(teams):
+            features.append(get_profile_features(strategy_map, team, teams))
+            payoffs.append(profile_payoffs[team])
+
+    kernel = ConstantKernel() * RBF(length_scale=np.ones(len(features[0]))) + WhiteKernel()
+    model = GaussianProcessRegressor(kernel=kernel, normalize_y=True, n_restarts_optimizer=2, random_state=0)
+    model.fit(np.array(features), np.array(payoffs))
+
+    logger.info("Surrogate model fitted over " + str(len(strategy_maps)) + " profiles. Kernel: " + str(model.kernel_))
+    return model
+
+
+def predict_payoffs(model, strategy_map, teams):
+    """
+    Predicts the payoff per team of a profile.
+    :return: List of payoff predictions and list of standard deviations, per team.
+    """
+    features = np.array([get_profile_features(strategy_map, team, teams) for team in range(teams)])
+    means, deviations = model.predict(features, return_std=True)
+
+    return list(means), list(deviations)
+
+
+def get_critical_profiles(equilibrium_list, strategies_catalog, teams, payoff_store, model, z_value,
+                          regret_threshold):
+    """
+    Identifies the profiles not simulated that could change the equilibria: The ones on the support of an equilibrium,
+    and the ones involved on deviations that could be beneficial given the prediction uncertainty.
+
+    :return: Map of profile keys to strategy maps.
+    """
+    strategies_by_name = {strategy.name: strategy for strategy in strategies_catalog}
+    critical_profiles = {}
+
+    def add_if_predicted(profile_key, strategy_map):
+        if not payoff_store.contains(profile_key):
+            critical_profiles[profile_key] = strategy_map
+
+    for equilibrium_profile in equilibrium_list:
+        supports = [gtutils.get_support(equilibrium_profile[team]) for team in range(teams)]
+        for support_profile in itertools.product(*supports):
+            strategy_map = {team: strategies_by_name[strategy_name] for team, (strategy_name, _) in
+                            enumerate(support_profile)}
+            add_if_predicted(payoffstore.get_profile_key(strategy_map, teams), strategy_map)
+
+        for team in range(teams):
+            support_names = [strategy_name for strategy_name, _ in supports[team]]
+
+            for deviation in [strategy for strategy in strategies_catalog if strategy.name not in support_names]:
+                weights = eqverification.get_deviation_weights(equilibrium_profile, team, deviation,
+                                                               strategies_catalog, teams)
+                gain = 0.0
+                variance = 0.0
+                predicted_cells = []
+
+                for profile_key, (strategy_map, weight) in weights.iteritems():
+                    if payoff_store.contains(profile_key):
+                        gain += weight * payoff_store.get_payoffs(profile_key)[team]
+                    else:
+                        means, deviations = predict_payoffs(model, strategy_map, teams)
+                        gain += weight * means[team]
+                        variance += (weight * deviations[team]) ** 2
+                        predicted_cells.append((profile_key, strategy_map))
+
+                if len(predicted_cells) > 0 and gain + z_value * math.sqrt(variance) > regret_threshold:
+                    for profile_key, strategy_map in predicted_cells:
+                        add_if_predicted(profile_key, strategy_map)
+
+    return critical_profiles
+
+
+def prune_profiles(strategy_maps, strategies_catalog, teams, payoff_store, payoff_oracle, equilibrium_solver,
+                   initial_profiles=10, confidence=0.95, regret_threshold=0.0, max_rounds=20, seed=0):
+    """
+    Finds the equilibria of the game simulating only an initial sample of profiles, plus the ones whose predictions
+    are critical for the equilibria found.
+
+    :param strategy_maps: Strategy maps of all the profiles in the game.
+    :param strategies_catalog: Catalog of available strategies.
+    :param teams: Number of teams in the game.
+    :param payoff_store: Payoff store instance.
+    :param payoff_oracle: Function that receives a strategy map and returns the payoffs per team, simulating the
+    profile if it is not on the payoff store.
+    :param equilibrium_solver: Function that receives a function providing the payoffs per strategy map, and returns
+    the equilibria of the complete game.
+    :param initial_profiles: Number of profiles simulated before fitting the model.
+    :param confidence: Confidence level for the prediction intervals.
+    :param regret_threshold: Deviations with a gain below this value are not considered beneficial.
+    :param max_rounds: Maximum number of fit-solve-simulate rounds.
+    :return: List of equilibrium profiles.
+    """
+    z_value = st.norm.ppf(1 - (1 - confidence) / 2.0)
+    random_state = np.random.RandomState(seed)
+
+    sample_indexes = random_state.choice(len(strategy_maps), size=min(initial_profiles, len(strategy_maps)),
+                                         replace=False)
+    for index in sample_indexes:
+        payoff_oracle(strategy_maps[index])
+
+    def solve_with_surrogate():
+        simulated_maps = [strategy_map for strategy_map in strategy_maps if
+                          payoff_store.contains(payoffstore.get_profile_key(strategy_map, teams))]
+        model = fit_surrogate(simulated_maps, teams, payoff_store)
+
+        def surrogate_oracle(strategy_map):
+            profile_key = payoffstore.get_profile_key(strategy_map, teams)
+            if payoff_store.contains(profile_key):
+                return payoff_store.get_payoffs(profile_key)
+
+            means, _ = predict_payoffs(model, strategy_map, teams)
+            return means
+
+        return model, simulated_maps, equilibrium_solver(surrogate_oracle)
+
+    for surrogate_round in range(max_rounds):
+        model, simulated_maps, equilibrium_list = solve_with_surrogate()
+        critical_profiles = get_critical_profiles(equilibrium_list, strategies_catalog, teams, payoff_store, model,
+                                                  z_value, regret_threshold)
+
+        logger.info("Surrogate round " + str(surrogate_round + 1) + ": " + str(len(simulated_maps)) + " of " + str(
+            len(strategy_maps)) + " profiles simulated. Equilibria: " + str(len(equilibrium_list)) +
+                    ". Critical predicted profiles: " + str(len(critical_profiles)))
+
+        if len(critical_profiles) == 0:
+            return equilibrium_list
+
+        for strategy_map in critical_profiles.values():
+            payoff_oracle(strategy_map)
+
+    logger.info("Maximum number of surrogate rounds reached. Solving with the profiles simulated on the last round.")
+    _, _, equilibrium_list = solve_with_surrogate()
+    return equilibrium_list
+
+
+def is_same_equilibrium(equilibrium_profile, other_profile, tolerance):
+    """
+    Compares two equilibrium profiles, strategy probability by strategy probability.
+    :return: True if no probability differs more than the tolerance.
+    """
+    for team, strategy_probabilities in equilibrium_profile.iteritems():
+        for strategy_name, probability in strategy_probabilities.iteritems():
+            other_probability = other_profile.get(team, {}).get(strategy_name, "0")
+            if abs(float(fractions.Fraction(probability)) - float(fractions.Fraction(other_probability))) > tolerance:
+                return False
+
+    return True
+
+
+def get_equilibria_agreement(equilibrium_list, reference_list, tolerance=0.05):
+    """
+    Measures how many equilibria of a reference list are also found on another list, and vice versa.
+
+    :param equilibrium_list: Equilibria obtained with the surrogate model.
+    :param reference_list: Equilibria obtained through exhaustive simulation.
+    :param tolerance: Maximum difference in probability for considering two equilibria the same.
+    :return: Ratio of reference equilibria found, and ratio of equilibria confirmed by the reference.
+    """
+    recall = np.mean([any([is_same_equilibrium(reference, profile, tolerance) for profile in equilibrium_list]) for
+                      reference in reference_list]) if len(reference_list) > 0 else 1.0
+    precision = np.mean([any([is_same_equilibrium(profile, reference, tolerance) for reference in reference_list])
+                         for profile in equilibrium_list]) if len(equilibrium_list) > 0 else 1.0
+
+    return recall, precision
@@ -14,6 +14,7 @@ import time
 import gtconfig
 import payoffgetter
 import eqcatalog
+import dataset
 import simdata
 import simdriver
 import simmodel
@@ -202,11 +203,7 @@ def gather_experiment_inputs(priority_queue):
     It gathers all the data items needed for the performance measure experiments.
     :return: Base simulation configuration, simulation function, simulation inputs and empirical strategy profile.
     """
-    logger.info("Loading information from " + simdata.ALL_ISSUES_CSV)
-    all_issues = pd.read_csv(simdata.ALL_ISSUES_CSV)
-
-    logger.info("Adding calculated fields...")
-    enhanced_dataframe = simdata.enhace_report_dataframe(all_issues)
+    enhanced_dataframe = dataset.load_enhanced_dataframe()
 
     all_valid_projects = simdriver.get_valid_projects(enhanced_dataframe, exclude_self_fix=gtconfig.exclude_self_fix)
 
@@ -0,0 +1,234 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import dataset
+import simdata
+
+
+class TestDatasetSnapshot(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.source_csv = os.path.join(self.directory, "issues.csv")
+
+        with open(self.source_csv, "w") as source_file:
+            source_file.write("Issue Key,Creation Date,JIRA Resolved Date,Priority Change Date,Priority,"
+                              "Original Priority,New Priority,Status,Resolution,Commits,Reported By,"
+                              "JIRA Resolved By,Priority Changer,Summary\n")
+            source_file.write("A-1,2016-01-01 10:00:00,2016-01-02 10:00:00,,Major,Major,,Closed,Fixed,1,ana,ana,,"
+                              "Crash\n")
+            source_file.write("A-2,2016-02-01 10:00:00,,2016-02-01 12:00:00,Blocker,Major,Blocker,Open,,0,bob,,ana,"
+                              "Leak\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def get_metadata(self):
+        _, metadata_file = dataset.get_snapshot_files(self.source_csv, self.directory)
+        with open(metadata_file) as metadata_input:
+            return json.load(metadata_input)
+
+    def test_snapshot_is_reused(self):
+        enhanced_dataframe = dataset.load_enhanced_dataframe(self.source_csv, self.directory)
+        self.assertTrue(dataset.is_snapshot_valid(self.get_metadata(), self.source_csv))
+
+        loaded_dataframe = dataset.load_enhanced_dataframe(self.source_csv, self.directory)
+        self.assertEqual(list(enhanced_dataframe.columns), list(loaded_dataframe.columns))
+        self.assertEqual([24.0], list(loaded_dataframe["Resolution Time"].dropna()))
+        self.assertEqual(["2016-01", "2016-02"], list(loaded_dataframe["Month"]))
+
+    def test_snapshot_is_invalidated(self):
+        dataset.load_enhanced_dataframe(self.source_csv, self.directory)
+
+        with open(self.source_csv, "a") as source_file:
+            source_file.write("A-3,2016-03-01 10:00:00,,,Minor,Minor,,Open,,0,ana,,,Typo\n")
+
+        self.assertFalse(dataset.is_snapshot_valid(self.get_metadata(), self.source_csv))
+        self.assertEqual(3, len(dataset.load_enhanced_dataframe(self.source_csv, self.directory).index))
+
+    def test_touched_source_is_checked_by_hash(self):
+        dataset.load_enhanced_dataframe(self.source_csv, self.directory)
+        os.utime(self.source_csv, (0, 0))
+
+        self.assertTrue(dataset.is_snapshot_valid(self.get_metadata(), self.source_csv))
+
+    def test_compact_ingestion(self):
+        all_issues = dataset.read_issues(self.source_csv)
+
+        self.assertNotIn("Summary", all_issues.columns)
+        self.assertEqual("category", str(all_issues["Status"].dtype))
+        self.assertEqual("int8", str(all_issues["Commits"].dtype))
+
+        enhanced_dataframe = simdata.enhace_report_dataframe(all_issues)
+        self.assertEqual(["A-2"], list(simdata.exclude_self_fixes(enhanced_dataframe)["Issue Key"]))
+        self.assertEqual(["A-2"], list(simdata.get_modified_priority_bugs(enhanced_dataframe)["Issue Key"]))
+        self.assertEqual(["A-1"], list(simdata.filter_resolved(enhanced_dataframe)["Issue Key"]))
+
+    def test_partitions(self):
+        partition_folder = os.path.join(self.directory, "partitions")
+
+        with open(self.source_csv) as source_file:
+            lines = source_file.readlines()
+        with open(self.source_csv, "w") as source_file:
+            source_file.write(lines[0].replace("Issue Key,", "Issue Key,Project Key,"))
+            for index, line in enumerate(lines[1:]):
+                source_file.write(line.replace(",", "," + ("A" if index == 0 else "B") + ",", 1))
+            source_file.write("A-3,A,2016-03-01 10:00:00,,,Minor,Minor,,Open,,0,carl,,,Typo\n")
+
+        metadata = dataset.build_partitions(self.source_csv, partition_folder, exclude_self_fix=True, chunk_size=1)
+        self.assertEqual(["A", "B"], sorted(metadata["projects"].keys()))
+
+        project_reports = dataset.load_project_reports(["A"], self.source_csv, partition_folder,
+                                                       exclude_self_fix=True)
+        self.assertEqual(["A-3"], list(project_reports["Issue Key"]))
+        self.assertEqual("category", str(project_reports["Reported By"].dtype))
+        self.assertEqual(2, len(dataset.load_project_reports(["A", "B"], self.source_csv, partition_folder,
+                                                             exclude_self_fix=True).index))
+
+    def test_partitions_with_different_offsets(self):
+        partition_folder = os.path.join(self.directory, "partitions")
+
+        with open(self.source_csv, "w") as source_file:
+            source_file.write("Issue Key,Project Key,Creation Date,JIRA Resolved Date,Priority Change Date,Priority,"
+                              "Original Priority,New Priority,Status,Resolution,Commits,Reported By,"
+                              "JIRA Resolved By,Priority Changer\n")
+            source_file.write("A-1,A,2016-01-31T22:00:00.000-0800,,,Major,Major,,Open,,0,ana,,\n")
+            source_file.write("A-2,A,2016-04-30T20:00:00.000-0700,,,Major,Major,,Open,,0,bob,,\n")
+            source_file.write("A-3,A,2016-05-01T20:00:00.000-0700,,,Major,Major,,Closed,Fixed,1,bob,bob,\n")
+
+        dataset.build_partitions(self.source_csv, partition_folder, project_keys=["B"], exclude_self_fix=True,
+                                 chunk_size=2)
+        project_reports = dataset.load_project_reports(["A"], self.source_csv, partition_folder,
+                                                       exclude_self_fix=False)
+
+        self.assertEqual(["A-1", "A-2", "A-3"], list(project_reports["Issue Key"]))
+        self.assertEqual("datetime64[ns, UTC]", str(project_reports[simdata.CREATED_DATE_COLUMN].dtype))
+        self.assertEqual(["2016-01", "2016-04", "2016-05"], list(project_reports["Month"]))
+
+        self.assertEqual(["A"], dataset.get_partitioned_projects(self.source_csv, partition_folder))
+        self.assertEqual(["A-1", "A-2"], list(dataset.load_project_reports(["A"], self.source_csv, partition_folder,
+                                                                           exclude_self_fix=True)["Issue Key"]))
+
+    def test_incremental_update(self):
+        dataset.load_enhanced_dataframe(self.source_csv, self.directory)
+
+        with open(self.source_csv) as source_file:
+            lines = source_file.readlines()
+        with open(self.source_csv, "w") as source_file:
+            source_file.write(lines[0])
+            source_file.write(lines[2].replace("Open,,0,bob,", "Closed,Fixed,2,bob,ana"))
+            source_file.write("A-3,2016-03-01 10:00:00,,,Minor,Minor,,Open,,0,carl,,,Typo\n")
+
+        updated_dataframe, changes = dataset.update_snapshot(self.source_csv, self.directory)
+        self.assertEqual({"new": ["A-3"], "changed": ["A-2"], "removed": ["A-1"]}, changes)
+
+        rebuilt_dataframe = dataset.load_enhanced_dataframe(self.source_csv, self.directory, rebuild=True)
+        self.assertEqual(list(rebuilt_dataframe.columns), list(updated_dataframe.columns))
+        for column in rebuilt_dataframe.columns:
+            self.assertEqual(list(rebuilt_dataframe[column].astype(object).fillna("")),
+                             list(updated_dataframe[column].astype(object).fillna("")), column)
+
+    def write_projects(self, second_line):
+        with open(self.source_csv, "w") as source_file:
+            source_file.write("Issue Key,Project Key,Creation Date,JIRA Resolved Date,Priority Change Date,Priority,"
+                              "Original Priority,New Priority,Status,Resolution,Commits,Reported By,"
+                              "JIRA Resolved By,Priority Changer\n")
+            source_file.write("A-1,A,2016-01-01 10:00:00,2016-01-02 10:00:00,,Major,Major,,Closed,Fixed,1,ana,ana,\n")
+            source_file.write(second_line)
+
+    def test_project_versions(self):
+        self.write_projects("B-1,B,2016-02-01 10:00:00,,,Blocker,Blocker,,Open,,0,bob,,\n")
+        dataset.load_enhanced_dataframe(self.source_csv, self.directory)
+        all_stamp = dataset.get_reports_stamp(None, self.source_csv, self.directory)
+        project_stamps = [dataset.get_reports_stamp([project], self.source_csv, self.directory) for project in "AB"]
+
+        self.write_projects("B-1,B,2016-02-01 10:00:00,,,Blocker,Blocker,,Closed,Fixed,1,bob,bob,\n")
+        dataset.update_snapshot(self.source_csv, self.directory)
+        updated_stamps = [dataset.get_reports_stamp([project], self.source_csv, self.directory) for project in "AB"]
+
+        self.assertEqual(project_stamps[0], updated_stamps[0])
+        self.assertNotEqual(project_stamps[1], updated_stamps[1])
+        self.assertNotEqual(all_stamp, dataset.get_reports_stamp(None, self.source_csv, self.directory))
+
+        dataset.load_enhanced_dataframe(self.source_csv, self.directory, rebuild=True)
+        self.assertEqual(updated_stamps, [dataset.get_reports_stamp([project], self.source_csv, self.directory) for
+                                          project in "AB"])
+
+    def test_rebuild_changes_project_versions(self):
+        self.write_projects("B-1,B,2016-02-01 10:00:00,,,Blocker,Blocker,,Open,,0,bob,,\n")
+        dataset.load_enhanced_dataframe(self.source_csv, self.directory)
+        project_stamps = [dataset.get_reports_stamp([project], self.source_csv, self.directory) for project in "AB"]
+
+        self.write_projects("B-1,B,2016-02-01 10:00:00,,,Blocker,Blocker,,Closed,Fixed,1,bob,bob,\n")
+        incremental_update = dataset.gtconfig.incremental_update
+        dataset.gtconfig.incremental_update = False
+        try:
+            dataset.load_enhanced_dataframe(self.source_csv, self.directory)
+        finally:
+            dataset.gtconfig.incremental_update = incremental_update
+
+        self.assertEqual(project_stamps[0], dataset.get_reports_stamp(["A"], self.source_csv, self.directory))
+        self.assertNotEqual(project_stamps[1], dataset.get_reports_stamp(["B"], self.source_csv, self.directory))
+
+    def assert_update_equals_rebuild(self, updated_dataframe):
+        rebuilt_dataframe = dataset.load_enhanced_dataframe(self.source_csv, self.directory, rebuild=True)
+
+        self.assertEqual(list(rebuilt_dataframe.columns), list(updated_dataframe.columns))
+        for column in rebuilt_dataframe.columns:
+            self.assertEqual(str(rebuilt_dataframe[column].dtype), str(updated_dataframe[column].dtype), column)
+            self.assertEqual(list(rebuilt_dataframe[column].astype(object).fillna("")),
+                             list(updated_dataframe[column].astype(object).fillna("")), column)
+
+    def test_update_with_different_offsets(self):
+        with open(self.source_csv, "w") as source_file:
+            source_file.write("Issue Key,Creation Date,JIRA Resolved Date,Priority Change Date,Priority,"
+                              "Original Priority,New Priority,Status,Resolution,Commits,Reported By,"
+                              "JIRA Resolved By,Priority Changer\n")
+            source_file.write("A-1,2016-01-31T22:00:00.000-0800,,,Major,Major,,Open,,0,ana,,\n")
+        dataset.load_enhanced_dataframe(self.source_csv, self.directory)
+
+        with open(self.source_csv, "a") as source_file:
+            source_file.write("A-2,2016-04-30T20:00:00.000-0700,,,Major,Major,,Open,,0,bob,,\n")
+
+        updated_dataframe, changes = dataset.update_snapshot(self.source_csv, self.directory)
+        self.assertEqual(["A-2"], changes["new"])
+        self.assertEqual(["2016-01", "2016-04"], list(updated_dataframe["Month"]))
+        self.assert_update_equals_rebuild(updated_dataframe)
+
+    def test_update_with_all_columns(self):
+        compact_dataset = dataset.gtconfig.compact_dataset
+        dataset.gtconfig.compact_dataset = False
+
+        try:
+            dataset.load_enhanced_dataframe(self.source_csv, self.directory)
+
+            with open(self.source_csv) as source_file:
+                lines = source_file.readlines()
+            with open(self.source_csv, "w") as source_file:
+                source_file.writelines(lines[:2] + [lines[2].replace("Leak", "Memory leak")])
+
+            updated_dataframe, changes = dataset.update_snapshot(self.source_csv, self.directory)
+            self.assertEqual({"new": [], "changed": ["A-2"], "removed": []}, changes)
+            self.assertEqual(["Crash", "Memory leak"], list(updated_dataframe["Summary"]))
+            self.assert_update_equals_rebuild(updated_dataframe)
+        finally:
+            dataset.gtconfig.compact_dataset = compact_dataset
+
+    def test_shared_dataset(self):
+        enhanced_dataframe = dataset.load_enhanced_dataframe(self.source_csv, self.directory)
+        enhanced_dataframe[simdata.PROJECT_KEY_COUMN] = ["A", "B"]
+
+        shared_folder = dataset.share_dataframe(enhanced_dataframe, os.path.join(self.directory, "shared"))
+        shared_dataframe = dataset.SharedDataset(shared_folder).get_dataframe()
+
+        self.assertEqual(list(enhanced_dataframe.columns), list(shared_dataframe.columns))
+        for column in enhanced_dataframe.columns:
+            self.assertEqual(str(enhanced_dataframe[column].dtype), str(shared_dataframe[column].dtype), column)
+            self.assertEqual(list(enhanced_dataframe[column].astype(object).fillna("")),
+                             list(shared_dataframe[column].astype(object).fillna("")), column)
+
+        project_reports = dataset.load_shared_reports(shared_folder, ["B"], columns=[simdata.ISSUE_KEY_COLUMN])
+        self.assertEqual(["A-2"], list(project_reports[simdata.ISSUE_KEY_COLUMN]))
+        self.assertEqual([1], list(project_reports.index))
@@ -0,0 +1,31 @@
+import unittest
+
+import numpy as np
+
+import doe
+
+
+class TestDesign(unittest.TestCase):
+    def test_latin_hypercube(self):
+        unit_design = doe.get_latin_hypercube(10, 3, np.random.RandomState(0))
+
+        self.assertEqual((10, 3), unit_design.shape)
+        for dimension in range(3):
+            self.assertEqual(range(10), sorted(np.floor(unit_design[:, dimension] * 10).astype(int)))
+
+    def test_design(self):
+        design = doe.get_design({"dev_team_factor": (0.5, 1.0), "priority_queue": [True, False]}, 8, candidates=5)
+
+        self.assertEqual(["dev_team_factor", "priority_queue"], list(design.columns))
+        self.assertEqual(8, len(design.index))
+        self.assertTrue(((design["dev_team_factor"] >= 0.5) & (design["dev_team_factor"] < 1.0)).all())
+        self.assertEqual([4, 4], list(design["priority_queue"].value_counts()))
+
+    def test_maximin_selection(self):
+        random_state = np.random.RandomState(0)
+        designs = [doe.get_latin_hypercube(6, 2, random_state) for _ in range(20)]
+
+        best_distance = max([doe.get_minimum_distance(unit_design) for unit_design in designs])
+        design = doe.get_design({"first": (0.0, 1.0), "second": (0.0, 1.0)}, 6, seed=0, candidates=20)
+
+        self.assertAlmostEqual(best_distance, doe.get_minimum_distance(design.values))
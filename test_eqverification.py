@@ -0,0 +1,74 @@
+import unittest
+
+import numpy as np
+
+import eqverification
+import payoffstore
+from gamefixtures import Strategy, get_strategy_maps
+
+
+class TestEquilibriumVerification(unittest.TestCase):
+    def setUp(self):
+        """
+        A Prisoner's Dilemma with noisy payoffs. The gain for deviating from (DEFECT, DEFECT) is small compared to the
+        noise of the initial samples.
+        :return:
+        """
+        self.strategies_catalog = [Strategy("COOPERATE"), Strategy("DEFECT")]
+        self.payoff_table = {("COOPERATE", "COOPERATE"): [3.0, 3.0],
+                             ("COOPERATE", "DEFECT"): [0.9, 1.1],
+                             ("DEFECT", "COOPERATE"): [1.1, 0.9],
+                             ("DEFECT", "DEFECT"): [1.0, 1.0]}
+
+        self.random_state = np.random.RandomState(0)
+        self.payoff_store = payoffstore.PayoffStore(2)
+        self.simulated = []
+
+        for strategy_map in get_strategy_maps(self.strategies_catalog):
+            self.profile_simulator(strategy_map, 5)
+
+        self.simulated = []
+
+    def profile_simulator(self, strategy_map, replications):
+        profile_key = payoffstore.get_profile_key(strategy_map, 2)
+        self.simulated.append(profile_key)
+
+        samples = [list(self.random_state.normal(payoff, 0.5, replications)) for payoff in
+                   self.payoff_table[profile_key]]
+        self.payoff_store.add_samples(profile_key, samples)
+
+    def test_deviation_weights(self):
+        equilibrium_profile = {0: {"COOPERATE": "1/2", "DEFECT": "1/2"},
+                               1: {"COOPERATE": "1/4", "DEFECT": "3/4"}}
+
+        weights = eqverification.get_deviation_weights(equilibrium_profile, 0, self.strategies_catalog[0],
+                                                       self.strategies_catalog, 2)
+
+        self.assertAlmostEqual(0.125, weights[("COOPERATE", "COOPERATE")][1])
+        self.assertAlmostEqual(0.375, weights[("COOPERATE", "DEFECT")][1])
+        self.assertAlmostEqual(-0.125, weights[("DEFECT", "COOPERATE")][1])
+        self.assertAlmostEqual(-0.375, weights[("DEFECT", "DEFECT")][1])
+
+    def test_ambiguous_cells_are_replicated(self):
+        equilibrium_profile = {0: {"COOPERATE": "0", "DEFECT": "1"},
+                               1: {"COOPERATE": "0", "DEFECT": "1"}}
+
+        result = eqverification.verify_equilibrium(equilibrium_profile, self.strategies_catalog, 2,
+                                                   self.payoff_store, self.profile_simulator,
+                                                   additional_replications=200, max_rounds=5)
+
+        self.assertEqual(eqverification.CONFIRMED, result["status"])
+        self.assertGreater(result["replication_rounds"], 0)
+        self.assertNotIn(("COOPERATE", "COOPERATE"), self.simulated)
+
+    def test_beneficial_deviation_is_rejected(self):
+        equilibrium_profile = {0: {"COOPERATE": "1", "DEFECT": "0"},
+                               1: {"COOPERATE": "0", "DEFECT": "1"}}
+        self.payoff_table[("DEFECT", "DEFECT")] = [10.0, 10.0]
+        self.profile_simulator({0: self.strategies_catalog[1], 1: self.strategies_catalog[1]}, 100)
+
+        result = eqverification.verify_equilibrium(equilibrium_profile, self.strategies_catalog, 2,
+                                                   self.payoff_store, self.profile_simulator)
+
+        self.assertEqual(eqverification.REJECTED, result["status"])
+        self.assertGreater(result["regret_upper_bound"], result["regret"])
@@ -0,0 +1,56 @@
+import unittest
+import gtutils
+
+from gamefixtures import Strategy, StubGame
+
+
+class TestRegret(unittest.TestCase):
+    def setUp(self):
+        """
+        A Prisoner's Dilemma, where DEFECT is a dominant strategy.
+        :return:
+        """
+        self.cooperate = Strategy("COOPERATE")
+        self.defect = Strategy("DEFECT")
+        self.strategies_catalog = [self.cooperate, self.defect]
+
+        payoff_table = {("COOPERATE", "COOPERATE"): [3, 3],
+                        ("COOPERATE", "DEFECT"): [0, 5],
+                        ("DEFECT", "COOPERATE"): [5, 0],
+                        ("DEFECT", "DEFECT"): [1, 1]}
+        self.game = StubGame(self.strategies_catalog,
+                             lambda strategy_map: payoff_table[(strategy_map[0].name, strategy_map[1].name)])
+        self.payoff_oracle = self.game.payoff_oracle
+
+    def test_equilibrium_has_no_regret(self):
+        equilibrium_profile = {0: {"COOPERATE": "0", "DEFECT": "1"},
+                               1: {"COOPERATE": "0", "DEFECT": "1"}}
+
+        regret, best_deviations = gtutils.get_regret(equilibrium_profile, self.strategies_catalog, 2,
+                                                     self.payoff_oracle)
+
+        self.assertAlmostEqual(0.0, regret)
+        self.assertEqual("DEFECT", best_deviations[0][0])
+
+    def test_cooperation_has_regret(self):
+        equilibrium_profile = {0: {"COOPERATE": "1", "DEFECT": "0"},
+                               1: {"COOPERATE": "1", "DEFECT": "0"}}
+
+        regret, best_deviations = gtutils.get_regret(equilibrium_profile, self.strategies_catalog, 2,
+                                                     self.payoff_oracle)
+
+        self.assertAlmostEqual(2.0, regret)
+        self.assertEqual(("DEFECT", 2.0), best_deviations[1])
+
+        # Only unilateral deviations from the profile are evaluated.
+        self.assertNotIn(("DEFECT", "DEFECT"), self.game.simulated_profiles)
+
+    def test_mixed_profile(self):
+        equilibrium_profile = {0: {"COOPERATE": "1/2", "DEFECT": "1/2"},
+                               1: {"COOPERATE": "1/2", "DEFECT": "1/2"}}
+
+        expected_payoffs = gtutils.get_expected_payoffs(equilibrium_profile, 0, self.strategies_catalog,
+                                                        self.strategies_catalog, 2, self.payoff_oracle)
+
+        self.assertAlmostEqual(1.5, expected_payoffs["COOPERATE"])
+        self.assertAlmostEqual(3.0, expected_payoffs["DEFECT"])
@@ -0,0 +1,89 @@
+import os
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import heuristicpayoff
+import payoffstore
+import simcruncher
+from gamefixtures import Strategy
+
+
+class TestHeuristicPayoffTable(unittest.TestCase):
+    def setUp(self):
+        self.players = 10
+        self.strategies_catalog = [Strategy("HONEST"), Strategy("INFLATE")]
+        self.count_profiles = heuristicpayoff.get_count_profiles(self.players, len(self.strategies_catalog))
+
+    def get_payoff_matrix(self, payoff_function):
+        payoff_table = payoffstore.PayoffStore(len(self.strategies_catalog))
+
+        def row_simulator(count_profile):
+            return [[payoff_function(strategy, count_profile)] * 2 if count > 0 else [] for strategy, count in
+                    enumerate(count_profile)]
+
+        heuristicpayoff.simulate_table(self.count_profiles, payoff_table, row_simulator)
+        return heuristicpayoff.get_payoff_matrix(self.count_profiles, payoff_table)
+
+    def test_count_profiles(self):
+        self.assertEqual(11, len(self.count_profiles))
+        self.assertEqual(heuristicpayoff.get_table_size(50, 3),
+                         len(heuristicpayoff.get_count_profiles(50, 3)))
+
+        for count_profile in heuristicpayoff.get_count_profiles(5, 3):
+            self.assertEqual(5, sum(count_profile))
+
+    def test_game_size(self):
+        self.assertEqual(11, heuristicpayoff.check_game_size(20, self.players, 2, max_table_size=100))
+        self.assertRaises(ValueError, heuristicpayoff.check_game_size, 5, self.players, 2, 100)
+        self.assertRaises(ValueError, heuristicpayoff.check_game_size, 50, 50, 7, 100000)
+
+    def test_player_without_reports(self):
+        overall_dataframe = pd.DataFrame({"run": [0, 0, 1], "period": ["ALL"] * 3, "reporter_team": [0, 1, 0],
+                                          "reported_completed": [1, 2, 3], "reported": [2, 2, 4],
+                                          "payoff_score": [1, 2, 3]})
+
+        try:
+            team_dataframe = simcruncher.get_team_dataframe("TEST_HPT", "ALL", 2, [overall_dataframe], 2)
+        finally:
+            os.remove("csv/TEST_HPT_consolidated_result.csv")
+
+        self.assertEqual([2, 0], list(team_dataframe["team_2_score"]))
+        self.assertEqual([[1, 3], [2, 0]], heuristicpayoff.get_strategy_samples(team_dataframe, (1, 1)))
+
+    def test_strategy_samples(self):
+        count_profile = (1, 2)
+        strategy_map = heuristicpayoff.get_strategy_map(count_profile, self.strategies_catalog)
+        self.assertEqual(["HONEST", "INFLATE", "INFLATE"], [strategy_map[player].name for player in range(3)])
+
+        consolidated_dataframe = pd.DataFrame({"team_1_score": [1, 2],
+                                               "team_2_score": [3, 4],
+                                               "team_3_score": [5, 6]})
+        self.assertEqual([[1, 2], [4, 5]],
+                         heuristicpayoff.get_strategy_samples(consolidated_dataframe, count_profile))
+
+    def test_dominant_strategy(self):
+        counts, payoffs = self.get_payoff_matrix(lambda strategy, count_profile: 1.0 + strategy)
+
+        equilibria = heuristicpayoff.get_equilibria(counts, payoffs)
+
+        self.assertEqual(1, len(equilibria))
+        self.assertAlmostEqual(1.0, equilibria[0][1], places=3)
+
+    def test_mixed_equilibrium(self):
+        # Inflating pays off while few players do it.
+        counts, payoffs = self.get_payoff_matrix(
+            lambda strategy, count_profile: 5.0 if strategy == 0 else 10.0 - count_profile[1])
+
+        fitness = heuristicpayoff.get_fitness(np.array([0.5, 0.5]), counts, payoffs)
+        self.assertAlmostEqual(5.0, fitness[0])
+        self.assertAlmostEqual(10.0 - 1 - 9 * 0.5, fitness[1])
+
+        equilibria = heuristicpayoff.get_equilibria(counts, payoffs)
+
+        self.assertEqual(1, len(equilibria))
+        self.assertAlmostEqual(4.0 / 9.0, equilibria[0][1], places=2)
+
+        profile = heuristicpayoff.get_equilibrium_profile(equilibria[0], self.strategies_catalog, self.players)
+        self.assertEqual(self.players, len(profile))
@@ -0,0 +1,32 @@
+import unittest
+
+import infanalysis
+
+
+class InputParameters:
+    def __init__(self, dev_team_size):
+        self.dev_team_size = dev_team_size
+
+
+class TestSweepPoints(unittest.TestCase):
+    def test_points_are_independent(self):
+        input_params = InputParameters(dev_team_size=10)
+        simulation_configuration = {"SUCCESS_RATE": None}
+
+        def apply_success_rate(independent_variable_value, input_params, empirical_profile, original_team_size,
+                               simulation_configuration):
+            simulation_configuration["SUCCESS_RATE"] = independent_variable_value / 100.0
+            return infanalysis.apply_team_reduction(independent_variable_value, input_params, empirical_profile,
+                                                    original_team_size, simulation_configuration)
+
+        sweep_points = infanalysis.get_sweep_points("SWEEP", input_params, simulation_configuration, {}, 10, 25,
+                                                    configuration_function=apply_success_rate)
+
+        self.assertEqual([0, 25, 50, 75], [point['independent_variable_value'] for point in sweep_points])
+        self.assertEqual([0, 2, 5, 7], [point['normalized_value'] for point in sweep_points])
+        self.assertEqual([0.0, 0.25, 0.5, 0.75],
+                         [point['simulation_configuration']["SUCCESS_RATE"] for point in sweep_points])
+        self.assertEqual([0, 2, 5, 7], [point['input_params'].dev_team_size for point in sweep_points])
+
+        self.assertEqual(10, input_params.dev_team_size)
+        self.assertIsNone(simulation_configuration["SUCCESS_RATE"])
@@ -0,0 +1,103 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import metamodel
+
+
+class TestResponseSurface(unittest.TestCase):
+    def setUp(self):
+        """
+        A quadratic response over two parameters, simulated with noisy replications on a grid.
+        :return:
+        """
+        random_state = np.random.RandomState(0)
+        self.parameter_ranges = {"dev_team_factor": (0.5, 1.0), "inflation_factor": (0.0, 0.3)}
+
+        rows = []
+        for dev_team_factor in np.linspace(0.5, 1.0, 4):
+            for inflation_factor in np.linspace(0.0, 0.3, 4):
+                for replication in range(10):
+                    rows.append({"dev_team_factor": dev_team_factor, "inflation_factor": inflation_factor,
+                                 "replication": replication,
+                                 "severe_fixed_ratio": self.get_response(dev_team_factor, inflation_factor) +
+                                                       random_state.normal(scale=0.01)})
+
+        self.responses = pd.DataFrame(rows)
+        self.design_means = metamodel.get_design_means(self.responses, sorted(self.parameter_ranges.keys()),
+                                                       "severe_fixed_ratio")
+
+    @staticmethod
+    def get_response(dev_team_factor, inflation_factor):
+        return 0.2 + 0.6 * dev_team_factor - 2.0 * (inflation_factor - 0.1) ** 2
+
+    def test_design_means(self):
+        self.assertEqual(16, len(self.design_means.index))
+        self.assertEqual([10], list(self.design_means["replications"].unique()))
+
+        first_point = self.responses[(self.responses["dev_team_factor"] == 0.5) &
+                                     (self.responses["inflation_factor"] == 0.0)]["severe_fixed_ratio"]
+        self.assertAlmostEqual(first_point.mean(), self.design_means["mean"][0])
+        self.assertAlmostEqual(first_point.var() / 10, self.design_means["variance"][0])
+
+    def test_predictions(self):
+        design_point = {"dev_team_factor": 0.6, "inflation_factor": 0.07}
+
+        for kind in [metamodel.GAUSSIAN_PROCESS, metamodel.POLYNOMIAL]:
+            surface = metamodel.ResponseSurface(sorted(self.parameter_ranges.keys()), kind=kind).fit(
+                self.design_means)
+            means, deviations = surface.predict([design_point])
+
+            self.assertAlmostEqual(self.get_response(**design_point), means[0], delta=0.01, msg=kind)
+            self.assertLess(deviations[0], 0.01, msg=kind)
+
+    def test_uncertainty_outside_design(self):
+        surface = metamodel.ResponseSurface(sorted(self.parameter_ranges.keys())).fit(self.design_means)
+        _, deviations = surface.predict([{"dev_team_factor": 0.6, "inflation_factor": 0.1},
+                                         {"dev_team_factor": 0.6, "inflation_factor": 0.6}])
+
+        self.assertGreater(deviations[1], deviations[0])
+
+    def test_proposals(self):
+        sparse_means = self.design_means[self.design_means["dev_team_factor"] > 0.6]
+        surface = metamodel.ResponseSurface(sorted(self.parameter_ranges.keys())).fit(sparse_means)
+
+        proposals = metamodel.propose_design_points(surface, self.parameter_ranges, 2, candidates=100)
+
+        self.assertEqual(2, len(proposals.index))
+        self.assertTrue((proposals["dev_team_factor"] < 0.6).all())
+        self.assertGreater(abs(proposals["inflation_factor"].diff().iloc[1]), 0.1)
+
+    def test_conditioned_surface(self):
+        surface = metamodel.ResponseSurface(sorted(self.parameter_ranges.keys())).fit(self.design_means)
+        new_point = [{"dev_team_factor": 0.55, "inflation_factor": 0.25}]
+
+        conditioned_surface = surface.get_conditioned(new_point)
+
+        self.assertLess(conditioned_surface.predict(new_point)[1][0], surface.predict(new_point)[1][0])
+        self.assertAlmostEqual(surface.predict(new_point)[0][0], conditioned_surface.predict(new_point)[0][0],
+                               places=4)
+
+    def test_conditioned_outside_range(self):
+        surface = metamodel.ResponseSurface(sorted(self.parameter_ranges.keys())).fit(self.design_means)
+        new_point = [{"dev_team_factor": 0.3, "inflation_factor": 0.5}]
+
+        conditioned_surface = surface.get_conditioned(new_point)
+
+        np.testing.assert_array_equal(surface.minimums, conditioned_surface.minimums)
+        np.testing.assert_array_equal(surface.maximums, conditioned_surface.maximums)
+        self.assertAlmostEqual(0.0, conditioned_surface.predict(new_point)[1][0], places=3)
+        self.assertAlmostEqual(surface.predict(new_point)[0][0], conditioned_surface.predict(new_point)[0][0],
+                               places=4)
+
+        means, _ = conditioned_surface.predict(self.design_means)
+        np.testing.assert_allclose(surface.predict(self.design_means)[0], means, atol=0.005)
+
+    def test_parameter_ranges(self):
+        sweep_results = pd.DataFrame({"normalized_value": [2, 5, 7, 2], "priority_queue": [True, False, True, True],
+                                      "severe_fixed_ratio": [0.1, 0.2, 0.3, 0.2]})
+
+        parameter_ranges = metamodel.get_parameter_ranges(sweep_results, ["normalized_value", "priority_queue"])
+
+        self.assertEqual({"normalized_value": (2, 7), "priority_queue": [True, False]}, parameter_ranges)
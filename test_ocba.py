@@ -0,0 +1,50 @@
+import unittest
+
+import numpy as np
+
+import ocba
+import payoffstore
+from gamefixtures import Strategy, get_strategy_maps
+
+
+class TestOCBA(unittest.TestCase):
+    def setUp(self):
+        self.strategies_catalog = [Strategy("HONEST"), Strategy("INFLATE"), Strategy("DEFLATE")]
+        self.strategy_maps = get_strategy_maps(self.strategies_catalog)
+
+        # INFLATE and HONEST are close, while DEFLATE is clearly worse.
+        self.means = {"HONEST": 10.0, "INFLATE": 10.5, "DEFLATE": 0.0}
+        self.random_state = np.random.RandomState(0)
+
+    def replication_runner(self, profiles):
+        return [[list(self.random_state.normal(self.means[strategy_map[team].name], 2.0, replications)) for team in
+                 range(2)] for strategy_map, replications in profiles]
+
+    def test_ratios(self):
+        ratios = ocba.get_ocba_ratios([10.5, 10.0, 0.0], [2.0, 2.0, 2.0])
+
+        self.assertAlmostEqual(1.0, ratios.sum())
+        self.assertGreater(ratios[1], ratios[2])
+        self.assertGreater(ratios[0], ratios[2])
+
+    def test_allocation_respects_budget(self):
+        weights = {"A": 0.7, "B": 0.2, "C": 0.1}
+        current_replications = {"A": 5, "B": 5, "C": 5}
+
+        allocation = ocba.allocate_replications(weights, current_replications, 21)
+
+        self.assertEqual(21, sum(allocation.values()))
+        self.assertNotIn("C", allocation)
+
+    def test_budget_goes_to_close_profiles(self):
+        payoff_store = payoffstore.PayoffStore(2)
+        spent = ocba.run_allocation(self.strategy_maps, 2, payoff_store, self.replication_runner, total_budget=300,
+                                    initial_replications=5, rounds=4)
+
+        self.assertEqual(300, spent)
+
+        close_profile = payoffstore.get_profile_key({0: self.strategies_catalog[0], 1: self.strategies_catalog[2]}, 2)
+        distant_profile = payoffstore.get_profile_key({0: self.strategies_catalog[2],
+                                                       1: self.strategies_catalog[2]}, 2)
+        self.assertGreater(payoff_store.get_replications(close_profile),
+                           payoff_store.get_replications(distant_profile))
@@ -0,0 +1,87 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import payoffstore
+from gamefixtures import EmpiricalStrategy
+
+
+class TestPayoffStore(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+        self.honest = EmpiricalStrategy("HONEST", 0.0, 0.0)
+        self.inflate = EmpiricalStrategy("SIMPLEINFLATE", 1.0, 0.0)
+        self.empirical = EmpiricalStrategy("EMPIRICAL3_INF19%DEF2%", 0.19, 0.02)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_profiles_are_identified_by_parameters(self):
+        renamed_empirical = EmpiricalStrategy("EMPIRICAL0_INF19%DEF2%", 0.19, 0.02)
+
+        self.assertEqual(payoffstore.get_profile_key({0: self.empirical, 1: self.honest}, 2),
+                         payoffstore.get_profile_key({0: renamed_empirical, 1: self.honest}, 2))
+        self.assertNotEqual(payoffstore.get_profile_key({0: self.inflate, 1: self.honest}, 2),
+                            payoffstore.get_profile_key({0: self.honest, 1: self.inflate}, 2))
+
+    def test_save_and_load(self):
+        payoff_store = payoffstore.PayoffStore(2)
+        profile_key = payoffstore.get_profile_key({0: self.empirical, 1: self.honest}, 2)
+        payoff_store.add_samples(profile_key, [[1, 2, 3], [4, 5, 6]])
+
+        file_name = os.path.join(self.directory, "payoff_samples.csv")
+        payoff_store.save(file_name)
+
+        loaded_store = payoffstore.PayoffStore(2)
+        loaded_store.load(file_name)
+
+        self.assertEqual(1, len(loaded_store))
+        self.assertEqual(3, loaded_store.get_replications(profile_key))
+        self.assertEqual([2.0, 5.0], loaded_store.get_payoffs(profile_key))
+
+    def test_load_with_other_teams(self):
+        payoff_store = payoffstore.PayoffStore(2)
+        payoff_store.add_samples(payoffstore.get_profile_key({0: self.empirical, 1: self.honest}, 2),
+                                 [[1, 2, 3], [4, 5, 6]])
+
+        file_name = os.path.join(self.directory, "payoff_samples.csv")
+        payoff_store.save(file_name)
+
+        loaded_store = payoffstore.PayoffStore(3)
+        loaded_store.load(file_name)
+
+        self.assertEqual(0, len(loaded_store))
+
+    def test_load_with_other_stamp(self):
+        profile_key = payoffstore.get_profile_key({0: self.empirical, 1: self.honest}, 2)
+        payoff_store = payoffstore.PayoffStore(2)
+        payoff_store.add_samples(profile_key, [[1, 2, 3], [4, 5, 6]])
+
+        samples_file = os.path.join(self.directory, "payoff_samples.csv")
+        equilibria_file = os.path.join(self.directory, "equilibria.csv")
+        payoff_store.save(samples_file, stamp="OLD")
+        payoffstore.save_equilibria([{0: {"HONEST": "1"}, 1: {"HONEST": "1"}}], [self.honest], equilibria_file,
+                                    stamp="OLD")
+
+        for stamp, profiles, equilibria in [("OLD", 1, 1), ("NEW", 0, 0), (None, 1, 1)]:
+            loaded_store = payoffstore.PayoffStore(2)
+            loaded_store.load(samples_file, stamp=stamp)
+
+            self.assertEqual(profiles, len(loaded_store), stamp)
+            self.assertEqual(equilibria, len(payoffstore.load_equilibria([self.honest], equilibria_file,
+                                                                         stamp=stamp)), stamp)
+
+    def test_equilibria_with_extended_catalog(self):
+        equilibrium_list = [{0: {"HONEST": "1/3", "SIMPLEINFLATE": "2/3"},
+                             1: {"HONEST": "0", "SIMPLEINFLATE": "1"}}]
+
+        file_name = os.path.join(self.directory, "equilibria.csv")
+        payoffstore.save_equilibria(equilibrium_list, [self.honest, self.inflate], file_name)
+
+        renamed_inflate = EmpiricalStrategy("EMPIRICAL1_INF100%DEF0%", 1.0, 0.0)
+        loaded_equilibria = payoffstore.load_equilibria([self.honest, renamed_inflate, self.empirical], file_name)
+
+        self.assertEqual([{0: {"HONEST": "1/3", "EMPIRICAL1_INF100%DEF0%": "2/3"},
+                           1: {"HONEST": "0", "EMPIRICAL1_INF100%DEF0%": "1"}}], loaded_equilibria)
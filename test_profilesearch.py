@@ -0,0 +1,57 @@
+import unittest
+
+import gtutils
+import profilesearch
+from gamefixtures import Strategy, StubGame
+
+
+class TestProfileSearch(unittest.TestCase):
+    def setUp(self):
+        """
+        A game where the last strategy is dominant: The payoff grows with the own strategy index, and decreases with the
+        one of the other team. The only equilibrium is (S5, S5).
+        :return:
+        """
+        self.teams = 2
+        self.strategies_catalog = [Strategy("S" + str(index)) for index in range(6)]
+        self.game = StubGame(self.strategies_catalog, self.get_payoffs, self.teams)
+        self.solved_subgames = []
+
+    def get_payoffs(self, strategy_map):
+        indexes = [self.strategies_catalog.index(strategy_map[team]) for team in range(self.teams)]
+        return [indexes[team] - 0.5 * indexes[1 - team] for team in range(self.teams)]
+
+    def equilibrium_solver(self, subgame_catalog):
+        self.solved_subgames.append([strategy.name for strategy in subgame_catalog])
+        return self.game.get_pure_equilibria(strategies_catalog=subgame_catalog)
+
+    def test_equilibrium_is_found(self):
+        equilibrium_list, regret_list = profilesearch.explore_profiles(self.strategies_catalog, self.teams,
+                                                                       self.game.payoff_oracle,
+                                                                       self.equilibrium_solver, initial_strategies=2)
+
+        self.assertEqual(1, len(equilibrium_list))
+        self.assertEqual({"S0": "0", "S1": "0", "S2": "0", "S3": "0", "S4": "0", "S5": "1"}, equilibrium_list[0][0])
+        self.assertEqual(equilibrium_list[0][0], equilibrium_list[0][1])
+        self.assertLessEqual(regret_list[0], 0.0)
+
+        # Regret over the whole catalog, without going through the oracle.
+        regret, _ = gtutils.get_regret(equilibrium_list[0], self.strategies_catalog, self.teams, self.get_payoffs)
+        self.assertLessEqual(regret, 0.0)
+
+    def test_profiles_are_not_all_simulated(self):
+        profilesearch.explore_profiles(self.strategies_catalog, self.teams, self.game.payoff_oracle,
+                                       self.equilibrium_solver, initial_strategies=2)
+
+        self.assertEqual([["S0", "S1"], ["S0", "S1", "S5"]], self.solved_subgames)
+        self.assertLess(len(set(self.game.simulated_profiles)), len(self.game.strategy_maps))
+
+    def test_regret_threshold(self):
+        equilibrium_list, regret_list = profilesearch.explore_profiles(self.strategies_catalog, self.teams,
+                                                                       self.game.payoff_oracle,
+                                                                       self.equilibrium_solver, initial_strategies=1,
+                                                                       regret_threshold=10.0)
+
+        self.assertEqual([["S0"]], self.solved_subgames)
+        self.assertEqual("1", equilibrium_list[0][0]["S0"])
+        self.assertEqual(5.0, regret_list[0])
@@ -0,0 +1,185 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import batchbenchmark
+import datebenchmark
+import simdata
+
+
+class TestEnhanceReportDataframe(unittest.TestCase):
+    def assert_same_columns(self, bug_reports):
+        vectorized_dataframe = simdata.enhace_report_dataframe(bug_reports.copy())
+        row_dataframe = datebenchmark.enhance_row_by_row(bug_reports.copy())
+
+        for column in [simdata.CREATED_DATE_COLUMN, simdata.RESOLUTION_DATE_COLUMN, simdata.PERIOD_COLUMN,
+                       simdata.RESOLUTION_TIME_COLUMN, simdata.PRIORITY_CHANGE_TIME_COLUMN]:
+            vectorized_values = vectorized_dataframe[column]
+            row_values = row_dataframe[column]
+
+            self.assertTrue(((vectorized_values == row_values) |
+                             (vectorized_values.isnull() & row_values.isnull())).all(), column)
+
+    def get_reports(self, creation_dates, resolution_dates, change_dates):
+        return pd.DataFrame({"Creation Date": creation_dates,
+                             "JIRA Resolved Date": resolution_dates,
+                             "Priority Change Date": change_dates,
+                             "Priority": ["Major"] * len(creation_dates),
+                             "Original Priority": ["Major"] * len(creation_dates),
+                             "New Priority": [None] * len(creation_dates),
+                             "Status": ["Closed"] * len(creation_dates),
+                             "Resolution": ["Fixed"] * len(creation_dates),
+                             "Commits": [1] * len(creation_dates)})
+
+    def test_synthetic_reports(self):
+        self.assert_same_columns(datebenchmark.get_synthetic_reports(500))
+
+    def test_naive_dates(self):
+        self.assert_same_columns(self.get_reports(["2016-01-31 10:00:00", "2016-02-01 10:00:00"],
+                                                  ["2016-01-30 10:00:00", "2016-02-03 11:30:00"],
+                                                  [None, None]))
+
+    def test_different_offsets(self):
+        bug_reports = self.get_reports(["2016-01-01T10:00:00.000+0000", "2016-01-01T10:00:00.000-0500"],
+                                       ["2016-01-02T10:00:00.000+0100", None],
+                                       ["2016-01-01T09:00:00.000+0000", "2016-01-01T16:00:00.000+0000"])
+
+        enhanced_dataframe = simdata.enhace_report_dataframe(bug_reports)
+        self.assertEqual([23.0], list(enhanced_dataframe[simdata.RESOLUTION_TIME_COLUMN].dropna()))
+        self.assertEqual([1.0], list(enhanced_dataframe[simdata.PRIORITY_CHANGE_TIME_COLUMN].dropna()))
+        self.assertEqual(["2016-01", "2016-01"], list(enhanced_dataframe[simdata.PERIOD_COLUMN]))
+
+        bug_reports = self.get_reports(["2016-01-31T22:00:00.000-0800", "2016-04-30T20:00:00.000-0700",
+                                        "2016-03-01T00:30:00.000+01:00"], [None] * 3, [None] * 3)
+        self.assertEqual(["2016-01", "2016-04", "2016-03"],
+                         list(simdata.enhace_report_dataframe(bug_reports)[simdata.PERIOD_COLUMN]))
+
+
+def include_batch_information_by_filtering(bug_reports, target_fixes):
+    """
+    Batch assignment filtering the whole dataframe per report, as include_batch_information used to do.
+    """
+    with_refreshed_index = bug_reports.sort_values(by=[simdata.CREATED_DATE_COLUMN], ascending=[1]).reset_index()
+
+    current_batch = 0
+    current_batch_start = None
+    batches = []
+    batch_starts = []
+
+    for _, report_series in with_refreshed_index.iterrows():
+        if current_batch_start is None:
+            current_batch_start = report_series[simdata.CREATED_DATE_COLUMN]
+            batch_starts.append(current_batch_start)
+
+        batches.append(current_batch)
+        current_creation_date = report_series[simdata.CREATED_DATE_COLUMN]
+
+        previous_reports = with_refreshed_index[
+            (with_refreshed_index[simdata.CREATED_DATE_COLUMN] >= current_batch_start) &
+            (with_refreshed_index[simdata.CREATED_DATE_COLUMN] <= current_creation_date) &
+            (with_refreshed_index[simdata.RESOLUTION_DATE_COLUMN] <= current_creation_date)]
+
+        fixes_so_far = 0
+        if not previous_reports.empty:
+            fixes_so_far = len(simdata.filter_resolved(previous_reports).index)
+
+        if fixes_so_far >= target_fixes:
+            current_batch += 1
+            current_batch_start = None
+
+    with_refreshed_index[simdata.BATCH_COLUMN] = pd.Series(batches, index=with_refreshed_index.index)
+
+    resolved_in_batch = []
+    previous_batch = 0
+    batch_resolved_count = 0
+    for _, report_series in with_refreshed_index.iterrows():
+        current_batch = report_series[simdata.BATCH_COLUMN]
+        if previous_batch != current_batch:
+            batch_resolved_count = 0
+
+        batch_start = batch_starts[current_batch]
+        batch_reports = with_refreshed_index[with_refreshed_index[simdata.BATCH_COLUMN] == current_batch]
+        batch_end = max(batch_reports[simdata.CREATED_DATE_COLUMN].dropna().values)
+
+        resolved = False
+        if simdata.resolved_definition(report_series) and batch_resolved_count < target_fixes and \
+                (batch_start <= report_series[simdata.RESOLUTION_DATE_COLUMN] <= batch_end):
+            resolved = True
+            batch_resolved_count += 1
+
+        resolved_in_batch.append(resolved)
+        previous_batch = current_batch
+
+    return with_refreshed_index[simdata.BATCH_COLUMN].tolist(), resolved_in_batch
+
+
+class TestBatchInformation(unittest.TestCase):
+    def get_reports(self, report_count, seed):
+        """
+        Reports with repeated creation dates, missing resolutions and resolutions before creation.
+        """
+        random_state = np.random.RandomState(seed)
+        created_dates = pd.Timestamp("2016-01-01") + pd.to_timedelta(random_state.randint(0, 200, size=report_count),
+                                                                     unit="h")
+        resolution_dates = created_dates + pd.to_timedelta(random_state.randint(-5, 100, size=report_count), unit="h")
+
+        return pd.DataFrame({simdata.CREATED_DATE_COLUMN: created_dates,
+                             simdata.RESOLUTION_DATE_COLUMN: pd.Series(resolution_dates).where(
+                                 random_state.rand(report_count) < 0.7),
+                             simdata.STATUS_COLUMN: random_state.choice(["Closed", "Resolved", "Open"],
+                                                                        size=report_count),
+                             "Resolution": random_state.choice(["Fixed", "Won't Fix"], p=[0.8, 0.2],
+                                                               size=report_count),
+                             "Commits": random_state.randint(0, 3, size=report_count)})
+
+    def test_same_as_filtering(self):
+        for seed in range(3):
+            bug_reports = self.get_reports(150, seed)
+
+            for target_fixes in [1, 5, 20]:
+                batches, resolved_in_batch = include_batch_information_by_filtering(bug_reports, target_fixes)
+                batch_dataframe = simdata.include_batch_information(bug_reports, target_fixes=target_fixes)
+
+                self.assertEqual(batches, batch_dataframe[simdata.BATCH_COLUMN].tolist())
+                self.assertEqual(resolved_in_batch, batch_dataframe[simdata.RESOLVED_IN_BATCH_COLUMN].tolist())
+
+    def test_resolved_mask(self):
+        bug_reports = self.get_reports(100, 0)
+        bug_reports.loc[bug_reports.index[:10], "Commits"] = np.nan
+
+        for (only_with_commits, only_valid_resolution), resolved_column in simdata.RESOLVED_COLUMNS.iteritems():
+            expected_mask = bug_reports.apply(
+                lambda report: simdata.resolved_definition(report, only_with_commits, only_valid_resolution), axis=1)
+            resolved_mask = simdata.get_resolved_mask(bug_reports, only_with_commits, only_valid_resolution)
+
+            self.assertEqual(expected_mask.tolist(), resolved_mask.tolist())
+
+            bug_reports[resolved_column] = ~resolved_mask
+            self.assertEqual(len(bug_reports.index) - resolved_mask.sum(),
+                             len(simdata.filter_resolved(bug_reports, only_with_commits, only_valid_resolution).index))
+
+
+class TestReportBatches(unittest.TestCase):
+    def test_same_as_by_element(self):
+        for seed in range(5):
+            bug_reports = batchbenchmark.get_synthetic_history(200, seed)
+            period_start = pd.Timestamp("2009-12-31", tz="UTC")
+
+            for window_size in [0, 1, 2.5]:
+                batches = batchbenchmark.get_report_batches_by_element(bug_reports, window_size)
+                batch_heads, batch_counts = simdata.get_report_batches(bug_reports, window_size)
+
+                self.assertEqual([batch["batch_count"] for batch in batches], list(batch_counts))
+                self.assertEqual([batch["batch_head"] for batch in batches], list(batch_heads))
+
+                expected_times = batchbenchmark.get_interarrival_times_by_element(list(batch_heads), period_start)
+                self.assertTrue(np.allclose(expected_times, simdata.get_interarrival_times(batch_heads, period_start)))
+
+    def test_arrival_at_period_start(self):
+        arrival_times = np.array(["2016-01-01T00:00", "2016-01-01T06:00"], dtype="datetime64[ns]")
+
+        self.assertEqual([6.0], list(simdata.get_interarrival_times(arrival_times,
+                                                                    pd.Timestamp("2016-01-01", tz="UTC"))))
+        self.assertEqual([1.0, 6.0], list(simdata.get_interarrival_times(arrival_times,
+                                                                         pd.Timestamp("2015-12-31 23:00"))))
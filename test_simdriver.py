@@ -0,0 +1,168 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+import simdata
+import simdriver
+
+
+def get_batch_metrics_by_filtering(issues_in_batches, reporters_config, unique_batches):
+    """
+    Per-batch filtering, as simdriver.get_team_training_data used to do.
+    """
+    batch_metrics = []
+    for batch in unique_batches:
+        issues_for_batch = issues_in_batches[issues_in_batches[simdata.BATCH_COLUMN] == batch]
+        if simdriver.is_valid_period(issues_for_batch, batch):
+            dev_team_size, _, resolved_batch, dev_team_bandwith = simdriver.get_dev_team_production(issues_for_batch)
+            batch_metrics.append((dev_team_size, dev_team_bandwith,
+                                  simdriver.get_reporting_metrics(issues_for_batch, resolved_batch, reporters_config)))
+
+    return batch_metrics
+
+
+
+def get_reporter_statistics_by_filtering(training_dataset, tester_groups):
+    """
+    Per-group filtering, as simdriver.get_reporter_configuration used to do.
+    """
+    statistics = {}
+    for group_index, reporter_list in enumerate(tester_groups):
+        bug_reports = simdata.filter_by_reporter(training_dataset, reporter_list)
+        modified_priority = simdata.get_modified_priority_bugs(bug_reports)
+
+        inflation_records = {}
+        for priority in simdata.SUPPORTED_PRIORITIES:
+            bugs = modified_priority[modified_priority[simdata.SIMPLE_PRIORITY_COLUMN] == priority]
+            true_reports = bugs[bugs[simdata.SIMPLE_PRIORITY_COLUMN] == bugs[simdata.ORIGINAL_SIMPLE_PRIORITY_COLUMN]]
+            inflated_reports = bugs[
+                bugs[simdata.SIMPLE_PRIORITY_COLUMN] != bugs[simdata.ORIGINAL_SIMPLE_PRIORITY_COLUMN]]
+
+            inflation_records["priority_" + str(priority) + "_true"] = len(true_reports.index)
+            inflation_records["priority_" + str(priority) + "_false"] = len(inflated_reports.index)
+
+        statistics[group_index] = {'bug_reports': bug_reports,
+                                   'reports_per_priority': dict(
+                                       bug_reports[simdata.SIMPLE_PRIORITY_COLUMN].value_counts()),
+                                   'with_modified_priority': len(modified_priority.index),
+                                   'inflation_records': inflation_records}
+
+    return statistics
+
+
+class TestReporterStatistics(unittest.TestCase):
+    def setUp(self):
+        random_state = np.random.RandomState(0)
+        reports = 400
+
+        self.training_dataset = pd.DataFrame({
+            simdata.CREATED_DATE_COLUMN: pd.Timestamp("2016-01-01") + pd.to_timedelta(
+                np.sort(random_state.randint(0, 100000, size=reports)), unit="m"),
+            simdata.SIMPLE_PRIORITY_COLUMN: random_state.choice([1, 2, 3], size=reports),
+            simdata.ORIGINAL_SIMPLE_PRIORITY_COLUMN: random_state.choice([1, 2, 3], size=reports),
+            simdata.REPORTER_COLUMN: random_state.choice(["ana", "bob", "carl", "dora"], size=reports),
+            simdata.PRIORITY_CHANGER_COLUMN: random_state.choice(["ana", "eve", None], size=reports)})
+
+    def assert_same_statistics(self, tester_groups):
+        statistics = simdriver.get_reporter_statistics(self.training_dataset, tester_groups)
+        expected_statistics = get_reporter_statistics_by_filtering(self.training_dataset, tester_groups)
+
+        self.assertEqual(sorted(expected_statistics.keys()), sorted(statistics.keys()))
+        for group_index, expected in expected_statistics.iteritems():
+            group_statistics = statistics[group_index]
+
+            self.assertEqual(len(expected['bug_reports'].index), len(group_statistics['bug_reports'].index))
+            self.assertEqual(sorted(expected['bug_reports'][simdata.CREATED_DATE_COLUMN]),
+                             sorted(group_statistics['bug_reports'][simdata.CREATED_DATE_COLUMN]))
+            self.assertEqual(expected['reports_per_priority'],
+                             {priority: count for priority, count in
+                              group_statistics['reports_per_priority'].iteritems() if count > 0})
+            self.assertEqual(expected['with_modified_priority'], group_statistics['with_modified_priority'])
+            self.assertEqual(expected['inflation_records'], group_statistics['inflation_records'])
+
+    def test_singleton_groups(self):
+        self.assert_same_statistics([["ana"], ["bob"], ["carl"], ["dora"], ["zoe"]])
+
+    def test_consolidated_group(self):
+        self.assert_same_statistics([["ana", "bob", "carl", "dora"]])
+
+    def test_overlapping_groups(self):
+        self.assert_same_statistics([["ana", "bob"], ["bob"], ["bob", "carl", "zoe"]])
+
+
+class TestValidationCells(unittest.TestCase):
+    def test_validation_cells(self):
+        cells = simdriver.get_validation_cells(["A", "B"], [0.2, 0.4], [True], [False], consolidated=True,
+                                               per_project=True)
+
+        self.assertEqual(6, len(cells))
+        self.assertEqual([["A", "B"], ["A", "B"], ["A"], ["A"], ["B"], ["B"]], [cell['project_list'] for cell in cells])
+        self.assertEqual([0.2, 0.4], sorted(set(cell['test_size'] for cell in cells)))
+
+    def test_cell_prefix(self):
+        cells = simdriver.get_validation_cells(["A"], [0.2], [False], [False, True])
+
+        self.assertEqual(2, len(set(simdriver.get_cell_prefix(cell) for cell in cells)))
+
+    def test_failed_cell(self):
+        cell = simdriver.get_validation_cells(["A"], [0.2], [False], [False])[0]
+        cell.update({'max_iterations': 1, 'parallel': False})
+
+        finished_cell, results, error = simdriver.run_validation_cell(cell, pd.DataFrame())
+
+        self.assertEqual(cell, finished_cell)
+        self.assertEqual([], results)
+        self.assertIsNotNone(error)
+
+
+class TestBatchMetrics(unittest.TestCase):
+    def setUp(self):
+        random_state = np.random.RandomState(0)
+        reports = 600
+
+        self.issues_in_batches = pd.DataFrame({
+            simdata.BATCH_COLUMN: np.sort(random_state.randint(0, 30, size=reports)),
+            simdata.CREATED_DATE_COLUMN: pd.Timestamp("2016-01-01") + pd.to_timedelta(
+                np.sort(random_state.randint(0, 100000, size=reports)), unit="m"),
+            simdata.RESOLVED_IN_BATCH_COLUMN: random_state.rand(reports) < 0.5,
+            simdata.RESOLUTION_TIME_COLUMN: random_state.exponential(scale=20.0, size=reports),
+            simdata.SIMPLE_PRIORITY_COLUMN: random_state.choice([1, 2, 3], size=reports),
+            simdata.REPORTER_COLUMN: random_state.choice(["ana", "bob", "carl", "dora"], size=reports),
+            simdata.RESOLVER_COLUMN: random_state.choice(["eve", "fred", None], size=reports)})
+
+        # Make some batches valid.
+        for batch in range(0, 30, 3):
+            in_batch = self.issues_in_batches[simdata.BATCH_COLUMN] == batch
+            resolved = np.zeros(in_batch.sum(), dtype=bool)
+            resolved[:simdriver.TARGET_FIXES] = True
+            self.issues_in_batches.loc[in_batch, simdata.RESOLVED_IN_BATCH_COLUMN] = resolved
+
+        self.reporters_config = [{'name': "ana_bob", 'reporter_list': ["ana", "bob"]},
+                                 {'name': "bob", 'reporter_list': ["bob"]},
+                                 {'name': "zoe", 'reporter_list': ["zoe"]}]
+
+    def test_batch_metrics(self):
+        unique_batches = self.issues_in_batches[simdata.BATCH_COLUMN].unique()
+
+        batch_metrics = simdriver.get_batch_metrics(self.issues_in_batches, self.reporters_config, unique_batches)
+        expected_metrics = get_batch_metrics_by_filtering(self.issues_in_batches, self.reporters_config,
+                                                          unique_batches)
+
+        self.assertTrue(len(batch_metrics) > 0)
+        self.assertEqual(len(expected_metrics), len(batch_metrics))
+
+        for (team_size, bandwith, metrics), (expected_size, expected_bandwith, expected) in zip(batch_metrics,
+                                                                                               expected_metrics):
+            self.assertEqual(expected_size, team_size)
+            self.assertAlmostEqual(expected_bandwith, bandwith)
+            self.assertEqual(expected['true_resolved'], metrics['true_resolved'])
+            self.assertAlmostEqual(expected['reporting_time'], metrics['reporting_time'])
+            self.assertAlmostEqual(expected['true_time'], metrics['true_time'])
+            self.assertEqual(expected['results_per_reporter'], metrics['results_per_reporter'])
+
+            for priority_metrics, expected_priority in zip(metrics['results_per_priority'],
+                                                           expected['results_per_priority']):
+                self.assertEqual(sorted(expected_priority.keys()), sorted(priority_metrics.keys()))
+                for key, value in expected_priority.iteritems():
+                    self.assertAlmostEqual(value, priority_metrics[key])
@@ -0,0 +1,118 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+from pathos.multiprocessing import ProcessingPool as Pool
+
+import gtconfig
+import siminput
+
+
+def fit_on_worker(fitting_job):
+    desc, sample_values, fit_cache_folder = fitting_job
+    gtconfig.fit_cache_folder = fit_cache_folder
+
+    return siminput.fit_samples({desc: pd.Series(sample_values)}, parallel=False)
+
+
+class TestDistributionFitting(unittest.TestCase):
+    def setUp(self):
+        random_state = np.random.RandomState(0)
+        self.samples = {"EXPONENTIAL": pd.Series(random_state.exponential(scale=10.0, size=300)),
+                        "NORMAL": pd.Series(random_state.normal(loc=50.0, scale=5.0, size=300))}
+
+        self.directory = tempfile.mkdtemp()
+        self.fit_cache_folder = gtconfig.fit_cache_folder
+        gtconfig.fit_cache_folder = os.path.join(self.directory, "fit_cache")
+
+    def tearDown(self):
+        gtconfig.fit_cache_folder = self.fit_cache_folder
+        shutil.rmtree(self.directory)
+
+    def test_fit_samples(self):
+        best_fits = siminput.fit_samples(self.samples, parallel=False)
+
+        self.assertEqual(["EXPONENTIAL", "NORMAL"], sorted(best_fits.keys()))
+        self.assertIn(best_fits["EXPONENTIAL"]["dist_name"], ["expon", "gamma"])
+        self.assertIn(best_fits["NORMAL"]["dist_name"], ["norm", "gamma", "lognorm", "triang"])
+
+    def test_parallel_fitting(self):
+        sequential_fits = siminput.fit_samples(self.samples, parallel=False)
+        shutil.rmtree(gtconfig.fit_cache_folder)
+        parallel_fits = siminput.fit_samples(self.samples, parallel=True)
+
+        for desc, best_fit in sequential_fits.iteritems():
+            self.assertEqual(best_fit["dist_name"], parallel_fits[desc]["dist_name"])
+            self.assertEqual(best_fit["parameters"], parallel_fits[desc]["parameters"])
+
+    def test_analysis_without_plot(self):
+        best_fit = siminput.launch_input_analysis(self.samples["EXPONENTIAL"], "EXPONENTIAL", show_data_plot=False,
+                                                  save_plot=False)
+
+        self.assertEqual(siminput.fit_samples(self.samples, parallel=False)["EXPONENTIAL"]["dist_name"],
+                         best_fit["dist_name"])
+
+    def test_fit_cache(self):
+        best_fits = siminput.fit_samples(self.samples, parallel=False)
+        self.assertEqual(2, len(os.listdir(os.path.join(gtconfig.fit_cache_folder, siminput.FITS_CACHE))))
+
+        sample_key = siminput.get_sample_key(self.samples["NORMAL"])
+        cached_fit = siminput.read_cache_entry(siminput.FITS_CACHE, sample_key)
+        cached_fit["ks_p_value"] = 2.0
+        siminput.write_cache_entry(siminput.FITS_CACHE, sample_key, cached_fit)
+
+        cached_fits = siminput.fit_samples(self.samples, parallel=False)
+        self.assertEqual(2.0, cached_fits["NORMAL"]["ks_p_value"])
+        self.assertEqual(best_fits["NORMAL"]["parameters"], cached_fits["NORMAL"]["parameters"])
+        self.assertEqual(best_fits["NORMAL"]["distribution"], cached_fits["NORMAL"]["distribution"])
+
+    def test_concurrent_cache_writers(self):
+        pool = Pool(processes=2)
+        try:
+            pool.map(fit_on_worker, [(desc, data_series.values, gtconfig.fit_cache_folder) for desc, data_series in
+                                     self.samples.iteritems()])
+        finally:
+            pool.close()
+            pool.join()
+            pool.clear()
+
+        for data_series in self.samples.values():
+            self.assertIsNotNone(siminput.read_cache_entry(siminput.FITS_CACHE,
+                                                           siminput.get_sample_key(data_series)))
+
+    def test_store_sample(self):
+        file_name = os.path.join(self.directory, "sample.csv")
+        siminput.store_sample(self.samples["NORMAL"], file_name)
+        os.utime(file_name, (0, 0))
+
+        siminput.store_sample(self.samples["NORMAL"], file_name)
+        self.assertEqual(0, os.path.getmtime(file_name))
+
+        siminput.store_sample(self.samples["EXPONENTIAL"], file_name)
+        self.assertNotEqual(0, os.path.getmtime(file_name))
+
+    def test_sample_key(self):
+        sample = self.samples["NORMAL"]
+
+        self.assertEqual(siminput.get_sample_key(sample), siminput.get_sample_key(sample.copy()))
+        self.assertNotEqual(siminput.get_sample_key(sample), siminput.get_sample_key(sample + 1))
+
+    def test_screening(self):
+        random_state = np.random.RandomState(1)
+        large_samples = {"EXPONENTIAL": pd.Series(random_state.exponential(scale=30.0, size=5000)),
+                         "NORMAL": pd.Series(random_state.normal(loc=100.0, scale=10.0, size=5000)),
+                         "LOGNORMAL": pd.Series(random_state.lognormal(mean=2.0, sigma=1.0, size=5000))}
+
+        screened_candidates = siminput.get_screened_candidates(large_samples["LOGNORMAL"], candidates=3)
+        self.assertEqual(3, len(screened_candidates))
+        self.assertEqual("lognorm", siminput.CANDIDATE_DISTRIBUTIONS[screened_candidates[0]][0])
+
+        exhaustive_fits = siminput.fit_samples(large_samples, parallel=False, screening=False)
+        screened_fits = siminput.fit_samples(large_samples, parallel=False, screening=True)
+
+        for desc, best_fit in exhaustive_fits.iteritems():
+            self.assertEqual(best_fit["dist_name"], screened_fits[desc]["dist_name"], desc)
+            self.assertEqual(best_fit["parameters"], screened_fits[desc]["parameters"], desc)
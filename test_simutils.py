@@ -16,3 +16,22 @@ class TestContinuousEmpiricalDistribution(unittest.TestCase):
         random_variate = distribution.generate(rand_uniform=0.8)
         expected = 7.3
         self.assertAlmostEqual(expected, random_variate)
+
+
+def get_block_id(scenario, simfunction):
+    return scenario, simfunction.keywords['block_id']
+
+
+class TestRunScenarios(unittest.TestCase):
+    def test_sequential(self):
+        outputs = list(simutils.run_scenarios(lambda scenario, simfunction: (scenario, simfunction), ["a", "b"],
+                                              simfunction=simutils.launch_simulation, parallel=False, processes=None))
+
+        self.assertEqual([("a", simutils.launch_simulation), ("b", simutils.launch_simulation)], outputs)
+
+    def test_parallel_seeds(self):
+        outputs = dict(simutils.run_scenarios(get_block_id, ["a", "b", "c"], simfunction=simutils.launch_simulation,
+                                              parallel=True, processes=2))
+
+        self.assertEqual(["a", "b", "c"], sorted(outputs.keys()))
+        self.assertEqual(3, len(set(outputs.values())))
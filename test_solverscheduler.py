@@ -0,0 +1,42 @@
+import time
+import unittest
+
+import solverscheduler
+
+
+class SleepScheduler(solverscheduler.SolverScheduler):
+    """
+    Runs sleep commands instead of Gambit solvers.
+    """
+
+    def get_command_line(self, solve_request):
+        return ["sleep", solve_request['gambit_file']]
+
+
+class TestSolverScheduler(unittest.TestCase):
+    def test_timeout_without_polling(self):
+        scheduler = SleepScheduler(max_workers=1, timeout=0.2, poll_interval=0.05)
+        results = []
+
+        try:
+            scheduler.submit([], "10", results.append)
+            scheduler.submit([], "10", results.append)
+            process = scheduler.running[0]['process']
+
+            time.sleep(1.0)
+            self.assertIsNotNone(process.poll())
+            self.assertEqual(0, len(scheduler.queued))
+            self.assertEqual([], results)
+
+            scheduler.wait()
+            self.assertEqual([None, None], results)
+        finally:
+            scheduler.shutdown()
+
+    def test_shutdown_kills_solvers(self):
+        with SleepScheduler(max_workers=2, poll_interval=0.05) as scheduler:
+            scheduler.submit([], "10", None)
+            process = scheduler.running[0]['process']
+
+        self.assertIsNotNone(process.poll())
+        self.assertEqual([], scheduler.running)
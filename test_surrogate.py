@@ -0,0 +1,71 @@
+import unittest
+
+import payoffstore
+import surrogate
+from gamefixtures import EmpiricalStrategy, StubGame
+
+
+class TestSurrogatePruning(unittest.TestCase):
+    def setUp(self):
+        """
+        A game where inflating is dominant: The payoff grows with the own inflation probability, and decreases with the
+        inflation of the other team.
+        :return:
+        """
+        self.teams = 2
+        self.strategies_catalog = [EmpiricalStrategy("INF" + str(index), index / 7.0, 0.0) for index in range(8)]
+        self.game = StubGame(self.strategies_catalog, self.get_payoffs, self.teams)
+        self.strategy_maps = self.game.strategy_maps
+        self.payoff_store = payoffstore.PayoffStore(self.teams)
+
+    def get_payoffs(self, strategy_map):
+        return [100 + 20 * strategy_map[team].inflation_prob - 10 * strategy_map[1 - team].inflation_prob for team in
+                range(self.teams)]
+
+    def payoff_oracle(self, strategy_map):
+        profile_key = payoffstore.get_profile_key(strategy_map, self.teams)
+
+        if not self.payoff_store.contains(profile_key):
+            payoffs = self.game.payoff_oracle(strategy_map)
+            self.payoff_store.add_samples(profile_key, [[payoff - 1, payoff + 1] for payoff in payoffs])
+
+        return self.payoff_store.get_payoffs(profile_key)
+
+    def equilibrium_solver(self, payoff_function):
+        return self.game.get_pure_equilibria(payoff_function)
+
+    def test_prune_profiles(self):
+        equilibrium_list = surrogate.prune_profiles(self.strategy_maps, self.strategies_catalog, self.teams,
+                                                    self.payoff_store, self.payoff_oracle, self.equilibrium_solver,
+                                                    initial_profiles=10)
+
+        exhaustive_list = self.equilibrium_solver(self.payoff_oracle)
+
+        self.assertEqual((1.0, 1.0), surrogate.get_equilibria_agreement(equilibrium_list, exhaustive_list))
+        self.assertEqual("1", equilibrium_list[0][0]["INF7"])
+
+    def test_profiles_are_pruned(self):
+        surrogate.prune_profiles(self.strategy_maps, self.strategies_catalog, self.teams, self.payoff_store,
+                                 self.payoff_oracle, self.equilibrium_solver, initial_profiles=10)
+
+        self.assertLess(len(self.payoff_store), len(self.strategy_maps))
+
+    def test_solved_after_last_round(self):
+        solved_with = []
+
+        def counting_solver(payoff_function):
+            solved_with.append(len(self.payoff_store))
+            return self.equilibrium_solver(payoff_function)
+
+        surrogate.prune_profiles(self.strategy_maps, self.strategies_catalog, self.teams, self.payoff_store,
+                                 self.payoff_oracle, counting_solver, initial_profiles=10, max_rounds=1)
+
+        self.assertEqual(2, len(solved_with))
+        self.assertEqual(len(self.payoff_store), solved_with[-1])
+
+    def test_equilibria_agreement(self):
+        pure_profile = {0: {"HONEST": "1", "INFLATE": "0"}}
+        mixed_profile = {0: {"HONEST": "1/2", "INFLATE": "1/2"}}
+
+        self.assertEqual((0.5, 1.0), surrogate.get_equilibria_agreement([pure_profile],
+                                                                        [pure_profile, mixed_profile]))